@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Facebook Ads MCP server.
+
+Runs the server's tools against a local mock Graph API server, so no token or
+network access is needed:
+
+    python benchmark.py concurrency --calls 200 --latency 0.05
+    python benchmark.py aggregate --rows 100000
+    python benchmark.py shape --rows 500
+    python benchmark.py workers --workers 1 2 4
+
+The workers benchmark reports calls/sec and speedup per worker count; it only shows
+multi-core scaling on a machine with at least as many CPUs as the largest worker count.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import time
+from urllib.parse import urlparse, parse_qs
+
+# Keep the server from picking up a real token from .env
+os.environ.setdefault('FB_ACCESS_TOKEN', 'benchmark_token')
+
+import server
+
+
+def mock_node(method, path, query, body):
+    """Answers every request with a small Graph-style node."""
+    node_id = path.rstrip('/').split('/')[-1]
+    return 200, {'id': node_id, 'name': f'Campaign {node_id}', 'status': 'ACTIVE'}
+
+
+# debug_token answer for the server's token validation
+MOCK_TOKEN_INFO = {'data': {'is_valid': True, 'type': 'USER', 'app_id': '1', 'scopes': ['ads_read'], 'expires_at': 0}}
+
+
+async def _handle_mock_connection(reader, writer, responder, latency):
+    """Minimal keep-alive HTTP/1.1 loop; enough for httpx against a mock Graph API."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, _ = request_line.decode().split(' ', 2)
+            content_length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode().partition(':')
+                if name.lower() == 'content-length':
+                    content_length = int(value.strip())
+            body = await reader.readexactly(content_length) if content_length else b''
+
+            await asyncio.sleep(latency)
+            parsed = urlparse(target)
+            if parsed.path.endswith('/debug_token'):
+                status, payload = 200, MOCK_TOKEN_INFO
+            else:
+                status, payload = responder(method, parsed.path, parse_qs(parsed.query), body)
+            data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+            writer.write(
+                f'HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n'
+                f'Content-Length: {len(data)}\r\n\r\n'.encode() + data
+            )
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+def _serve_mock_graph(responder, latency, port_queue):
+    async def serve():
+        mock = await asyncio.start_server(
+            lambda r, w: _handle_mock_connection(r, w, responder, latency),
+            '127.0.0.1', 0, backlog=1024
+        )
+        port_queue.put(mock.sockets[0].getsockname()[1])
+        await mock.serve_forever()
+    asyncio.run(serve())
+
+
+def start_mock_graph_server(responder=mock_node, latency=0.05):
+    """Starts the mock Graph API in a child process and points server.py at it.
+
+    Running it out of process keeps the mock from competing with the MCP
+    server's event loop for CPU time.
+    """
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_serve_mock_graph, args=(responder, latency, port_queue), daemon=True
+    )
+    process.start()
+    server.FB_GRAPH_URL = f'http://127.0.0.1:{port_queue.get(timeout=10)}'
+    return process
+
+
+async def _run_tool_calls(calls):
+    """Issues `calls` concurrent get_campaign_by_id tool calls through FastMCP."""
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        server.mcp.call_tool('get_campaign_by_id', {'campaign_id': str(i)})
+        for i in range(calls)
+    ))
+    return time.perf_counter() - started
+
+
+def bench_concurrency(args):
+    start_mock_graph_server(latency=args.latency)
+
+    print("\n" + "="*80)
+    print(f"Concurrent tool calls: {args.calls} calls, {args.latency * 1000:.0f} ms mock latency")
+    print("="*80)
+    print(f"{'max_concurrency':>16} {'seconds':>10} {'calls/sec':>12}")
+
+    for limit in args.limits:
+        server.HTTP_MAX_CONCURRENCY = limit
+        server.HTTP_POOL_MAXSIZE = max(limit, 1)
+        server.HTTP_MAX_KEEPALIVE = max(limit, 1)
+        server.HTTP_CLIENT = None
+        elapsed = asyncio.run(_run_tool_calls(args.calls))
+        print(f"{limit:>16} {elapsed:>10.2f} {args.calls / elapsed:>12.1f}")
+
+
+def synthetic_insights_rows(count, seed=0):
+    """Graph-style insights rows: string metrics and nested action lists."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        impressions = rng.randint(100, 50000)
+        clicks = rng.randint(0, impressions // 20)
+        spend = round(impressions * rng.uniform(0.002, 0.02), 2)
+        purchases = rng.randint(0, max(clicks // 10, 1))
+        rows.append({
+            'campaign_id': str(1000 + i % 50),
+            'adset_id': str(20000 + i % 500),
+            'ad_id': str(300000 + i % 5000),
+            'age': rng.choice(['18-24', '25-34', '35-44', '45-54', '55-64', '65+']),
+            'gender': rng.choice(['female', 'male', 'unknown']),
+            'date_start': f'2024-01-{1 + i % 28:02d}',
+            'impressions': str(impressions),
+            'clicks': str(clicks),
+            'spend': f'{spend:.2f}',
+            'actions': [
+                {'action_type': 'link_click', 'value': str(clicks)},
+                {'action_type': 'purchase', 'value': str(purchases)}
+            ],
+            'action_values': [{'action_type': 'purchase', 'value': f'{purchases * 42.5:.2f}'}]
+        })
+    return rows
+
+
+def bench_aggregate(args):
+    rows = synthetic_insights_rows(args.rows)
+    raw_bytes = len(json.dumps(rows))
+    metrics = ['spend', 'impressions', 'clicks', 'actions:purchase', 'action_values:purchase']
+    derived = ['cpc', 'cpm', 'ctr', 'cpa', 'roas']
+
+    print("\n" + "="*80)
+    print(f"Insights aggregation: {args.rows} rows, {raw_bytes / 1e6:.1f} MB of raw JSON")
+    print("="*80)
+    print(f"{'group_by':>28} {'groups':>8} {'columnize s':>12} {'total s':>10} {'output bytes':>14}")
+
+    for group_by in ([], ['campaign_id'], ['campaign_id', 'age', 'gender'], ['ad_id', 'date_start']):
+        started = time.perf_counter()
+        server.InsightsColumns(rows, group_by, metrics)
+        columnized = time.perf_counter() - started
+        started = time.perf_counter()
+        result = server._aggregate_insights(rows, group_by, metrics, derived, sort_by='spend')
+        elapsed = time.perf_counter() - started
+        print(f"{','.join(group_by) or '(totals)':>28} {result['groups']:>8} {columnized:>12.3f} "
+              f"{elapsed:>10.3f} {len(json.dumps(result)):>14}")
+
+
+def insights_page_fixture(count):
+    """One auto-paginated insights response as get_adaccount_insights returns it:
+    ad-level rows with action lists, plus a paging block carrying the access token."""
+    rows = synthetic_insights_rows(count)
+    for row in rows:
+        row.update({
+            'account_id': '123456789', 'account_name': 'Benchmark account', 'campaign_name': 'Campaign name',
+            'adset_name': 'Ad set name', 'ad_name': 'Ad name', 'reach': row['impressions'],
+            'frequency': '1.0', 'cpc': '0.5', 'cpm': '5.1', 'ctr': '1.2',
+            'date_stop': row['date_start'],
+            'cost_per_action_type': [{'action_type': 'purchase', 'value': '12.5'},
+                                     {'action_type': 'link_click', 'value': '0.5'}]
+        })
+        row['actions'] += [{'action_type': t, 'value': '3'} for t in
+                           ('post_engagement', 'page_engagement', 'landing_page_view', 'video_view')]
+    token = 'EAAB' + 'x' * 200
+    cursor = 'QVFIU' + 'y' * 120
+    return {
+        'data': rows,
+        'paging': {
+            'cursors': {'before': cursor, 'after': cursor},
+            'next': f'https://graph.facebook.com/v22.0/act_123456789/insights?access_token={token}'
+                    f'&fields=spend,impressions,clicks,actions&level=ad&limit={count}&after={cursor}'
+        }
+    }
+
+
+def bench_shape(args):
+    page = insights_page_fixture(args.rows)
+    select = ['ad_id', 'date_start', 'spend', 'impressions', 'clicks', 'actions:purchase', 'action_values:purchase']
+    variants = [
+        ('raw', {}),
+        ('drop_paging', {'drop_paging': True}),
+        ('flatten_actions', {'flatten_actions': True}),
+        ('select (flattened)', {'flatten_actions': True, 'select': select}),
+        ('compact', {'compact': True}),
+        ('all options', {'flatten_actions': True, 'select': select, 'drop_paging': True, 'compact': True}),
+    ]
+
+    print("\n" + "="*80)
+    print(f"Output shaping: one insights response with {args.rows} rows (serialized as MCP text content)")
+    print("="*80)
+    print(f"{'variant':>20} {'bytes':>12} {'vs raw':>8} {'shape ms':>10} {'serialize ms':>14}")
+
+    raw_bytes = None
+    for name, options in variants:
+        started = time.perf_counter()
+        shaped = server._shape_result(page, **options)
+        shaping = time.perf_counter() - started
+        started = time.perf_counter()
+        text = json.dumps(shaped, indent=2)  # FastMCP serializes tool results with indent=2
+        serializing = time.perf_counter() - started
+        raw_bytes = raw_bytes or len(text)
+        print(f"{name:>20} {len(text):>12} {len(text) / raw_bytes:>7.0%} "
+              f"{shaping * 1000:>10.1f} {serializing * 1000:>14.1f}")
+
+
+MOCK_INSIGHTS_ROWS = 2000
+MOCK_REQUESTS = multiprocessing.Value('i', 0)
+_mock_insights_body = None
+
+
+def mock_insights(method, path, query, body):
+    """Answers every request with the same pre-encoded page of ad-level insights rows."""
+    global _mock_insights_body
+    if _mock_insights_body is None:
+        _mock_insights_body = json.dumps({'data': synthetic_insights_rows(MOCK_INSIGHTS_ROWS)}).encode()
+    with MOCK_REQUESTS.get_lock():
+        MOCK_REQUESTS.value += 1
+    return 200, _mock_insights_body
+
+
+def _serve_mcp_http(graph_url, port, workers):
+    logging.disable(logging.WARNING)
+    server.FB_GRAPH_URL = graph_url
+    server.mcp.settings.log_level = 'WARNING'
+    server.main(['--transport', 'streamable-http', '--port', str(port), '--workers', str(workers),
+                 '--allow-server-token'])
+
+
+def _client_calls(port, calls, tool, arguments):
+    """One MCP client session issuing `calls` sequential tool calls; returns the failures."""
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamablehttp_client
+    logging.disable(logging.WARNING)
+
+    async def run():
+        failures = 0
+        async with streamablehttp_client(f'http://127.0.0.1:{port}/mcp') as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                for _ in range(calls):
+                    result = await session.call_tool(tool, arguments)
+                    failures += bool(result.isError)
+        return failures
+    return asyncio.run(run())
+
+
+def _wait_for_port(port, timeout=20):
+    import socket
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'MCP server did not start on port {port}')
+
+
+def bench_workers(args):
+    os.environ['FB_INSIGHTS_STORE'] = 'false'
+    server.INSIGHTS_STORE_ENABLED = False
+    start_mock_graph_server(mock_insights, latency=args.latency)
+    graph_url = server.FB_GRAPH_URL
+    aggregate = {'object_id': 'act_1', 'level': 'ad', 'group_by': ['campaign_id', 'age'],
+                 'metrics': ['spend', 'impressions', 'clicks', 'actions:purchase'], 'derived': ['cpc', 'ctr']}
+
+    print("\n" + "="*80)
+    print(f"Multi-worker load test: aggregate_insights over {MOCK_INSIGHTS_ROWS} rows per call, "
+          f"{args.clients} clients x {args.calls} calls, {os.cpu_count()} CPUs")
+    print("="*80)
+    if (os.cpu_count() or 1) < max(args.workers):
+        print(f"Only {os.cpu_count()} CPUs: workers beyond that share cores, so the speedup column "
+              f"does not show multi-core scaling. Run on a machine with at least {max(args.workers)} CPUs.")
+    print(f"{'workers':>8} {'seconds':>10} {'calls/sec':>12} {'speedup':>9} {'failures':>9} {'repeat fetches':>15}")
+
+    baseline = None
+    for index, workers in enumerate(args.workers):
+        port = args.port + index
+        process = multiprocessing.Process(target=_serve_mcp_http, args=(graph_url, port, workers), daemon=True)
+        process.start()
+        try:
+            _wait_for_port(port)
+            _client_calls(port, 1, 'aggregate_insights', aggregate)  # warm up
+            with multiprocessing.Pool(args.clients) as pool:
+                started = time.perf_counter()
+                failures = sum(pool.starmap(
+                    _client_calls, [(port, args.calls, 'aggregate_insights', aggregate)] * args.clients
+                ))
+                elapsed = time.perf_counter() - started
+
+                # The same rolled-up report requested by every client: with a shared cache tier
+                # it is fetched from the Graph API once, whichever workers serve the calls
+                rollup = {'act_id': f'act_{port}', 'fields': ['spend', 'impressions', 'clicks']}
+                _client_calls(port, 1, 'get_rolled_up_insights', rollup)
+                before = MOCK_REQUESTS.value
+                pool.starmap(_client_calls, [(port, 2, 'get_rolled_up_insights', rollup)] * args.clients)
+                refetches = MOCK_REQUESTS.value - before
+        finally:
+            os.kill(process.pid, 15)
+            process.join(10)
+        rate = args.clients * args.calls / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>8} {elapsed:>10.2f} {rate:>12.1f} {rate / baseline:>8.2f}x {failures:>9} {refetches:>15}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    concurrency = subparsers.add_parser('concurrency', help='Throughput of N concurrent tool calls')
+    concurrency.add_argument('--calls', type=int, default=200)
+    concurrency.add_argument('--latency', type=float, default=0.05, help='Mock Graph API latency in seconds')
+    concurrency.add_argument('--limits', type=int, nargs='+', default=[1, 4, 16, 64],
+                             help='FB_MAX_CONCURRENT_REQUESTS values to compare')
+    concurrency.set_defaults(func=bench_concurrency)
+
+    aggregate = subparsers.add_parser('aggregate', help='Server-side insights aggregation on synthetic rows')
+    aggregate.add_argument('--rows', type=int, default=100000)
+    aggregate.set_defaults(func=bench_aggregate)
+
+    shape = subparsers.add_parser('shape', help='Payload size and serialization time of output shaping options')
+    shape.add_argument('--rows', type=int, default=500)
+    shape.set_defaults(func=bench_shape)
+
+    workers = subparsers.add_parser('workers', help='Throughput of the pre-forked streamable HTTP server')
+    workers.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    workers.add_argument('--clients', type=int, default=8, help='Concurrent MCP client processes')
+    workers.add_argument('--calls', type=int, default=10, help='Tool calls per client')
+    workers.add_argument('--latency', type=float, default=0.01, help='Mock Graph API latency in seconds')
+    workers.add_argument('--port', type=int, default=8900)
+    workers.set_defaults(func=bench_workers)
+
+    args = parser.parse_args()
+    args.func(args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
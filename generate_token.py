@@ -8,7 +8,7 @@ NO REDIRECT URI NEEDED - This method doesn't require OAuth redirect configuratio
 
 import os
 import sys
-import requests
+from http_pool import create_session
 from dotenv import load_dotenv, set_key
 
 load_dotenv()
@@ -17,6 +17,9 @@ FB_APP_ID = os.getenv('FB_APP_ID')
 FB_APP_SECRET = os.getenv('FB_APP_SECRET')
 API_VERSION = 'v23.0'
 
+# Connection pool and timeouts follow the FB_HTTP_* settings (see http_pool.py)
+http_session = create_session()
+
 def get_long_lived_token(short_token):
     """Exchange short-lived token for long-lived token (60 days)"""
     url = f'https://graph.facebook.com/{API_VERSION}/oauth/access_token'
@@ -28,7 +31,7 @@ def get_long_lived_token(short_token):
     }
 
     try:
-        response = requests.get(url, params=params)
+        response = http_session.get(url, params=params)
         response.raise_for_status()
         data = response.json()
         return data.get('access_token')
@@ -47,7 +50,7 @@ def get_token_info(access_token):
     }
 
     try:
-        response = requests.get(url, params=params)
+        response = http_session.get(url, params=params)
         response.raise_for_status()
         data = response.json()
         return data.get('data', {})
@@ -0,0 +1,45 @@
+"""
+Pooled requests session for the token scripts (generate_token.py, oauth_server.py).
+
+Uses the same FB_HTTP_* settings as the server's httpx client:
+FB_HTTP_POOL_MAXSIZE caps the open connections per host, FB_HTTP_MAX_KEEPALIVE=0
+closes every connection after its request instead of keeping it alive, and
+FB_HTTP_CONNECT_TIMEOUT / FB_HTTP_READ_TIMEOUT are the default timeouts.
+"""
+
+import os
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PooledSession(requests.Session):
+    """A requests.Session that applies a default timeout to every request."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session():
+    """Creates a session configured from the environment.
+
+    Settings are read when called, so scripts should call this after load_dotenv().
+    """
+    pool_maxsize = int(os.getenv('FB_HTTP_POOL_MAXSIZE', '16'))
+    max_keepalive = int(os.getenv('FB_HTTP_MAX_KEEPALIVE', '16'))
+    timeout = (float(os.getenv('FB_HTTP_CONNECT_TIMEOUT', '10')),
+               float(os.getenv('FB_HTTP_READ_TIMEOUT', '120')))
+
+    session = PooledSession(timeout)
+    # urllib3 keeps up to pool_maxsize connections per host for reuse; with pool_block
+    # it never opens more than that, like the httpx client's max_connections
+    adapter = HTTPAdapter(pool_maxsize=max(1, pool_maxsize), pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if max_keepalive <= 0:
+        session.headers['Connection'] = 'close'
+    return session
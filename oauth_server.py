@@ -10,7 +10,7 @@ This replaces the need for third-party OAuth services - everything runs locally
 import os
 import sys
 import secrets
-import requests
+from http_pool import create_session
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs, urlencode
 from dotenv import load_dotenv, set_key
@@ -22,6 +22,8 @@ FB_APP_SECRET = os.getenv('FB_APP_SECRET')
 REDIRECT_URI = 'http://localhost:8000/callback'
 API_VERSION = 'v23.0'  # Latest stable version
 
+http_session = create_session()
+
 # Permissions needed for Meta Ads API
 # Note: Facebook changed how Ads API permissions work - they're not OAuth scopes anymore
 # For development/testing, use Graph API Explorer instead (see README)
@@ -104,7 +106,7 @@ class OAuthHandler(BaseHTTPRequestHandler):
                 }
 
                 try:
-                    response = requests.get(token_url, params=params)
+                    response = http_session.get(token_url, params=params)
                     response.raise_for_status()
                     data = response.json()
 
@@ -256,7 +258,7 @@ class OAuthHandler(BaseHTTPRequestHandler):
         }
 
         try:
-            response = requests.get(url, params=params)
+            response = http_session.get(url, params=params)
             response.raise_for_status()
             data = response.json()
             return data.get('access_token')
@@ -273,7 +275,7 @@ class OAuthHandler(BaseHTTPRequestHandler):
         }
 
         try:
-            response = requests.get(url, params=params)
+            response = http_session.get(url, params=params)
             response.raise_for_status()
             data = response.json()
             return data.get('data', {})
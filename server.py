@@ -1,11 +1,38 @@
 # server.py
-from mcp.server.fastmcp import FastMCP
-import requests
-from typing import Dict, List, Optional, Any
+from mcp.server.fastmcp import FastMCP, Context
+from mcp.server.lowlevel.server import request_ctx
+from mcp.server.transport_security import TransportSecuritySettings
+import argparse
+import asyncio
+import atexit
+import contextlib
+import contextvars
+import functools
+import httpx
+import inspect
+import weakref
+from array import array
+from collections import OrderedDict, deque
+from typing import Annotated, Awaitable, Callable, Dict, List, Optional, Any
+from pydantic import Field
+from urllib.parse import urlencode, urlparse, parse_qs
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import copy
+import hashlib
 import json
+import logging
+import math
+import random
+import re
+import shutil
+import sqlite3
 import sys
+import threading
+import time
 from dotenv import load_dotenv
 import os
+import generate_token
 
 # Load environment variables from .env file
 load_dotenv()
@@ -13,6 +40,25 @@ load_dotenv()
 # --- Constants ---
 FB_API_VERSION = "v22.0"
 FB_GRAPH_URL = f"https://graph.facebook.com/{FB_API_VERSION}"
+
+# Transport the server runs on when started as a script ('stdio', 'sse' or 'streamable-http');
+# the --transport, --host and --port arguments override these
+MCP_TRANSPORT = os.getenv('FB_MCP_TRANSPORT', 'stdio')
+MCP_HOST = os.getenv('FB_MCP_HOST', '127.0.0.1')
+MCP_PORT = int(os.getenv('FB_MCP_PORT', '8000'))
+# Worker processes for the streamable HTTP transport (pre-forked, sharing one listening socket)
+MCP_WORKERS = int(os.getenv('FB_MCP_WORKERS', '1'))
+# Header in which clients of the network transports send their own Facebook access token
+# ('Authorization: Bearer <token>' is accepted too)
+ACCESS_TOKEN_HEADER = 'x-fb-access-token'
+# Under the network transports every client must send its own token; set to true to let
+# clients without one use the server-wide FB_ACCESS_TOKEN (only on trusted networks)
+MCP_ALLOW_SERVER_TOKEN = os.getenv('FB_MCP_ALLOW_SERVER_TOKEN', 'false').lower() in ('1', 'true', 'yes')
+# Host and Origin header values accepted when the HTTP transports listen beyond localhost,
+# e.g. 'ads-mcp.internal:8000' and 'https://ads-mcp.internal'; others are rejected
+# (DNS rebinding protection)
+MCP_ALLOWED_HOSTS = [h.strip() for h in os.getenv('FB_MCP_ALLOWED_HOSTS', '').split(',') if h.strip()]
+MCP_ALLOWED_ORIGINS = [o.strip() for o in os.getenv('FB_MCP_ALLOWED_ORIGINS', '').split(',') if o.strip()]
 DEFAULT_AD_ACCOUNT_FIELDS = [
     'name', 'business_name', 'age', 'account_status', 'balance',
     'amount_spent', 'attribution_spec', 'account_id', 'business',
@@ -20,18 +66,308 @@ DEFAULT_AD_ACCOUNT_FIELDS = [
     'created_time', 'id'
 ]
 
+# Default fields for get_portfolio_insights
+DEFAULT_PORTFOLIO_INSIGHTS_FIELDS = [
+    'account_id', 'account_name', 'spend', 'impressions', 'reach', 'clicks', 'ctr', 'cpc', 'cpm'
+]
+# Insights fields holding amounts in the account's currency (plain values or lists of {'value': ...})
+MONETARY_INSIGHTS_FIELDS = {
+    'spend', 'social_spend', 'cpc', 'cpm', 'cpp', 'cost_per_unique_click',
+    'cost_per_inline_link_click', 'cost_per_unique_inline_link_click', 'cost_per_outbound_click',
+    'cost_per_unique_outbound_click', 'cost_per_action_type', 'cost_per_unique_action_type',
+    'cost_per_conversion', 'cost_per_thruplay', 'cost_per_estimated_ad_recallers',
+    'cost_per_15_sec_video_view', 'cost_per_2_sec_continuous_video_view',
+    'action_values', 'conversion_values', 'website_purchase_roas_value'
+}
+
+# Insights dimensions requested through 'breakdowns' rather than 'fields'
+INSIGHTS_BREAKDOWNS = {
+    'age', 'gender', 'country', 'region', 'dma', 'impression_device', 'publisher_platform',
+    'platform_position', 'device_platform', 'product_id', 'frequency_value', 'place_page_id',
+    'hourly_stats_aggregated_by_advertiser_time_zone', 'hourly_stats_aggregated_by_audience_time_zone'
+}
+# Derived insights metrics as (numerator, denominator, scale), computed from summed columns;
+# '{action}' is replaced by the action type the caller chooses (e.g. 'purchase')
+DERIVED_INSIGHTS_METRICS = {
+    'cpc': ('spend', 'clicks', 1.0),
+    'cpm': ('spend', 'impressions', 1000.0),
+    'ctr': ('clicks', 'impressions', 100.0),
+    'cpa': ('spend', 'actions:{action}', 1.0),
+    'roas': ('action_values:{action}', 'spend', 1.0),
+    'cost_per_inline_link_click': ('spend', 'inline_link_clicks', 1.0),
+    'inline_link_click_ctr': ('inline_link_clicks', 'impressions', 100.0)
+}
+# Identity fields of each insights level, used to group ad-level rows when rolling up
+ROLLUP_LEVEL_FIELDS = {
+    'account': ['account_id', 'account_name', 'account_currency'],
+    'campaign': ['campaign_id', 'campaign_name'],
+    'adset': ['adset_id', 'adset_name'],
+    'ad': ['ad_id', 'ad_name']
+}
+ROLLUP_LEVELS = ['account', 'campaign', 'adset', 'ad']
+# Scalar insights fields that can be summed across ads; list fields of actions are summed
+# per action type unless they hold ratios (see _rollup_field_kind)
+ADDITIVE_INSIGHTS_FIELDS = {
+    'spend', 'impressions', 'clicks', 'inline_link_clicks', 'inline_post_engagement',
+    'social_spend', 'full_view_impressions'
+}
+ADDITIVE_INSIGHTS_LIST_FIELDS = {'actions', 'action_values', 'conversions', 'conversion_values', 'outbound_clicks'}
+
+# Default fields per level for get_account_hierarchy
+DEFAULT_HIERARCHY_CAMPAIGN_FIELDS = [
+    'id', 'name', 'status', 'effective_status', 'objective', 'daily_budget', 'lifetime_budget'
+]
+DEFAULT_HIERARCHY_ADSET_FIELDS = [
+    'id', 'name', 'status', 'effective_status', 'daily_budget', 'lifetime_budget',
+    'optimization_goal', 'billing_event'
+]
+DEFAULT_HIERARCHY_AD_FIELDS = ['id', 'name', 'status', 'effective_status']
+DEFAULT_HIERARCHY_CREATIVE_FIELDS = ['id', 'name', 'title', 'body', 'thumbnail_url', 'call_to_action_type']
+
+# HTTP connection pool settings for the shared Graph API client
+HTTP_POOL_MAXSIZE = int(os.getenv('FB_HTTP_POOL_MAXSIZE', '16'))  # total open connections
+HTTP_MAX_KEEPALIVE = int(os.getenv('FB_HTTP_MAX_KEEPALIVE', '16'))  # idle connections kept alive
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('FB_HTTP_KEEPALIVE_EXPIRY', '60'))
+HTTP_MAX_CONCURRENCY = int(os.getenv('FB_MAX_CONCURRENT_REQUESTS', '16'))  # in-flight Graph requests
+HTTP_CONNECT_TIMEOUT = float(os.getenv('FB_HTTP_CONNECT_TIMEOUT', '10'))
+HTTP_READ_TIMEOUT = float(os.getenv('FB_HTTP_READ_TIMEOUT', '120'))
+# Overall time budget for one tool call, shared by its requests, pagination, shards and retries
+TOOL_DEADLINE = float(os.getenv('FB_TOOL_DEADLINE', '900'))
+# Extra time a tool gets to assemble partial results before it is cancelled outright
+TOOL_DEADLINE_GRACE = 5.0
+
+# Maximum number of sub-requests the Graph API accepts in one batch call
+GRAPH_BATCH_MAX_SIZE = 50
+# Maximum number of IDs the Graph API accepts in one ?ids= multi-get
+GRAPH_IDS_MAX_SIZE = 50
+
+# Upper bound on pages followed by auto_paginate when max_pages isn't given
+DEFAULT_MAX_PAGES = int(os.getenv('FB_AUTO_PAGINATE_MAX_PAGES', '100'))
+
+# Maximum number of ad accounts whose insights get_portfolio_insights fetches concurrently
+PORTFOLIO_PARALLELISM = int(os.getenv('FB_PORTFOLIO_PARALLELISM', '8'))
+
+# Maximum number of time-range shards fetched concurrently for one insights call
+SHARD_PARALLELISM = int(os.getenv('FB_SHARD_PARALLELISM', '4'))
+
+# Local directory for the server's persistent caches
+FB_MCP_DATA_DIR = os.getenv('FB_MCP_DATA_DIR', os.path.join(os.path.expanduser('~'), '.fb-ads-mcp'))
+INSIGHTS_DAY_CACHE_PATH = os.getenv(
+    'FB_INSIGHTS_DAY_CACHE_PATH', os.path.join(FB_MCP_DATA_DIR, 'insights_days.sqlite')
+)
+# Days newer than this can still change through late attributed conversions,
+# so they are always refetched; older days are cached permanently
+INSIGHTS_MUTABLE_DAYS = int(os.getenv('FB_INSIGHTS_MUTABLE_DAYS', '28'))
+# Parameters that select days or pages rather than the rows within a day
+INSIGHTS_DAY_CACHE_IGNORED_PARAMS = {
+    'access_token', 'date_preset', 'time_range', 'since', 'until',
+    'after', 'before', 'offset', 'limit'
+}
+# Queries with these parameters never use the day cache: rows stitched together from
+# single days can't reproduce a requested sort order or a summary over the whole range
+INSIGHTS_DAY_CACHE_BYPASS_PARAMS = {
+    'time_ranges', 'since', 'until', 'after', 'before', 'offset', 'sort', 'default_summary'
+}
+
+# Rate-limit pacing driven by the Graph API usage headers (percentages / seconds)
+RATE_LIMIT_PACE_THRESHOLD = float(os.getenv('FB_RATE_LIMIT_PACE_THRESHOLD', '75'))  # start pacing at this usage
+RATE_LIMIT_MAX_PACE_DELAY = float(os.getenv('FB_RATE_LIMIT_MAX_PACE_DELAY', '10'))  # delay per call near 100%
+RATE_LIMIT_MAX_WAIT = float(os.getenv('FB_RATE_LIMIT_MAX_WAIT', '60'))  # fail instead of waiting longer
+RATE_LIMIT_DEFAULT_COOLDOWN = float(os.getenv('FB_RATE_LIMIT_DEFAULT_COOLDOWN', '60'))
+# Usage readings older than this are ignored for pacing
+RATE_LIMIT_USAGE_TTL = 300
+# Graph error codes meaning a rate limit was hit (app, user, page, custom and business use case limits)
+GRAPH_THROTTLE_ERROR_CODES = {4, 17, 32, 613} | set(range(80000, 80015))
+
+# Retries of failed GET requests (seconds)
+RETRY_MAX_ATTEMPTS = int(os.getenv('FB_RETRY_MAX_ATTEMPTS', '3'))  # retries after the first attempt
+RETRY_BASE_DELAY = float(os.getenv('FB_RETRY_BASE_DELAY', '0.5'))
+RETRY_MAX_DELAY = float(os.getenv('FB_RETRY_MAX_DELAY', '10'))
+RETRY_DEADLINE = float(os.getenv('FB_RETRY_DEADLINE', '60'))  # total time spent retrying one request
+# Graph error codes for failures that may succeed when retried (unknown error, service unavailable)
+GRAPH_TRANSIENT_ERROR_CODES = {1, 2}
+# Graph error codes for invalid or expired tokens and missing permissions
+GRAPH_AUTH_ERROR_CODES = {10, 102, 190} | set(range(200, 300))
+RETRYABLE_ERROR_CATEGORIES = {'transient', 'throttled'}
+
+# Circuit breakers per endpoint family and token
+CIRCUIT_ERROR_RATE = float(os.getenv('FB_CIRCUIT_ERROR_RATE', '0.5'))  # failure share that trips a breaker
+CIRCUIT_MIN_REQUESTS = int(os.getenv('FB_CIRCUIT_MIN_REQUESTS', '10'))  # in the window, before it can trip
+CIRCUIT_WINDOW = float(os.getenv('FB_CIRCUIT_WINDOW', '60'))  # seconds of outcomes considered
+CIRCUIT_OPEN_SECONDS = float(os.getenv('FB_CIRCUIT_OPEN_SECONDS', '30'))  # fail fast this long before probing
+CIRCUIT_HALF_OPEN_PROBES = int(os.getenv('FB_CIRCUIT_HALF_OPEN_PROBES', '1'))
+# Error categories that count against a breaker; permanent errors are the caller's fault
+CIRCUIT_FAILURE_CATEGORIES = {'transient', 'throttled', 'auth'}
+
+# Access token validation through debug_token, cached per token (see TokenRegistry)
+TOKEN_VALIDATION_ENABLED = os.getenv('FB_TOKEN_VALIDATION', 'true').lower() not in ('0', 'false', 'no')
+TOKEN_VALIDATION_TTL = float(os.getenv('FB_TOKEN_VALIDATION_TTL', '3600'))  # seconds a validation is reused
+TOKEN_RECHECK_SECONDS = 60  # how soon rejected or unverifiable tokens are checked again
+# A token must have at least one of these permissions
+TOKEN_REQUIRED_SCOPES = [s.strip() for s in os.getenv('FB_TOKEN_REQUIRED_SCOPES', 'ads_read,ads_management').split(',') if s.strip()]
+# A server-wide user token expiring within this many seconds is exchanged for a new
+# long-lived token (needs FB_APP_ID and FB_APP_SECRET); client tokens are only reported as due
+TOKEN_REFRESH_WINDOW = float(os.getenv('FB_TOKEN_REFRESH_WINDOW', str(7 * 24 * 3600)))
+# Tokens the registry remembers at once, least recently used dropped first
+TOKEN_REGISTRY_MAX_TOKENS = int(os.getenv('FB_TOKEN_REGISTRY_MAX_TOKENS', '1024'))
+
+# In-process cache for single-object reads (get_*_by_id tools)
+NODE_CACHE_MAX_ENTRIES = int(os.getenv('FB_NODE_CACHE_MAX_ENTRIES', '1000'))
+# 'memory' keeps the cache in this process; 'sqlite' shares it between processes through
+# NODE_CACHE_PATH (always used with more than one worker)
+NODE_CACHE_BACKEND = os.getenv('FB_NODE_CACHE_BACKEND', 'memory')
+NODE_CACHE_PATH = os.getenv('FB_NODE_CACHE_PATH', os.path.join(FB_MCP_DATA_DIR, 'node_cache.sqlite'))
+# Seconds a cached object stays fresh, per entity type
+NODE_CACHE_TTLS = {
+    'adaccount': float(os.getenv('FB_NODE_CACHE_TTL_ADACCOUNT', '300')),
+    'campaign': float(os.getenv('FB_NODE_CACHE_TTL_CAMPAIGN', '60')),
+    'adset': float(os.getenv('FB_NODE_CACHE_TTL_ADSET', '60')),
+    'ad': float(os.getenv('FB_NODE_CACHE_TTL_AD', '60')),
+    'adcreative': float(os.getenv('FB_NODE_CACHE_TTL_ADCREATIVE', '600')),
+    # Ad-level insights fetched by get_rolled_up_insights
+    'insights': float(os.getenv('FB_NODE_CACHE_TTL_INSIGHTS', '300'))
+}
+
+# Local SQLite store of every fetched insights row, queried by query_insights_store
+INSIGHTS_STORE_ENABLED = os.getenv('FB_INSIGHTS_STORE', 'true').lower() not in ('0', 'false', 'no')
+INSIGHTS_STORE_PATH = os.getenv(
+    'FB_INSIGHTS_STORE_PATH', os.path.join(FB_MCP_DATA_DIR, 'insights_store.sqlite')
+)
+# Rows fetched longer ago than this are deleted, and past the row limit the least recently
+# fetched rows go first (0 disables either bound)
+INSIGHTS_STORE_RETENTION_DAYS = float(os.getenv('FB_INSIGHTS_STORE_RETENTION_DAYS', '90'))
+INSIGHTS_STORE_MAX_STORED_ROWS = int(os.getenv('FB_INSIGHTS_STORE_MAX_STORED_ROWS', '1000000'))
+INSIGHTS_STORE_PRUNE_INTERVAL = 3600  # seconds between retention passes of one process
+# Insights parameters that change metric values without changing which rows are returned
+INSIGHTS_ATTRIBUTION_PARAMS = (
+    'action_attribution_windows', 'action_breakdowns', 'action_report_time',
+    'use_account_attribution_setting', 'use_unified_attribution_setting'
+)
+# Scalar insights fields stored as TEXT even when they look numeric
+INSIGHTS_TEXT_FIELDS = {
+    'date_start', 'date_stop', 'age', 'gender', 'country', 'region', 'dma',
+    'hourly_stats_aggregated_by_advertiser_time_zone', 'hourly_stats_aggregated_by_audience_time_zone',
+    'publisher_platform', 'platform_position', 'device_platform', 'impression_device',
+    'objective', 'buying_type', 'optimization_goal', 'attribution_setting', 'account_currency',
+    'frequency_value'
+}
+INSIGHTS_STORE_MAX_ROWS = 1000
+
+# Tool results whose rows exceed this many bytes of JSON are kept in the server-side result
+# store and returned as a summary and handle, read with read_result_page/query_result (0 disables)
+RESULT_SPILL_BYTES = int(os.getenv('FB_RESULT_SPILL_BYTES', '262144'))
+# Stored results are held in memory up to this budget, then moved to disk (least recently
+# used first); past the disk budget they are dropped
+RESULT_STORE_MAX_MEMORY_BYTES = int(os.getenv('FB_RESULT_STORE_MAX_MEMORY_BYTES', str(64 * 1024 * 1024)))
+RESULT_STORE_MAX_DISK_BYTES = int(os.getenv('FB_RESULT_STORE_MAX_DISK_BYTES', str(1024 * 1024 * 1024)))
+RESULT_STORE_DIR = os.getenv('FB_RESULT_STORE_DIR', os.path.join(FB_MCP_DATA_DIR, 'results'))
+RESULT_STORE_TTL = float(os.getenv('FB_RESULT_STORE_TTL', '3600'))
+RESULT_PAGE_MAX_ROWS = 500
+RESULT_PREVIEW_ROWS = 3
+# Tools that read the result store never spill their own output
+RESULT_STORE_TOOLS = {'read_result_page', 'query_result'}
+# Set in worker processes so every worker can read results the others stored (see ResultStore)
+RESULT_STORE_SHARED = False
+# Directory under RESULT_STORE_DIR holding this server's result files; each server process (or
+# group of workers) gets its own, so servers sharing RESULT_STORE_DIR never touch each other's
+RESULT_STORE_RUN_DIR = None
+
+# Polling backoff for asynchronous insights report jobs (seconds)
+REPORT_POLL_INITIAL_DELAY = 1.0
+REPORT_POLL_MAX_DELAY = 30.0
+REPORT_POLL_BACKOFF = 1.5
+REPORT_STATUS_FIELDS = [
+    'id', 'account_id', 'async_status', 'async_percent_completion',
+    'date_start', 'date_stop', 'time_ref', 'time_completed'
+]
+
 # Create an MCP server
 mcp = FastMCP("fb-api-mcp-server")
 
+# httpx logs every request URL at INFO level, and Graph URLs carry the access token
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
 # Add a global variable to store the token
 FB_ACCESS_TOKEN = None
 
+# Set by main() when serving over HTTP without --allow-server-token: tools then only use
+# tokens the client supplied, never the server-wide one
+REQUIRE_CLIENT_TOKEN = False
+
+# Worker processes sharing the Graph API budget, set by _run_workers. Each worker paces and
+# limits its own requests, so the in-flight request limit is split between them and pacing
+# delays are multiplied by their number, keeping the total close to a single process's
+SERVER_WORKERS = 1
+
+# Persistent day-granular insights cache, created lazily by _get_insights_day_cache()
+INSIGHTS_DAY_CACHE = None
+
+# Ad account time zone ('timezone_name') per (token namespace, insights object ID); Graph
+# reports days and resolves date presets in the account's time zone
+ACCOUNT_TIMEZONES = {}
+
+# Name of the tool being executed, for attributing metrics to it
+CURRENT_TOOL = contextvars.ContextVar('fb_mcp_current_tool', default=None)
+# Event loop time by which the current tool call must finish
+TOOL_DEADLINE_AT = contextvars.ContextVar('fb_mcp_tool_deadline', default=None)
+TOOL_METRICS = {}
+
+# Usage tracking and pacing for outgoing requests, created lazily by _get_rate_limiter()
+RATE_LIMITER = None
+
+# Cached debug_token results per access token, created lazily by _get_token_registry()
+TOKEN_REGISTRY = None
+
+# Circuit breakers keyed by (endpoint family, token namespace)
+CIRCUIT_BREAKERS = {}
+
+# Local insights store, created lazily by _get_insights_store()
+INSIGHTS_STORE = None
+
+# Bounded TTL/LRU cache of node reads, created lazily by _get_node_cache()
+NODE_CACHE = None
+
+# Large tool results kept server-side, created lazily by _get_result_store()
+RESULT_STORE = None
+
+# Shared keep-alive client, created lazily by _get_http_client()
+HTTP_CLIENT = None
+HTTP_TRANSPORT = None
+HTTP_SEMAPHORE = None
+HTTP_CLIENT_LOOP = None
+HTTP_STATS = {'requests': 0, 'in_flight': 0, 'peak_in_flight': 0, 'connections_opened': 0}
+_seen_connections = weakref.WeakSet()
+
+# In-flight GET requests by canonical key, shared by identical concurrent calls
+INFLIGHT_REQUESTS = {}
+SINGLE_FLIGHT_STATS = {'requests': 0, 'coalesced': 0}
+
 # --- Helper Functions ---
 
+def _request_access_token() -> str:
+    """Returns the Facebook token an HTTP client sent with the current MCP request, if any.
+
+    Only the SSE and streamable HTTP transports carry request headers; under stdio, or
+    outside a request, this returns an empty string.
+    """
+    try:
+        request = request_ctx.get().request
+    except LookupError:
+        return ""
+    headers = getattr(request, 'headers', None)
+    if headers is None:
+        return ""
+    token = headers.get(ACCESS_TOKEN_HEADER, '')
+    if not token:
+        scheme, _, credentials = headers.get('authorization', '').partition(' ')
+        token = credentials if scheme.lower() == 'bearer' else ''
+    return token.strip()
+
 def _get_fb_access_token(access_token: str = "") -> str:
     """
-    Get Facebook access token from parameter, environment variables, or command line arguments.
-    Supports multi-user mode by accepting per-request access tokens.
+    Get Facebook access token from parameter, request headers, environment variables, or
+    command line arguments. Supports multi-user mode by accepting per-request access tokens,
+    either as a tool argument or, over the network transports, in the X-FB-Access-Token header.
 
     Args:
         access_token: Optional user-specific access token (for multi-user apps)
@@ -44,16 +380,25 @@ def _get_fb_access_token(access_token: str = "") -> str:
     """
     # If user-specific token provided, use it (multi-user mode)
     if access_token:
-        print("Using user-provided access token (multi-user mode)")
         return access_token
 
+    # Then a token the HTTP client sent with this request, so each client uses its own
+    request_token = _request_access_token()
+    if request_token:
+        return request_token
+    if REQUIRE_CLIENT_TOKEN:
+        raise Exception(
+            "No Facebook access token was sent with this request; send it in the X-FB-Access-Token "
+            "header (or 'Authorization: Bearer <token>') or pass access_token to the tool"
+        )
+
     # Otherwise fall back to global token
     global FB_ACCESS_TOKEN
     if FB_ACCESS_TOKEN is None:
         # First check environment variable
         FB_ACCESS_TOKEN = os.getenv('FB_ACCESS_TOKEN')
         if FB_ACCESS_TOKEN:
-            print("Using Facebook token from environment variables")
+            print("Using Facebook token from environment variables", file=sys.stderr)
             return FB_ACCESS_TOKEN
 
         # Then look for --fb-token argument
@@ -61,7 +406,7 @@ def _get_fb_access_token(access_token: str = "") -> str:
             token_index = sys.argv.index("--fb-token") + 1
             if token_index < len(sys.argv):
                 FB_ACCESS_TOKEN = sys.argv[token_index]
-                print(f"Using Facebook token from command line arguments")
+                print("Using Facebook token from command line arguments", file=sys.stderr)
             else:
                 raise Exception("--fb-token argument provided but no token value followed it")
         else:
@@ -69,19 +414,1352 @@ def _get_fb_access_token(access_token: str = "") -> str:
 
     return FB_ACCESS_TOKEN
 
-def _make_graph_api_call(url: str, params: Dict[str, Any]) -> Dict:
-    """Makes a GET request to the Facebook Graph API and handles the response."""
+class GraphAPIError(Exception):
+    """A failed Graph API request, classified as 'transient', 'throttled', 'permanent' or 'auth'.
+
+    The exception message is a JSON payload so tools surface the error to clients in a
+    structured form.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        category: str,
+        status_code: Optional[int] = None,
+        code: Optional[int] = None,
+        subcode: Optional[int] = None,
+        error_type: Optional[str] = None,
+        fbtrace_id: Optional[str] = None,
+        retry_after: Optional[float] = None
+    ):
+        self.category = category
+        self.status_code = status_code
+        self.code = code
+        self.retry_after = retry_after
+        self.payload = {key: value for key, value in {
+            'message': message,
+            'category': category,
+            'status_code': status_code,
+            'code': code,
+            'error_subcode': subcode,
+            'type': error_type,
+            'fbtrace_id': fbtrace_id,
+            'retry_after_seconds': retry_after
+        }.items() if value is not None}
+        super().__init__(json.dumps({'error': self.payload}))
+
+class DeadlineExceeded(GraphAPIError):
+    """Raised when the current tool call's deadline passes before a request completes."""
+
+    def __init__(self, message: str = "Tool deadline exceeded before the Graph API request completed"):
+        super().__init__(message, 'deadline')
+
+def _time_remaining() -> Optional[float]:
+    """Seconds left before the current tool call's deadline, or None outside a tool call."""
+    deadline = TOOL_DEADLINE_AT.get()
+    if deadline is None:
+        return None
+    return deadline - asyncio.get_running_loop().time()
+
+def _new_tool_metrics() -> Dict[str, Any]:
+    return {
+        'calls': 0, 'errors': 0, 'errors_by_category': {}, 'graph_requests': 0,
+        'retries': 0, 'total_seconds': 0.0, 'max_seconds': 0.0
+    }
+
+def _record_tool_metric(metric: str, amount: float = 1) -> None:
+    """Adds to a counter of the tool currently executing, if any."""
+    tool = CURRENT_TOOL.get()
+    if tool is not None:
+        TOOL_METRICS.setdefault(tool, _new_tool_metrics())[metric] += amount
+
+# Output shaping options added to every tool's signature by _instrument_tool
+SHAPE_PARAMETERS = [
+    inspect.Parameter('select', inspect.Parameter.KEYWORD_ONLY, default=None, annotation=Annotated[
+        Optional[List[str]], Field(description=(
+            "Output shaping: keep only these fields of each row in 'data' (or of the returned object). "
+            "Nested fields use dots, e.g. 'creative.id'; with flatten_actions, use flattened names "
+            "such as 'actions:purchase'."
+        ))
+    ]),
+    inspect.Parameter('flatten_actions', inspect.Parameter.KEYWORD_ONLY, default=False, annotation=Annotated[
+        bool, Field(description=(
+            "Output shaping: replace lists of {'action_type', 'value', ...} entries (actions, "
+            "action_values, cost_per_action_type, ...) with flat fields like 'actions:purchase'; "
+            "attribution window values become 'actions:purchase:7d_click'."
+        ))
+    ]),
+    inspect.Parameter('drop_paging', inspect.Parameter.KEYWORD_ONLY, default=False, annotation=Annotated[
+        bool, Field(description=(
+            "Output shaping: remove 'paging' blocks, whose next/previous URLs are long and embed the "
+            "access token. A top-level 'after' cursor is kept when more pages exist."
+        ))
+    ]),
+    inspect.Parameter('compact', inspect.Parameter.KEYWORD_ONLY, default=False, annotation=Annotated[
+        bool, Field(description=(
+            "Output shaping: return rows column-oriented, replacing 'data' with 'columns' (field "
+            "names) and 'rows' (one list of values per row, null where a row lacks the field)."
+        ))
+    ])
+]
+
+def _flatten_action_lists(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Replaces lists of action entries with one field per action type (and attribution window)."""
+    flat = {}
+    for key, value in row.items():
+        if not (isinstance(value, list) and value
+                and all(isinstance(item, dict) and 'action_type' in item for item in value)):
+            flat[key] = value
+            continue
+        for item in value:
+            name = [key, str(item['action_type'])] + [
+                str(v) for k, v in item.items() if k != 'action_type' and not _is_number(v)
+            ]
+            for k, v in item.items():
+                if k != 'action_type' and _is_number(v):
+                    flat[':'.join(name if k == 'value' else name + [k])] = v
+    return flat
+
+def _select_fields(row: Dict[str, Any], select: List[str]) -> Dict[str, Any]:
+    selected = {}
+    for path in select:
+        value, parts = row, path.split('.')
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = selected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return selected
+
+def _drop_nested_paging(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _drop_nested_paging(v) if isinstance(v, (dict, list)) else v
+                for k, v in value.items() if k != 'paging'}
+    if isinstance(value, list):
+        return [_drop_nested_paging(item) if isinstance(item, (dict, list)) else item for item in value]
+    return value
+
+def _shape_result(
+    result: Any,
+    select: Optional[List[str]] = None,
+    flatten_actions: bool = False,
+    drop_paging: bool = False,
+    compact: bool = False
+) -> Any:
+    """Applies the SHAPE_PARAMETERS options to a tool result.
+
+    Row options apply to each dict in the result's 'data' list, or to the result itself
+    when it is a single object. Options are applied in the order flatten_actions,
+    select, drop_paging, compact, so select can name flattened action fields.
+    """
+    if not isinstance(result, dict) or not (select or flatten_actions or drop_paging or compact):
+        return result
+    rows = result.get('data')
+    single = not isinstance(rows, list)
+
+    def shape_row(row: Any) -> Any:
+        if not isinstance(row, dict):
+            return row
+        if flatten_actions:
+            row = _flatten_action_lists(row)
+        if select:
+            row = _select_fields(row, select)
+        return row
+
+    if single:
+        shaped = shape_row(result)
+    else:
+        shaped = {k: v for k, v in result.items() if k != 'data'}
+        shaped['data'] = [shape_row(row) for row in rows]
+
+    if drop_paging:
+        shaped = _drop_nested_paging(shaped)
+        paging = result.get('paging') if isinstance(result.get('paging'), dict) else {}
+        after = paging.get('cursors', {}).get('after')
+        if after and ('next' in paging or list(paging) == ['cursors']):
+            shaped['paging'] = {'cursors': {'after': after}}
+
+    if compact and not single:
+        rows = shaped.pop('data')
+        columns = list(dict.fromkeys(key for row in rows if isinstance(row, dict) for key in row))
+        shaped['columns'] = columns
+        shaped['rows'] = [[row.get(column) for column in columns] if isinstance(row, dict) else row for row in rows]
+    return shaped
+
+class ResultStore:
+    """Server-side store of large tool results, addressed by unguessable handles.
+
+    Each result's rows are kept as NDJSON bytes plus the byte offset of every row, so
+    a page is read by slicing without parsing the rest, and the memory and disk budgets
+    count exactly what is held. Results past the memory budget move to disk least
+    recently used first; results past the disk budget or their TTL are dropped.
+
+    With shared=True (multi-worker mode) every result goes straight to disk with an
+    index file next to it, so a handle can be read by whichever worker gets the next
+    request; each worker then enforces the budgets over the results it has seen.
+
+    `directory` belongs to this store alone (see _new_result_store_run_dir). Methods
+    may do disk IO, so async code calls them through asyncio.to_thread; a lock keeps
+    the bookkeeping consistent across those threads.
+    """
+
+    def __init__(self, directory: str, max_memory_bytes: int, max_disk_bytes: int, ttl: float, shared: bool = False):
+        self.directory = directory
+        self.shared = shared
+        self.max_memory_bytes = 0 if shared else max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.stats = {'stored': 0, 'moved_to_disk': 0, 'evictions': 0, 'expirations': 0}
+
+    def put(self, token_ns: str, lines: List[bytes], columns: Optional[List[str]]) -> str:
+        with self._lock:
+            return self._put(token_ns, lines, columns)
+
+    def _put(self, token_ns: str, lines: List[bytes], columns: Optional[List[str]]) -> str:
+        handle = 'res_' + os.urandom(16).hex()
+        offsets = array('q', [0])
+        for line in lines:
+            offsets.append(offsets[-1] + len(line) + 1)
+        blob = b'\n'.join(lines) + b'\n' if lines else b''
+        self._entries[handle] = {
+            'token_ns': token_ns,
+            'columns': columns,
+            'offsets': offsets,
+            'blob': blob,
+            'path': None,
+            'size': len(blob),
+            'expires_at': time.monotonic() + self.ttl
+        }
+        self.memory_bytes += len(blob)
+        self.stats['stored'] += 1
+        self._enforce_budgets()
+        return handle
+
+    def get(self, token_ns: str, handle: str) -> Dict[str, Any]:
+        with self._lock:
+            return self._get(token_ns, handle)
+
+    def _get(self, token_ns: str, handle: str) -> Dict[str, Any]:
+        self._expire()
+        entry = self._entries.get(handle)
+        if entry is None and self.shared:
+            entry = self._load_from_disk(handle)
+        if entry is None or entry['token_ns'] != token_ns:
+            raise Exception(f"Unknown or expired result handle '{handle}'; call the original tool again")
+        self._entries.move_to_end(handle)
+        entry['expires_at'] = time.monotonic() + self.ttl
+        if entry['path'] is not None:
+            try:
+                # Marks the file as in use for the stale-directory cleanup of other servers
+                os.utime(entry['path'])
+            except OSError:
+                pass
+        return entry
+
+    def read_rows(self, entry: Dict[str, Any], start: int, stop: int) -> List[Any]:
+        """Parses rows [start, stop) of a stored result."""
+        offsets = entry['offsets']
+        start, stop = max(0, min(start, len(offsets) - 1)), max(0, min(stop, len(offsets) - 1))
+        if start >= stop:
+            return []
+        with self._lock:
+            blob, path = entry['blob'], entry['path']
+        if blob is not None:
+            chunk = blob[offsets[start]:offsets[stop]]
+        else:
+            try:
+                with open(path, 'rb') as f:
+                    f.seek(offsets[start])
+                    chunk = f.read(offsets[stop] - offsets[start])
+            except FileNotFoundError:
+                raise Exception("The stored result was evicted; call the original tool again")
+        return [json.loads(line) for line in chunk.splitlines()]
+
+    def _load_from_disk(self, handle: str) -> Optional[Dict[str, Any]]:
+        """Adopts a result another worker stored, from its index file."""
+        if not re.fullmatch(r'res_[0-9a-f]{32}', handle):
+            return None
+        path = os.path.join(self.directory, f'{handle}.ndjson')
+        try:
+            with open(f'{path}.idx', 'rb') as f:
+                header = json.loads(f.readline())
+                offsets = array('q')
+                offsets.frombytes(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+        entry = {
+            'token_ns': header['token_ns'],
+            'columns': header['columns'],
+            'offsets': offsets,
+            'blob': None,
+            'path': path,
+            'size': offsets[-1],
+            'expires_at': time.monotonic() + self.ttl
+        }
+        self._entries[handle] = entry
+        self.disk_bytes += entry['size']
+        return entry
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for handle in [h for h, entry in self._entries.items() if entry['expires_at'] <= now]:
+            self._drop(handle)
+            self.stats['expirations'] += 1
+
+    def _enforce_budgets(self) -> None:
+        for handle, entry in list(self._entries.items()):
+            if self.memory_bytes <= self.max_memory_bytes:
+                break
+            if entry['blob'] is not None:
+                self._move_to_disk(handle, entry)
+        for handle, entry in list(self._entries.items()):
+            if self.disk_bytes <= self.max_disk_bytes:
+                break
+            if entry['path'] is not None:
+                self._drop(handle)
+                self.stats['evictions'] += 1
+
+    def _move_to_disk(self, handle: str, entry: Dict[str, Any]) -> None:
+        if entry['size'] > self.max_disk_bytes:
+            self._drop(handle)
+            self.stats['evictions'] += 1
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{handle}.ndjson')
+        with open(path, 'wb') as f:
+            f.write(entry['blob'])
+        if self.shared:
+            with open(f'{path}.idx', 'wb') as f:
+                f.write(json.dumps({'token_ns': entry['token_ns'], 'columns': entry['columns']}).encode() + b'\n')
+                f.write(entry['offsets'].tobytes())
+        entry['blob'], entry['path'] = None, path
+        self.memory_bytes -= entry['size']
+        self.disk_bytes += entry['size']
+        self.stats['moved_to_disk'] += 1
+
+    def _drop(self, handle: str) -> None:
+        entry = self._entries.pop(handle)
+        if entry['path'] is not None:
+            self.disk_bytes -= entry['size']
+            for path in (entry['path'], f"{entry['path']}.idx"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        else:
+            self.memory_bytes -= entry['size']
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire()
+            return {
+                'shared': self.shared,
+                'results': len(self._entries),
+                'on_disk': sum(1 for entry in self._entries.values() if entry['path'] is not None),
+                'memory_bytes': self.memory_bytes,
+                'max_memory_bytes': self.max_memory_bytes,
+                'disk_bytes': self.disk_bytes,
+                'max_disk_bytes': self.max_disk_bytes,
+                'ttl_seconds': self.ttl,
+                'spill_threshold_bytes': RESULT_SPILL_BYTES,
+                **self.stats
+            }
+
+def _new_result_store_run_dir(base_dir: str) -> str:
+    """Creates this server's own directory under `base_dir` for stored result files.
+
+    Several servers may share `base_dir` (one stdio process per client, say). Only
+    files nobody has written or read for longer than the result TTL are cleaned up:
+    those belong to servers that have exited, since a running one keeps a result's
+    file fresh while its handle is in use.
+    """
+    stale_before = time.time() - RESULT_STORE_TTL
+    if os.path.isdir(base_dir):
+        for name in os.listdir(base_dir):
+            path = os.path.join(base_dir, name)
+            try:
+                if os.path.isdir(path):
+                    files = [os.path.join(path, file_name) for file_name in os.listdir(path)]
+                    if all(os.path.getmtime(item) < stale_before for item in [path, *files]):
+                        for file_path in files:
+                            os.remove(file_path)
+                        os.rmdir(path)
+                elif name.endswith(('.ndjson', '.ndjson.idx')) and os.path.getmtime(path) < stale_before:
+                    os.remove(path)
+            except OSError:
+                pass  # removed concurrently by another server, or still being written
+    run_dir = os.path.join(base_dir, f'{os.getpid()}-{os.urandom(4).hex()}')
+    os.makedirs(run_dir, exist_ok=True)
+    # Handles don't survive a restart; worker processes leave through os._exit, so only the
+    # process that created the directory removes it
+    atexit.register(shutil.rmtree, run_dir, ignore_errors=True)
+    return run_dir
+
+def _get_result_store() -> ResultStore:
+    global RESULT_STORE, RESULT_STORE_RUN_DIR
+    if RESULT_STORE is None:
+        if RESULT_STORE_RUN_DIR is None:
+            RESULT_STORE_RUN_DIR = _new_result_store_run_dir(RESULT_STORE_DIR)
+        RESULT_STORE = ResultStore(
+            RESULT_STORE_RUN_DIR, RESULT_STORE_MAX_MEMORY_BYTES, RESULT_STORE_MAX_DISK_BYTES, RESULT_STORE_TTL,
+            shared=RESULT_STORE_SHARED
+        )
+    return RESULT_STORE
+
+def _json_type(value: Any) -> str:
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, str):
+        return 'numeric string' if _is_number(value) else 'string'
+    return 'array' if isinstance(value, list) else 'object'
+
+def _result_schema(rows: List[Any], columns: Optional[List[str]]) -> Dict[str, List[str]]:
+    """Maps each field of the rows to the JSON types seen for it."""
+    types = {}
+    for row in rows:
+        items = zip(columns, row) if columns is not None else (row.items() if isinstance(row, dict) else ())
+        for field, value in items:
+            types.setdefault(field, set()).add(_json_type(value))
+    return {field: sorted(seen) for field, seen in types.items()}
+
+async def _spill_result(result: Any, access_token: str = "") -> Any:
+    """Moves the rows of an oversized tool result into the result store.
+
+    Applies to results with a 'data' list (or 'columns' and 'rows' from compact
+    output) whose rows exceed RESULT_SPILL_BYTES of JSON. The rows are replaced by
+    'result_handle', their 'schema', a short 'preview' and the stored size.
+    """
+    if RESULT_SPILL_BYTES <= 0 or not isinstance(result, dict):
+        return result
+    if isinstance(result.get('data'), list):
+        rows_key, columns = 'data', None
+    elif isinstance(result.get('rows'), list) and isinstance(result.get('columns'), list):
+        rows_key, columns = 'rows', result['columns']
+    else:
+        return result
+    rows = result[rows_key]
+    lines = [json.dumps(row, separators=(',', ':'), default=str).encode() for row in rows]
+    size = sum(len(line) + 1 for line in lines)
+    if size <= RESULT_SPILL_BYTES:
+        return result
+
+    token_ns = _token_namespace(_get_fb_access_token(access_token))
+    handle = await asyncio.to_thread(_get_result_store().put, token_ns, lines, columns)
+    summary = {k: v for k, v in result.items() if k not in (rows_key, 'columns')}
+    summary.update({
+        'result_handle': handle,
+        'stored': {'rows': len(rows), 'bytes': size, 'expires_after_idle_seconds': RESULT_STORE_TTL},
+        'schema': _result_schema(rows, columns),
+        'preview': rows[:RESULT_PREVIEW_ROWS],
+        'message': (f"The result ({len(rows)} rows, {size} bytes) is too large to return inline. "
+                    "Read it with read_result_page or filter, sort and aggregate it with query_result, "
+                    "passing result_handle.")
+    })
+    if columns is not None:
+        summary['columns'] = columns
+    return summary
+
+def _instrument_tool(func: Callable) -> Callable:
+    """Records per-tool metrics, enforces the tool call deadline and shapes the output.
+
+    Applied under @mcp.tool() so FastMCP still sees the tool's own signature, extended
+    with the SHAPE_PARAMETERS output options every tool accepts. Oversized results of
+    top-level calls are moved to the result store (see _spill_result). The
+    deadline (TOOL_DEADLINE seconds) is published through TOOL_DEADLINE_AT so the HTTP
+    layer, pagination, sharding and retries can stop in time and return partial
+    results; a tool still running TOOL_DEADLINE_GRACE seconds later is cancelled.
+    Tools called from within another tool share the outer call's deadline.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        shape = {parameter.name: kwargs.pop(parameter.name, parameter.default) for parameter in SHAPE_PARAMETERS}
+        metrics = TOOL_METRICS.setdefault(func.__name__, _new_tool_metrics())
+        metrics['calls'] += 1
+        outermost = CURRENT_TOOL.get() is None
+        tool_token = CURRENT_TOOL.set(func.__name__)
+        deadline_token = None
+        if TOOL_DEADLINE_AT.get() is None and TOOL_DEADLINE > 0:
+            deadline_token = TOOL_DEADLINE_AT.set(asyncio.get_running_loop().time() + TOOL_DEADLINE)
+        remaining = _time_remaining()
+        started = time.perf_counter()
+        try:
+            try:
+                result = await asyncio.wait_for(
+                    func(*args, **kwargs), None if remaining is None else remaining + TOOL_DEADLINE_GRACE
+                )
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"{func.__name__} did not finish within its {TOOL_DEADLINE:.0f}s deadline")
+            result = _shape_result(result, **shape)
+            if outermost and func.__name__ not in RESULT_STORE_TOOLS:
+                result = await _spill_result(result, kwargs.get('access_token', ''))
+            return result
+        except Exception as e:
+            metrics['errors'] += 1
+            category = getattr(e, 'category', 'other')
+            metrics['errors_by_category'][category] = metrics['errors_by_category'].get(category, 0) + 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics['total_seconds'] += elapsed
+            metrics['max_seconds'] = max(metrics['max_seconds'], elapsed)
+            if deadline_token is not None:
+                TOOL_DEADLINE_AT.reset(deadline_token)
+            CURRENT_TOOL.reset(tool_token)
+
+    signature = inspect.signature(func)
+    wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), *SHAPE_PARAMETERS])
+    return wrapper
+
+def _get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared, connection-pooled async client used for every Graph API call.
+
+    Reusing one client keeps TCP+TLS connections to graph.facebook.com alive
+    between tool calls instead of paying a fresh handshake on every request.
+    The client is recreated if the running event loop changes.
+
+    Returns:
+        httpx.AsyncClient: The process-wide client.
+    """
+    global HTTP_CLIENT, HTTP_TRANSPORT, HTTP_SEMAPHORE, HTTP_CLIENT_LOOP
+    loop = asyncio.get_running_loop()
+    if HTTP_CLIENT is None or HTTP_CLIENT_LOOP is not loop:
+        HTTP_TRANSPORT = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_MAXSIZE,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+        HTTP_CLIENT = httpx.AsyncClient(
+            transport=HTTP_TRANSPORT,
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+        )
+        HTTP_SEMAPHORE = asyncio.Semaphore(max(1, HTTP_MAX_CONCURRENCY // SERVER_WORKERS))
+        HTTP_CLIENT_LOOP = loop
+    return HTTP_CLIENT
+
+def _note_pool_connections() -> None:
+    """Records connections currently held by the pool so new ones can be counted."""
+    pool = getattr(HTTP_TRANSPORT, '_pool', None)
+    for conn in getattr(pool, 'connections', []):
+        if conn not in _seen_connections:
+            _seen_connections.add(conn)
+            HTTP_STATS['connections_opened'] += 1
+
+class RateLimitScheduler:
+    """Tracks Graph API rate-limit usage and paces outgoing requests before limits are hit.
+
+    Usage is read from the X-App-Usage, X-Ad-Account-Usage, X-FB-Ads-Insights-Throttle
+    and X-Business-Use-Case-Usage response headers into buckets namespaced per token.
+    A request is scoped to its token and, when the URL names one, its ad account; it
+    waits until every bucket in its scope has regained access, and is spaced out
+    (queued one at a time per scope) once usage passes RATE_LIMIT_PACE_THRESHOLD.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.account_buckets = {}  # (token namespace, account) -> business use case bucket keys
+        self.stats = {'paced_requests': 0, 'paced_seconds': 0.0, 'throttle_errors': 0, 'rejected_requests': 0}
+        self._locks = {}
+        self._loop = None
+
+    @staticmethod
+    def scope_for(url: str, params: Optional[Dict[str, Any]]) -> tuple:
+        """Returns (token namespace, ad account id or None) for a request."""
+        parsed = urlparse(url)
+        token = (params or {}).get('access_token') or parse_qs(parsed.query).get('access_token', [''])[0]
+        account = next((part for part in parsed.path.split('/') if part.startswith('act_')), None)
+        return _token_namespace(str(token)), account
+
+    def _scope_bucket_keys(self, scope: tuple) -> List[str]:
+        token_ns, account = scope
+        keys = [f'app:{token_ns}']
+        if account:
+            keys += [f'account:{token_ns}:{account}', f'insights:{token_ns}:{account}']
+            keys += sorted(self.account_buckets.get(scope, ()))
+        return keys
+
+    def _delay_for(self, scope: tuple) -> tuple:
+        """Returns (seconds to wait, bucket key responsible) for the scope's busiest bucket."""
+        now = time.time()
+        delay, reason = 0.0, None
+        for key in self._scope_bucket_keys(scope):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                continue
+            wait = bucket['regain_at'] - now
+            if wait <= 0 and now - bucket['updated_at'] < RATE_LIMIT_USAGE_TTL \
+                    and bucket['usage_pct'] >= RATE_LIMIT_PACE_THRESHOLD:
+                headroom = max(100 - RATE_LIMIT_PACE_THRESHOLD, 1)
+                # Spaced out per worker, but never so far that pacing alone makes calls fail
+                max_pace = min(RATE_LIMIT_MAX_PACE_DELAY * SERVER_WORKERS, RATE_LIMIT_MAX_WAIT)
+                wait = max_pace * min((bucket['usage_pct'] - RATE_LIMIT_PACE_THRESHOLD) / headroom, 1)
+            if wait > delay:
+                delay, reason = wait, key
+        return delay, reason
+
+    async def wait_for_budget(self, scope: tuple) -> None:
+        """Delays a request until its scope has budget, or raises if that would take too long."""
+        delay, reason = self._delay_for(scope)
+        if delay <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._locks, self._loop = {}, loop
+        async with self._locks.setdefault(scope, asyncio.Lock()):
+            delay, reason = self._delay_for(scope)
+            remaining = _time_remaining()
+            max_wait = RATE_LIMIT_MAX_WAIT if remaining is None else min(RATE_LIMIT_MAX_WAIT, remaining)
+            if delay > max_wait:
+                self.stats['rejected_requests'] += 1
+                raise GraphAPIError(
+                    f"Rate limit reached for {reason} ({self.buckets[reason]['usage_pct']:.0f}% used)",
+                    'rate_limited', retry_after=round(delay, 1)
+                )
+            if delay > 0:
+                self.stats['paced_requests'] += 1
+                self.stats['paced_seconds'] += delay
+                await asyncio.sleep(delay)
+
+    def _update_bucket(self, key: str, usage_pct: float, regain_in: float = 0, details: Optional[Dict] = None) -> None:
+        now = time.time()
+        previous = self.buckets.get(key, {})
+        self.buckets[key] = {
+            'usage_pct': float(usage_pct or 0),
+            'regain_at': max(now + regain_in, previous.get('regain_at', 0)) if regain_in else 0,
+            'updated_at': now,
+            'details': details or {}
+        }
+
+    def record(self, scope: tuple, response: httpx.Response) -> None:
+        """Updates usage from a response's headers and notes throttling errors."""
+        token_ns, account = scope
+        headers = response.headers
+
+        app_usage = _parse_usage_header(headers.get('x-app-usage'))
+        if app_usage:
+            self._update_bucket(f'app:{token_ns}', max(
+                app_usage.get('call_count', 0), app_usage.get('total_cputime', 0), app_usage.get('total_time', 0)
+            ), details=app_usage)
+
+        if account:
+            account_usage = _parse_usage_header(headers.get('x-ad-account-usage'))
+            if account_usage:
+                usage_pct = account_usage.get('acc_id_util_pct', 0)
+                regain_in = account_usage.get('reset_time_duration', 0) if usage_pct >= 100 else 0
+                self._update_bucket(f'account:{token_ns}:{account}', usage_pct, regain_in, account_usage)
+            insights_usage = _parse_usage_header(headers.get('x-fb-ads-insights-throttle'))
+            if insights_usage:
+                self._update_bucket(f'insights:{token_ns}:{account}', max(
+                    insights_usage.get('app_id_util_pct', 0), insights_usage.get('acc_id_util_pct', 0)
+                ), details=insights_usage)
+
+        for business_id, entries in (_parse_usage_header(headers.get('x-business-use-case-usage')) or {}).items():
+            for entry in entries:
+                key = f"business:{token_ns}:{business_id}:{entry.get('type', 'unknown')}"
+                self._update_bucket(key, max(
+                    entry.get('call_count', 0), entry.get('total_cputime', 0), entry.get('total_time', 0)
+                ), 60 * (entry.get('estimated_time_to_regain_access') or 0), entry)
+                if account:
+                    self.account_buckets.setdefault(scope, set()).add(key)
+
+        if response.status_code >= 400:
+            try:
+                error = response.json().get('error', {})
+            except ValueError:
+                error = {}
+            if error.get('code') in GRAPH_THROTTLE_ERROR_CODES:
+                self.stats['throttle_errors'] += 1
+                # Block the narrowest known scope unless a header already says when access returns
+                key = f'account:{token_ns}:{account}' if account and error['code'] != 4 else f'app:{token_ns}'
+                now = time.time()
+                if not any(self.buckets.get(k, {}).get('regain_at', 0) > now for k in self._scope_bucket_keys(scope)):
+                    self._update_bucket(key, 100, RATE_LIMIT_DEFAULT_COOLDOWN, {'error_code': error['code']})
+
+    def get_status(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            'settings': {
+                'pace_threshold_pct': RATE_LIMIT_PACE_THRESHOLD,
+                'max_pace_delay': RATE_LIMIT_MAX_PACE_DELAY,
+                'workers': SERVER_WORKERS,
+                'max_wait': RATE_LIMIT_MAX_WAIT,
+                'default_cooldown': RATE_LIMIT_DEFAULT_COOLDOWN
+            },
+            'buckets': {
+                key: {
+                    'usage_pct': bucket['usage_pct'],
+                    'regain_access_in_seconds': round(max(bucket['regain_at'] - now, 0), 1),
+                    'updated_seconds_ago': round(now - bucket['updated_at'], 1),
+                    'details': bucket['details']
+                }
+                for key, bucket in sorted(self.buckets.items())
+            },
+            **self.stats,
+            'paced_seconds': round(self.stats['paced_seconds'], 1)
+        }
+
+def _parse_usage_header(value: Optional[str]) -> Optional[Dict]:
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return None
+
+def _get_rate_limiter() -> RateLimitScheduler:
+    global RATE_LIMITER
+    if RATE_LIMITER is None:
+        RATE_LIMITER = RateLimitScheduler()
+    return RATE_LIMITER
+
+class CircuitBreaker:
+    """Fails fast while an endpoint family keeps failing for a token.
+
+    Closed: requests flow and their outcomes are kept for CIRCUIT_WINDOW seconds; once
+    at least CIRCUIT_MIN_REQUESTS outcomes are in the window and CIRCUIT_ERROR_RATE of
+    them failed, the breaker opens. Open: requests are rejected for CIRCUIT_OPEN_SECONDS.
+    Half-open: up to CIRCUIT_HALF_OPEN_PROBES requests are let through; a success closes
+    the breaker and a failure opens it again.
+    """
+
+    def __init__(self, family: str, token_ns: str):
+        self.family = family
+        self.token_ns = token_ns
+        self.state = 'closed'
+        self.outcomes = deque()  # (monotonic time, failed)
+        self.opened_at = 0.0
+        self.probes = 0
+        self.stats = {'trips': 0, 'rejected': 0}
+
+    def _prune(self, now: float) -> None:
+        while self.outcomes and now - self.outcomes[0][0] > CIRCUIT_WINDOW:
+            self.outcomes.popleft()
+
+    def _reject(self, retry_after: float) -> None:
+        self.stats['rejected'] += 1
+        raise GraphAPIError(
+            f"Circuit open for {self.family} requests after repeated Graph API failures; failing fast",
+            'circuit_open', retry_after=round(max(retry_after, 0), 1)
+        )
+
+    def before_request(self) -> None:
+        """Raises a 'circuit_open' GraphAPIError if the request must not be sent."""
+        now = time.monotonic()
+        if self.state == 'open':
+            if now - self.opened_at < CIRCUIT_OPEN_SECONDS:
+                self._reject(CIRCUIT_OPEN_SECONDS - (now - self.opened_at))
+            self.state = 'half_open'
+            self.probes = 0
+        if self.state == 'half_open':
+            if self.probes >= CIRCUIT_HALF_OPEN_PROBES:
+                self._reject(1.0)
+            self.probes += 1
+
+    def record(self, outcome: str) -> None:
+        """Records 'success', 'failure' or 'neutral' (no verdict, e.g. cancelled) for a request."""
+        now = time.monotonic()
+        if self.state == 'half_open':
+            self.probes = max(self.probes - 1, 0)
+            if outcome == 'failure':
+                self._open(now)
+            elif outcome == 'success':
+                self.state = 'closed'
+                self.outcomes.clear()
+            return
+        if outcome == 'neutral':
+            return
+        self.outcomes.append((now, outcome == 'failure'))
+        self._prune(now)
+        failures = sum(1 for _, failed in self.outcomes if failed)
+        if self.state == 'closed' and len(self.outcomes) >= CIRCUIT_MIN_REQUESTS \
+                and failures / len(self.outcomes) >= CIRCUIT_ERROR_RATE:
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        self.state = 'open'
+        self.opened_at = now
+        self.stats['trips'] += 1
+
+    def get_status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._prune(now)
+        failures = sum(1 for _, failed in self.outcomes if failed)
+        status = {
+            'family': self.family,
+            'token': self.token_ns,
+            'state': self.state,
+            'window_requests': len(self.outcomes),
+            'window_failures': failures,
+            'error_rate': round(failures / len(self.outcomes), 3) if self.outcomes else None,
+            **self.stats
+        }
+        if self.state == 'open':
+            status['probe_in_seconds'] = round(max(CIRCUIT_OPEN_SECONDS - (now - self.opened_at), 0), 1)
+        return status
+
+def _endpoint_family(url: str, params: Dict[str, Any], method: str) -> str:
+    """Groups a request as 'insights', 'edges', 'nodes' or 'batch' for circuit breaking."""
+    parts = [part for part in urlparse(url).path.split('/') if part]
+    if parts and parts[0].startswith('v') and parts[0][1:].replace('.', '').isdigit():
+        parts = parts[1:]  # API version prefix
+    if method != 'GET' and 'batch' in params:
+        return 'batch'
+    if 'insights' in parts:
+        return 'insights'
+    return 'edges' if len(parts) > 1 else 'nodes'
+
+def _get_circuit_breaker(url: str, params: Dict[str, Any], method: str) -> CircuitBreaker:
+    family = _endpoint_family(url, params, method)
+    token_ns = RateLimitScheduler.scope_for(url, params)[0]
+    key = (family, token_ns)
+    if key not in CIRCUIT_BREAKERS:
+        CIRCUIT_BREAKERS[key] = CircuitBreaker(family, token_ns)
+    return CIRCUIT_BREAKERS[key]
+
+async def _send_request(method: str, url: str, **kwargs) -> httpx.Response:
+    """Sends a request through the shared client, honouring rate-limit pacing, the
+    concurrency cap and the current tool call's deadline."""
+    client = _get_http_client()
+    rate_limiter = _get_rate_limiter()
+    scope = rate_limiter.scope_for(url, kwargs.get('params') or kwargs.get('data'))
+    await rate_limiter.wait_for_budget(scope)
+    async with HTTP_SEMAPHORE:
+        remaining = _time_remaining()
+        if remaining is not None:
+            if remaining <= 0:
+                raise DeadlineExceeded()
+            kwargs['timeout'] = httpx.Timeout(
+                min(HTTP_READ_TIMEOUT, remaining), connect=min(HTTP_CONNECT_TIMEOUT, remaining)
+            )
+        _record_tool_metric('graph_requests')
+        HTTP_STATS['requests'] += 1
+        HTTP_STATS['in_flight'] += 1
+        HTTP_STATS['peak_in_flight'] = max(HTTP_STATS['peak_in_flight'], HTTP_STATS['in_flight'])
+        try:
+            response = await client.request(method, url, **kwargs)
+        finally:
+            HTTP_STATS['in_flight'] -= 1
+            _note_pool_connections()
+    rate_limiter.record(scope, response)
+    return response
+
+def _get_pool_stats() -> Dict[str, Any]:
+    """Collects connection pool statistics from the shared HTTP client."""
+    pool = getattr(HTTP_TRANSPORT, '_pool', None)
+    connections = list(getattr(pool, 'connections', []))
+    return {
+        'settings': {
+            'max_connections': HTTP_POOL_MAXSIZE,
+            'max_keepalive_connections': HTTP_MAX_KEEPALIVE,
+            'keepalive_expiry': HTTP_KEEPALIVE_EXPIRY,
+            'max_concurrency': HTTP_MAX_CONCURRENCY,
+            'connect_timeout': HTTP_CONNECT_TIMEOUT,
+            'read_timeout': HTTP_READ_TIMEOUT
+        },
+        'requests': HTTP_STATS['requests'],
+        'in_flight': HTTP_STATS['in_flight'],
+        'peak_in_flight': HTTP_STATS['peak_in_flight'],
+        'connections_opened': HTTP_STATS['connections_opened'],
+        'connections_reused': max(HTTP_STATS['requests'] - HTTP_STATS['connections_opened'], 0),
+        'open_connections': len(connections),
+        'idle_connections': sum(1 for conn in connections if conn.is_idle())
+    }
+
+def _single_flight_key(url: str, params: Dict[str, Any]) -> str:
+    """Canonical identity of a GET request: URL plus sorted params, token hashed."""
+    key_params = {k: str(v) for k, v in params.items() if k != 'access_token'}
+    return json.dumps({
+        'url': url,
+        'token': _token_namespace(str(params.get('access_token', ''))),
+        'params': key_params
+    }, sort_keys=True)
+
+def _release_single_flight(key: str, task: asyncio.Task) -> None:
+    if INFLIGHT_REQUESTS.get(key) is task:
+        del INFLIGHT_REQUESTS[key]
+    if not task.cancelled():
+        task.exception()  # mark a failure as retrieved even if every caller went away
+
+async def _make_graph_api_call(url: str, params: Dict[str, Any], method: str = 'GET') -> Dict:
+    """Makes a request to the Facebook Graph API and handles the response.
+
+    Identical GET requests issued while one is already in flight share that request
+    instead of sending their own; each of them receives a private copy of the result.
+    Other methods are always sent.
+
+    The shared request runs without any caller's tool deadline (it is still bounded by
+    RETRY_DEADLINE and the HTTP timeouts); each caller stops waiting for it at its own
+    deadline, so one caller running out of time never fails the others.
+    """
+    if method != 'GET':
+        return await _request_graph_api(url, params, method)
+
+    key = _single_flight_key(url, params)
+    task = INFLIGHT_REQUESTS.get(key)
+    leader = task is None
+    if leader:
+        # A fresh context drops the leader's deadline; only its tool is kept, for metrics
+        context = contextvars.Context()
+        context.run(CURRENT_TOOL.set, CURRENT_TOOL.get())
+        task = context.run(asyncio.ensure_future, _request_graph_api(url, params))
+        INFLIGHT_REQUESTS[key] = task
+        task.add_done_callback(lambda done: _release_single_flight(key, done))
+        SINGLE_FLIGHT_STATS['requests'] += 1
+    else:
+        SINGLE_FLIGHT_STATS['coalesced'] += 1
+    # Shielded so one caller being cancelled or timing out doesn't fail the others sharing
+    # the request
+    remaining = _time_remaining()
+    try:
+        result = await asyncio.wait_for(asyncio.shield(task), None if remaining is None else max(remaining, 0))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded()
+    return result if leader else copy.deepcopy(result)
+
+def _classify_graph_error(status_code: int, error: Dict[str, Any]) -> str:
+    """Classifies a Graph API error body as 'throttled', 'auth', 'transient' or 'permanent'."""
+    code = error.get('code')
+    if code in GRAPH_THROTTLE_ERROR_CODES or status_code == 429:
+        return 'throttled'
+    if code in GRAPH_AUTH_ERROR_CODES:
+        return 'auth'
+    if error.get('is_transient') or code in GRAPH_TRANSIENT_ERROR_CODES or status_code >= 500:
+        return 'transient'
+    return 'permanent'
+
+def _graph_error_from_response(response: httpx.Response) -> GraphAPIError:
+    try:
+        error = response.json().get('error') or {}
+    except ValueError:
+        error = {}
+    if not isinstance(error, dict):
+        error = {'message': str(error)}
+    return GraphAPIError(
+        error.get('message') or f"HTTP {response.status_code} {response.reason_phrase}",
+        _classify_graph_error(response.status_code, error),
+        status_code=response.status_code,
+        code=error.get('code'),
+        subcode=error.get('error_subcode'),
+        error_type=error.get('type'),
+        fbtrace_id=error.get('fbtrace_id')
+    )
+
+def _retry_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+class TokenRegistry:
+    """Validates each access token once through debug_token and caches what it reports.
+
+    The token's validity, type, app and user IDs, scopes and expiry are reused for
+    TOKEN_VALIDATION_TTL seconds, so expired, revoked or under-scoped tokens are
+    rejected locally instead of after a failed Graph request. Concurrent first uses of
+    a token share one debug_token call. If debug_token can't be reached, the token is
+    let through unverified and checked again after TOKEN_RECHECK_SECONDS.
+
+    When the server-wide FB_ACCESS_TOKEN is a user token within TOKEN_REFRESH_WINDOW of
+    expiry, it is exchanged in the background for a new long-lived token
+    (generate_token.get_long_lived_token), which then becomes FB_ACCESS_TOKEN; requests
+    already holding the old token send the new one instead, until the old one expires.
+    Tokens sent by clients are never exchanged or replaced: get_token_status reports
+    that they are due for a refresh and leaves renewing them to the client.
+
+    Everything is keyed by the token's namespace hash, never the token itself, and at
+    most TOKEN_REGISTRY_MAX_TOKENS validations and replacements are kept (LRU), with
+    stale ones pruned as new tokens arrive.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._replacements = OrderedDict()
+        self._refreshing = set()
+        self._refresh_tasks = set()
+        self.stats = {'validations': 0, 'rejections': 0, 'refreshes': 0}
+
+    async def resolve(self, token: str) -> str:
+        """Returns the token to send for `token`, or raises an 'auth' GraphAPIError."""
+        token = self.replacement_for(token) or token
+        if '|' in token:  # app access tokens ('app_id|secret') have nothing to validate
+            return token
+        info = await self.get_info(token)
+        try:
+            self.check(info)
+        except GraphAPIError:
+            self.stats['rejections'] += 1
+            raise
+        self._maybe_refresh(token, info)
+        return token
+
+    async def get_info(self, token: str, force: bool = False) -> Dict[str, Any]:
+        key = _token_namespace(token)
+        info = self._entries.get(key)
+        if info is not None and info['recheck_at'] > time.time() and not force:
+            self._entries.move_to_end(key)
+            return info
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._debug_token(token))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        info = await asyncio.shield(task)
+        self._remember(self._entries, key, info)
+        return info
+
+    def _remember(self, mapping: OrderedDict, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        for stale in [k for k, entry in self._entries.items() if entry['recheck_at'] <= now]:
+            del self._entries[stale]
+        for stale in [k for k, entry in self._replacements.items() if entry['until'] <= now]:
+            del self._replacements[stale]
+        mapping[key] = value
+        mapping.move_to_end(key)
+        while len(mapping) > TOKEN_REGISTRY_MAX_TOKENS:
+            mapping.popitem(last=False)
+
+    async def _debug_token(self, token: str) -> Dict[str, Any]:
+        self.stats['validations'] += 1
+        app_id, app_secret = os.getenv('FB_APP_ID'), os.getenv('FB_APP_SECRET')
+        # Without app credentials a user token can inspect itself
+        debugging_token = f"{app_id}|{app_secret}" if app_id and app_secret else token
+        now = time.time()
+        unverified = {'verified': False, 'checked_at': now, 'recheck_at': now + TOKEN_RECHECK_SECONDS}
+        try:
+            response = await _send_request(
+                'GET', f"{FB_GRAPH_URL}/debug_token", params={'input_token': token, 'access_token': debugging_token}
+            )
+        except DeadlineExceeded:
+            raise
+        except (httpx.TransportError, GraphAPIError) as e:
+            return {**unverified, 'error': str(e) or type(e).__name__}
+        if not response.is_success:
+            error = _graph_error_from_response(response)
+            if error.category == 'auth' and debugging_token == token:
+                return {**unverified, 'verified': True, 'is_valid': False, 'error': error.payload['message']}
+            return {**unverified, 'error': error.payload['message']}
+        try:
+            data = response.json().get('data')
+        except ValueError:
+            data = None
+        if not isinstance(data, dict) or 'is_valid' not in data:
+            return {**unverified, 'error': 'Unexpected debug_token response'}
+        is_valid = bool(data['is_valid'])
+        return {
+            'verified': True,
+            'is_valid': is_valid,
+            'type': data.get('type'),
+            'app_id': data.get('app_id'),
+            'user_id': data.get('user_id'),
+            'scopes': data.get('scopes'),
+            'expires_at': data.get('expires_at') or None,  # 0 means the token never expires
+            'data_access_expires_at': data.get('data_access_expires_at') or None,
+            'error': (data.get('error') or {}).get('message'),
+            'checked_at': now,
+            'recheck_at': now + (TOKEN_VALIDATION_TTL if is_valid else TOKEN_RECHECK_SECONDS)
+        }
+
+    def check(self, info: Dict[str, Any]) -> None:
+        """Raises an 'auth' GraphAPIError if requests with the described token would fail."""
+        if not info['verified']:
+            return
+        now = time.time()
+        if not info['is_valid']:
+            raise GraphAPIError(
+                f"Access token is invalid: {info.get('error') or 'rejected by debug_token'}", 'auth', code=190
+            )
+        if info['expires_at'] and info['expires_at'] <= now:
+            expired = time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(info['expires_at']))
+            raise GraphAPIError(f"Access token expired at {expired}", 'auth', code=190)
+        if info['data_access_expires_at'] and info['data_access_expires_at'] <= now:
+            raise GraphAPIError(
+                "Data access for this access token has expired; the user must log in to the app again",
+                'auth', code=190
+            )
+        scopes = info.get('scopes')
+        if TOKEN_REQUIRED_SCOPES and isinstance(scopes, list) and not set(TOKEN_REQUIRED_SCOPES) & set(scopes):
+            raise GraphAPIError(
+                f"Access token is missing the required permission (one of {', '.join(TOKEN_REQUIRED_SCOPES)}); "
+                f"granted: {', '.join(scopes) or 'none'}",
+                'auth', code=200
+            )
+
+    @staticmethod
+    def refresh_due(info: Dict[str, Any]) -> bool:
+        """Whether the described token is a user token within TOKEN_REFRESH_WINDOW of expiry."""
+        expires_at = info.get('expires_at')
+        return bool(expires_at) and info.get('type') == 'USER' and expires_at - time.time() <= TOKEN_REFRESH_WINDOW
+
+    def _maybe_refresh(self, token: str, info: Dict[str, Any]) -> None:
+        key = _token_namespace(token)
+        if (token != FB_ACCESS_TOKEN or not self.refresh_due(info) or key in self._refreshing
+                or info.get('refresh_failed') or not (os.getenv('FB_APP_ID') and os.getenv('FB_APP_SECRET'))):
+            return
+        self._refreshing.add(key)
+        task = asyncio.ensure_future(self._refresh(token, info))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _refresh(self, token: str, info: Dict[str, Any]) -> None:
+        global FB_ACCESS_TOKEN
+        def exchange() -> Optional[str]:
+            # generate_token reports errors on stdout, which is the MCP channel under stdio
+            with contextlib.redirect_stdout(sys.stderr):
+                return generate_token.get_long_lived_token(token)
+
+        key = _token_namespace(token)
+        try:
+            new_token = await asyncio.to_thread(exchange)
+        finally:
+            self._refreshing.discard(key)
+        if not new_token or new_token == token:
+            # Not retried until the token is validated again
+            info['refresh_failed'] = True
+            print("Could not exchange an access token that expires soon for a new long-lived token",
+                  file=sys.stderr)
+            return
+        if FB_ACCESS_TOKEN != token:
+            # The server-wide token was changed meanwhile; the old one must not be swapped for this one
+            return
+        FB_ACCESS_TOKEN = new_token
+        # The old token is only sent until it expires, so the replacement isn't needed after that
+        self._remember(self._replacements, key, {'token': new_token, 'until': info['expires_at']})
+        self.stats['refreshes'] += 1
+        print("Exchanged an access token that expires soon for a new long-lived token", file=sys.stderr)
+
+    def replacement_for(self, token: str) -> Optional[str]:
+        """Returns the token that replaced an earlier server-wide token, or None."""
+        replacement = self._replacements.get(_token_namespace(token))
+        if replacement is None or replacement['until'] <= time.time():
+            return None
+        return replacement['token']
+
+def _get_token_registry() -> TokenRegistry:
+    global TOKEN_REGISTRY
+    if TOKEN_REGISTRY is None:
+        TOKEN_REGISTRY = TokenRegistry()
+    return TOKEN_REGISTRY
+
+async def _request_graph_api(url: str, params: Dict[str, Any], method: str = 'GET') -> Dict:
+    """Sends a request to the Facebook Graph API and handles the response.
+
+    GET requests send params in the query string; other methods send them form-encoded.
+    Failed GETs classified as transient (5xx, timeouts, connection errors, is_transient)
+    or throttled are retried with jittered exponential backoff, up to RETRY_MAX_ATTEMPTS
+    times within RETRY_DEADLINE seconds (or the tool call's deadline, if sooner).
+    Throttled retries also wait for the rate-limit scheduler to report that access
+    has returned. Every attempt passes through the circuit breaker for the request's
+    endpoint family and token. The access token is first checked against the token
+    registry, so known-bad tokens fail without a request.
+
+    Raises:
+        DeadlineExceeded: If the tool call's deadline passes while the request is pending.
+        GraphAPIError: If the request fails and isn't (or can no longer be) retried, its
+            circuit breaker is open, or the token registry rejects the access token.
+    """
+    if TOKEN_VALIDATION_ENABLED and params.get('access_token'):
+        params = {**params, 'access_token': await _get_token_registry().resolve(params['access_token'])}
+    loop = asyncio.get_running_loop()
+    remaining = _time_remaining()
+    deadline = loop.time() + (RETRY_DEADLINE if remaining is None else min(RETRY_DEADLINE, remaining))
+    breaker = _get_circuit_breaker(url, params, method)
+    attempt = 0
+    while True:
+        breaker.before_request()
+        outcome = 'neutral'
+        try:
+            try:
+                if method == 'GET':
+                    response = await _send_request(method, url, params=params)
+                else:
+                    response = await _send_request(method, url, data=params)
+                if response.is_success:
+                    outcome = 'success'
+                    return response.json()
+                error = _graph_error_from_response(response)
+            except httpx.TransportError as e:
+                remaining = _time_remaining()
+                if isinstance(e, httpx.TimeoutException) and remaining is not None and remaining <= 0:
+                    raise DeadlineExceeded() from e
+                error = GraphAPIError(str(e) or type(e).__name__, 'transient', error_type=type(e).__name__)
+            outcome = 'failure' if error.category in CIRCUIT_FAILURE_CATEGORIES else 'success'
+        finally:
+            breaker.record(outcome)
+
+        delay = _retry_delay(attempt)
+        if method != 'GET' or error.category not in RETRYABLE_ERROR_CATEGORIES \
+                or attempt >= RETRY_MAX_ATTEMPTS or loop.time() + delay > deadline:
+            logged_params = {k: v for k, v in params.items() if k != 'access_token'}
+            print(f"Error making Graph API call to {url} with params {logged_params}: {error}", file=sys.stderr)
+            raise error
+        attempt += 1
+        _record_tool_metric('retries')
+        await asyncio.sleep(delay)
+
+
+async def _fetch_all_pages(
+    url: str,
+    params: Dict[str, Any],
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    on_page: Optional[Callable[[Dict, int, int], Awaitable[None]]] = None,
+    collect_rows: bool = True
+) -> Dict:
+    """Follows paging cursors server-side and merges every page's 'data' list.
+
+    Pages are requested by re-sending the original params with the 'after' cursor,
+    falling back to the 'paging.next' URL for edges that don't return cursors. If the
+    tool call's deadline passes after the first page, the pages fetched so far are
+    returned with 'truncated' set in the pagination block.
+
+    Args:
+        url: The edge URL of the first page.
+        params: Query parameters of the first page, including the access token.
+        max_pages: Maximum number of pages to fetch. Defaults to DEFAULT_MAX_PAGES.
+        max_rows: Stop once this many rows have been collected.
+        on_page: Optional coroutine called with (page, pages_so_far, rows_so_far) after
+            each page is fetched, e.g. to report progress.
+        collect_rows: If False, rows are only passed to on_page and not kept, so memory
+            stays bounded by one page; 'data' is then empty.
+
+    Returns:
+        Dict: The last page's top-level keys (e.g. 'summary') with 'data' replaced by the
+              merged rows and a 'pagination' block holding 'pages', 'rows' and 'complete'.
+              When the limits or the deadline stop pagination early at a page boundary,
+              'paging.cursors.after' is included so the caller can resume.
+    """
+    max_pages = max_pages or DEFAULT_MAX_PAGES
+    rows = []
+    row_count = 0
+    pages = 0
+    page_url, page_params = url, params
+    after = None
+    truncated = False
+    while True:
+        try:
+            response = await _make_graph_api_call(page_url, page_params)
+        except DeadlineExceeded:
+            if pages == 0:
+                raise
+            truncated = True
+            break
+        pages += 1
+        row_count += len(response.get('data', []))
+        if collect_rows:
+            rows.extend(response.get('data', []))
+        if on_page is not None:
+            await on_page(response, pages, row_count)
+
+        paging = response.get('paging', {})
+        after = paging.get('cursors', {}).get('after')
+        has_more = 'next' in paging
+        if not has_more or pages >= max_pages or (max_rows and row_count >= max_rows):
+            break
+
+        if after:
+            page_url = url
+            page_params = {k: v for k, v in params.items() if k not in ('before', 'offset')}
+            page_params['after'] = after
+        else:
+            page_url, page_params = paging['next'], {}
+
+    resume_after = after if has_more else None
+    if max_rows and row_count > max_rows:
+        rows = rows[:max_rows]
+        row_count = max_rows
+        resume_after = None  # the cursor points past rows we dropped
+        has_more = True
+
+    result = {k: v for k, v in response.items() if k not in ('data', 'paging')}
+    result['data'] = rows
+    if resume_after:
+        result['paging'] = {'cursors': {'after': resume_after}}
+    result['pagination'] = {'pages': pages, 'rows': row_count, 'complete': not has_more}
+    if truncated:
+        result['pagination'].update(_truncated_by_deadline())
+    return result
+
+def _truncated_by_deadline() -> Dict[str, Any]:
+    """Pagination fields marking a result cut short by the tool call's deadline."""
+    return {'truncated': True, 'truncated_reason': 'deadline'}
+
+async def _fetch_all_pages_until_deadline(url: str, params: Dict[str, Any], max_pages: Optional[int] = None) -> Dict:
+    """Like _fetch_all_pages, but returns an empty truncated result if the deadline
+    passes before the first page arrives. Used for the parts of a merged result."""
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()  # Raises HTTPError for bad responses (4xx or 5xx)
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        # Log the error and re-raise or handle more gracefully
-        print(f"Error making Graph API call to {url} with params {params}: {e}")
-        # Depending on desired behavior, you might want to raise a custom exception
-        # or return a specific error structure. Re-raising keeps the current behavior.
-        raise
+        return await _fetch_all_pages(url, params, max_pages=max_pages)
+    except DeadlineExceeded:
+        return {'data': [], 'pagination': {'pages': 0, 'rows': 0, 'complete': False, **_truncated_by_deadline()}}
+
+async def _stream_pages(
+    ctx: Context,
+    url: str,
+    params: Dict[str, Any],
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None
+) -> Dict:
+    """Fetches every page and sends each one's rows to the client as it arrives.
+
+    Rows go out as NDJSON in the message of a progress notification (progress is the
+    number of rows sent so far), so the client sees the first rows after one page and
+    the server never holds more than one page. Returns the pagination summary only.
+    """
+    meta = ctx.request_context.meta if ctx is not None else None
+    if meta is None or meta.progressToken is None:
+        raise Exception("stream=True requires the client to send a progressToken with the tool call; "
+                        "use auto_paginate=True instead")
 
+    notifications = 0
+
+    async def send_page(page: Dict, pages: int, rows: int) -> None:
+        nonlocal notifications
+        chunk = page.get('data', [])
+        if max_rows and rows > max_rows:
+            chunk = chunk[:len(chunk) - (rows - max_rows)]
+        if chunk:
+            notifications += 1
+            await ctx.report_progress(
+                min(rows, max_rows or rows), None,
+                '\n'.join(json.dumps(row, separators=(',', ':')) for row in chunk)
+            )
+
+    result = await _fetch_all_pages(
+        url, params, max_pages=max_pages, max_rows=max_rows, on_page=send_page, collect_rows=False
+    )
+    del result['data']
+    result['stream'] = {'format': 'ndjson', 'notifications': notifications}
+    return result
+
+async def _make_paginated_call(
+    url: str,
+    params: Dict[str, Any],
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    stream_ctx: Optional[Context] = None
+) -> Dict:
+    """Fetches a single page, or every page when auto_paginate is set.
+
+    With stream_ctx, every page is streamed to that tool call's client instead (see _stream_pages).
+    """
+    if stream_ctx is not None:
+        return await _stream_pages(stream_ctx, url, params, max_pages=max_pages, max_rows=max_rows)
+    if auto_paginate:
+        return await _fetch_all_pages(url, params, max_pages=max_pages, max_rows=max_rows)
+    return await _make_graph_api_call(url, params)
 
 def _prepare_params(base_params: Dict[str, Any], **kwargs) -> Dict[str, Any]:
     """Adds optional parameters to a dictionary if they are not None. Handles JSON encoding."""
@@ -106,32 +1784,254 @@ def _prepare_params(base_params: Dict[str, Any], **kwargs) -> Dict[str, Any]:
     return params
 
 
-def _fetch_node(node_id: str, access_token: str = "", **kwargs) -> Dict:
+class NodeCache:
+    """Bounded in-memory cache of Graph API node responses with per-entry TTLs.
+
+    Entries are evicted least-recently-used once max_entries is reached; expired
+    entries are dropped when they are next looked up.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._entries[key]
+            self.stats['expirations'] += 1
+            entry = None
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return copy.deepcopy(entry[1])
+
+    def set(self, key: str, value: Dict, ttl: float) -> None:
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            'backend': 'memory',
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            **self.stats,
+            'hit_rate': round(self.stats['hits'] / lookups, 4) if lookups else None,
+            'ttl_seconds': dict(NODE_CACHE_TTLS)
+        }
+
+class SQLiteNodeCache:
+    """NodeCache with the same interface, stored in a SQLite file shared by worker processes.
+
+    Lets every worker reuse what any of them fetched. Expiry uses wall-clock time, since
+    monotonic clocks aren't comparable between processes; eviction drops the least
+    recently used entries once max_entries is exceeded. Stats are per process.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS node_cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' expires_at REAL NOT NULL,'
+            ' last_used REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS node_cache_last_used ON node_cache (last_used)')
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        row = self._conn.execute('SELECT value, expires_at FROM node_cache WHERE key = ?', (key,)).fetchone()
+        if row is not None and row[1] <= now:
+            self._conn.execute('DELETE FROM node_cache WHERE key = ? AND expires_at <= ?', (key, now))
+            self.stats['expirations'] += 1
+            row = None
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+        self._conn.execute('UPDATE node_cache SET last_used = ? WHERE key = ?', (now, key))
+        self.stats['hits'] += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict, ttl: float) -> None:
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        now = time.time()
+        self._conn.execute(
+            'INSERT OR REPLACE INTO node_cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)',
+            (key, json.dumps(value), now + ttl, now)
+        )
+        excess = self._conn.execute('SELECT COUNT(*) FROM node_cache').fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                'DELETE FROM node_cache WHERE key IN (SELECT key FROM node_cache ORDER BY last_used LIMIT ?)',
+                (excess,)
+            )
+            self.stats['evictions'] += excess
+
+    def clear(self) -> None:
+        self._conn.execute('DELETE FROM node_cache')
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            'backend': 'sqlite',
+            'entries': self._conn.execute('SELECT COUNT(*) FROM node_cache').fetchone()[0],
+            'max_entries': self.max_entries,
+            **self.stats,
+            'hit_rate': round(self.stats['hits'] / lookups, 4) if lookups else None,
+            'ttl_seconds': dict(NODE_CACHE_TTLS)
+        }
+
+def _get_node_cache():
+    global NODE_CACHE
+    if NODE_CACHE is None:
+        if NODE_CACHE_BACKEND == 'sqlite':
+            NODE_CACHE = SQLiteNodeCache(NODE_CACHE_PATH, NODE_CACHE_MAX_ENTRIES)
+        else:
+            NODE_CACHE = NodeCache(NODE_CACHE_MAX_ENTRIES)
+    return NODE_CACHE
+
+def _node_cache_key(url: str, params: Dict[str, Any]) -> str:
+    """Builds a cache key from the node path and normalized params, namespaced per token."""
+    path = url[len(FB_GRAPH_URL):] if url.startswith(FB_GRAPH_URL) else url
+    key_params = {k: str(v) for k, v in params.items() if k != 'access_token'}
+    if 'fields' in key_params:
+        key_params['fields'] = ','.join(sorted(set(key_params['fields'].split(','))))
+    return json.dumps({
+        'token': _token_namespace(params.get('access_token', '')),
+        'path': path,
+        'params': key_params
+    }, sort_keys=True)
+
+async def _make_cached_graph_api_call(
+    url: str,
+    params: Dict[str, Any],
+    entity_type: str,
+    bypass_cache: bool = False
+) -> Dict:
+    """Serves a node read from the node cache, fetching and caching it on a miss.
+
+    Args:
+        url: The node URL.
+        params: Query parameters, including the access token.
+        entity_type: Key into NODE_CACHE_TTLS selecting how long the response stays fresh.
+        bypass_cache: Skip the cache lookup and fetch from the Graph API; the fresh
+            response still replaces the cached entry.
+    """
+    cache = _get_node_cache()
+    key = _node_cache_key(url, params)
+    if not bypass_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    result = await _make_graph_api_call(url, params)
+    cache.set(key, result, NODE_CACHE_TTLS.get(entity_type, 0))
+    return result
+
+async def _fetch_node(
+    node_id: str,
+    access_token: str = "",
+    entity_type: Optional[str] = None,
+    bypass_cache: bool = False,
+    **kwargs
+) -> Dict:
     """Helper to fetch a single object (node) by its ID.
 
     Args:
         node_id: The Facebook Graph API node ID
         access_token: Optional user-specific access token
+        entity_type: If given, serve the read through the node cache with this entity's TTL
+        bypass_cache: Skip the node cache lookup
         **kwargs: Additional parameters for the API call
     """
     token = _get_fb_access_token(access_token)
     url = f"{FB_GRAPH_URL}/{node_id}"
     params = _prepare_params({'access_token': token}, **kwargs)
-    return _make_graph_api_call(url, params)
+    if entity_type:
+        return await _make_cached_graph_api_call(url, params, entity_type, bypass_cache)
+    return await _make_graph_api_call(url, params)
 
-def _fetch_edge(parent_id: str, edge_name: str, access_token: str = "", **kwargs) -> Dict:
-    """Helper to fetch a collection (edge) related to a parent object.
+async def _fetch_nodes_by_ids(ids: List[str], access_token: str = "", **kwargs) -> Dict:
+    """Fetches many objects with ?ids= multi-gets, chunked to GRAPH_IDS_MAX_SIZE IDs.
+
+    Chunks are requested concurrently. Graph fails a whole multi-get if any ID in it
+    is invalid, so a chunk rejected with a permanent error is retried one ID at a time
+    to isolate the failing IDs.
 
     Args:
-        parent_id: The parent object ID
-        edge_name: The edge name (e.g., 'campaigns', 'insights')
+        ids: Object IDs to fetch. Duplicates are fetched once.
         access_token: Optional user-specific access token
-        **kwargs: Additional parameters for the API call
+        **kwargs: Additional parameters for every request (e.g. fields)
+
+    Returns:
+        Dict: 'data' maps each fetched ID to its object, and 'errors' maps each failed
+              ID to its Graph API error.
     """
     token = _get_fb_access_token(access_token)
-    url = f"{FB_GRAPH_URL}/{parent_id}/{edge_name}"
+    params = _prepare_params({'access_token': token}, **kwargs)
+    unique_ids = list(dict.fromkeys(ids))
+    chunks = [unique_ids[i:i + GRAPH_IDS_MAX_SIZE] for i in range(0, len(unique_ids), GRAPH_IDS_MAX_SIZE)]
 
-    # Handle time parameters specifically for activities edge if needed
+    async def fetch_one(node_id: str) -> tuple:
+        try:
+            return node_id, await _make_graph_api_call(f"{FB_GRAPH_URL}/{node_id}", params), None
+        except GraphAPIError as e:
+            return node_id, None, e.payload
+
+    async def fetch_chunk(chunk: List[str]) -> List[tuple]:
+        try:
+            response = await _make_graph_api_call(f"{FB_GRAPH_URL}/", {**params, 'ids': ','.join(chunk)})
+        except GraphAPIError as e:
+            if e.category != 'permanent' or len(chunk) == 1:
+                return [(node_id, None, e.payload) for node_id in chunk]
+            return await asyncio.gather(*(fetch_one(node_id) for node_id in chunk))
+        return [
+            (node_id, response[node_id], None) if node_id in response
+            else (node_id, None, {'message': 'Object not returned by the Graph API', 'category': 'permanent'})
+            for node_id in chunk
+        ]
+
+    data, errors = {}, {}
+    for results in await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)):
+        for node_id, node, error in results:
+            if error is None:
+                data[node_id] = node
+            else:
+                errors[node_id] = error
+    return {'data': data, 'errors': errors}
+
+async def _fetch_edge(parent_id: str, edge_name: str, access_token: str = "", **kwargs) -> Dict:
+    """Helper to fetch a collection (edge) related to a parent object.
+
+    Args:
+        parent_id: The parent object ID
+        edge_name: The edge name (e.g., 'campaigns', 'insights')
+        access_token: Optional user-specific access token
+        **kwargs: Additional parameters for the API call
+    """
+    token = _get_fb_access_token(access_token)
+    url = f"{FB_GRAPH_URL}/{parent_id}/{edge_name}"
+
+    # Handle time parameters specifically for activities edge if needed
     time_params = {}
     if edge_name == 'activities':
         time_range = kwargs.pop('time_range', None)
@@ -147,7 +2047,7 @@ def _fetch_edge(parent_id: str, edge_name: str, access_token: str = "", **kwargs
     params = _prepare_params(base_params, **kwargs)
     params.update(_prepare_params({}, **time_params)) # Add specific time params
 
-    return _make_graph_api_call(url, params)
+    return await _make_graph_api_call(url, params)
 
 
 def _build_insights_params(
@@ -225,10 +2125,1069 @@ def _build_insights_params(
     return params
 
 
+def _plan_time_shards(
+    time_range: Dict[str, str],
+    shards: int,
+    time_increment: Any
+) -> List[Dict[str, str]]:
+    """Splits an insights time_range into contiguous sub-ranges for parallel fetching.
+
+    Shard boundaries only fall between the buckets Graph produces for time_increment
+    (N-day blocks counted from 'since', or calendar months), so every row of the
+    sharded fetch is identical to the row the unsharded call would return.
+
+    Args:
+        time_range: {'since': 'YYYY-MM-DD', 'until': 'YYYY-MM-DD'}
+        shards: Requested number of shards; capped at the number of buckets.
+        time_increment: A number of days (1-90) or 'monthly'.
+
+    Returns:
+        List[Dict[str, str]]: Sub-ranges in date order covering the whole time_range.
+    """
+    since = date.fromisoformat(time_range['since'])
+    until = date.fromisoformat(time_range['until'])
+
+    buckets = []
+    start = since
+    if str(time_increment) == 'monthly':
+        while start <= until:
+            next_month = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+            buckets.append((start, min(next_month - timedelta(days=1), until)))
+            start = next_month
+    elif str(time_increment).isdigit() and int(time_increment) > 0:
+        step = timedelta(days=int(time_increment))
+        while start <= until:
+            buckets.append((start, min(start + step - timedelta(days=1), until)))
+            start += step
+    else:
+        raise Exception(
+            "Sharding requires time_increment to be a number of days or 'monthly'; "
+            "'all_days' returns a single row for the whole time_range"
+        )
+    if not buckets:
+        raise Exception(f"Empty time_range: {time_range}")
+
+    shards = max(1, min(shards, len(buckets)))
+    per_shard, extra = divmod(len(buckets), shards)
+    ranges = []
+    index = 0
+    for shard in range(shards):
+        count = per_shard + (1 if shard < extra else 0)
+        group = buckets[index:index + count]
+        index += count
+        ranges.append({'since': group[0][0].isoformat(), 'until': group[-1][1].isoformat()})
+    return ranges
+
+async def _fetch_insights_sharded(
+    url: str,
+    params: Dict[str, Any],
+    time_range: Dict[str, str],
+    time_increment: Any,
+    shards: int,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None
+) -> Dict:
+    """Fetches an insights query as concurrent time-range shards and merges the rows.
+
+    Each shard is fully paginated; at most SHARD_PARALLELISM shards are in flight.
+    Rows are merged back in date order, matching the unsharded response (which is
+    why _fetch_insights_result doesn't shard queries with a 'sort').
+    """
+    ranges = _plan_time_shards(time_range, shards, time_increment)
+    semaphore = asyncio.Semaphore(SHARD_PARALLELISM)
+
+    async def fetch_shard(shard_range: Dict[str, str]) -> Dict:
+        shard_params = dict(params)
+        shard_params['time_range'] = json.dumps(shard_range)
+        async with semaphore:
+            return await _fetch_all_pages_until_deadline(url, shard_params, max_pages=max_pages)
+
+    results = await asyncio.gather(*(fetch_shard(shard_range) for shard_range in ranges))
+
+    rows = [row for result in results for row in result['data']]
+    # Shards are already in date order; the stable sort only guards against
+    # Graph returning a shard's rows out of order
+    rows.sort(key=lambda row: row.get('date_start', ''))
+    complete = all(result['pagination']['complete'] for result in results)
+    if max_rows and len(rows) > max_rows:
+        rows = rows[:max_rows]
+        complete = False
+
+    pagination = {
+        'pages': sum(result['pagination']['pages'] for result in results),
+        'rows': len(rows),
+        'complete': complete
+    }
+    if any(result['pagination'].get('truncated') for result in results):
+        pagination.update(_truncated_by_deadline())
+
+    return {
+        'data': rows,
+        'pagination': pagination,
+        'shards': [
+            {'time_range': shard_range, **result['pagination']}
+            for shard_range, result in zip(ranges, results)
+        ]
+    }
+
+def _token_namespace(token: str) -> str:
+    """Short, non-reversible identifier used to keep cached data separate per token."""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+async def _account_today(url: str, params: Dict[str, Any]) -> Optional[date]:
+    """Today's date in the time zone of the ad account an insights URL belongs to.
+
+    Returns None if the account's time zone can't be determined; those calls skip the
+    day cache rather than guess which days are closed.
+    """
+    object_id = url[len(FB_GRAPH_URL):].strip('/').split('/')[0]
+    token = params.get('access_token', '')
+    key = (_token_namespace(token), object_id)
+    if key not in ACCOUNT_TIMEZONES:
+        try:
+            account_id = object_id
+            if not object_id.startswith('act_'):
+                node = await _make_graph_api_call(
+                    f"{FB_GRAPH_URL}/{object_id}", {'access_token': token, 'fields': 'account_id'}
+                )
+                account_id = f"act_{node['account_id']}"
+            account = await _make_graph_api_call(
+                f"{FB_GRAPH_URL}/{account_id}", {'access_token': token, 'fields': 'timezone_name'}
+            )
+            ACCOUNT_TIMEZONES[key] = account['timezone_name']
+        except DeadlineExceeded:
+            raise
+        except (GraphAPIError, KeyError):
+            return None
+    try:
+        return datetime.now(ZoneInfo(ACCOUNT_TIMEZONES[key])).date()
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+def _resolve_date_preset(date_preset: str, today: date) -> Optional[Dict[str, str]]:
+    """Resolves simple relative date presets to a time_range, given today's date in the
+    account's time zone (see _account_today).
+
+    Returns None for presets that aren't resolved locally; those calls skip the day cache.
+    """
+    yesterday = today - timedelta(days=1)
+    if date_preset == 'today':
+        return {'since': today.isoformat(), 'until': today.isoformat()}
+    if date_preset == 'yesterday':
+        return {'since': yesterday.isoformat(), 'until': yesterday.isoformat()}
+    if date_preset.startswith('last_') and date_preset.endswith('d') and date_preset[5:-1].isdigit():
+        days = int(date_preset[5:-1])
+        return {'since': (today - timedelta(days=days)).isoformat(), 'until': yesterday.isoformat()}
+    if date_preset == 'this_month':
+        return {'since': today.replace(day=1).isoformat(), 'until': today.isoformat()}
+    if date_preset == 'last_month':
+        last_month_end = today.replace(day=1) - timedelta(days=1)
+        return {'since': last_month_end.replace(day=1).isoformat(), 'until': last_month_end.isoformat()}
+    return None
+
+class InsightsDayCache:
+    """SQLite store of insights rows for closed days, one entry per (query, day).
+
+    A query key covers the object, level, fields, breakdowns, attribution settings and
+    token; days with no rows are stored too, so they aren't refetched either.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS insights_days ('
+                ' query_key TEXT NOT NULL,'
+                ' day TEXT NOT NULL,'
+                ' rows TEXT NOT NULL,'
+                ' fetched_at REAL NOT NULL,'
+                ' PRIMARY KEY (query_key, day))'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def load(self, query_key: str, days: List[str]) -> Dict[str, List[Dict]]:
+        """Returns the cached rows for whichever of `days` are present."""
+        if not days:
+            return {}
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'SELECT day, rows FROM insights_days WHERE query_key = ? AND day BETWEEN ? AND ?',
+                (query_key, min(days), max(days))
+            )
+            wanted = set(days)
+            return {day: json.loads(rows) for day, rows in cursor if day in wanted}
+
+    def store(self, query_key: str, day_rows: Dict[str, List[Dict]]) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO insights_days (query_key, day, rows, fetched_at) VALUES (?, ?, ?, ?)',
+                [(query_key, day, json.dumps(rows), now) for day, rows in day_rows.items()]
+            )
+
+class InsightsStore:
+    """SQLite store of fetched insights rows with flattened, typed columns.
+
+    Scalar fields become columns of insights_rows, added as new fields appear (REAL for
+    metrics, TEXT for IDs, names, dates and breakdown values). List-of-action fields
+    (actions, action_values, cost_per_action_type, ...) are unpacked into
+    insights_action_rows, one row per action. Every row records the token namespace
+    and when it was fetched; re-fetching the same row replaces it. Rows past
+    INSIGHTS_STORE_RETENTION_DAYS or INSIGHTS_STORE_MAX_STORED_ROWS are pruned by fetched_at.
+
+    Several processes may write the same file, so columns another process added are
+    picked up inside the write transaction before any ALTER TABLE.
+    """
+
+    BASE_COLUMNS = {
+        'row_key': 'TEXT PRIMARY KEY', 'token': 'TEXT NOT NULL', 'object_id': 'TEXT', 'level': 'TEXT',
+        'attribution': 'TEXT', 'date_start': 'TEXT', 'date_stop': 'TEXT', 'fetched_at': 'REAL NOT NULL'
+    }
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            columns = ', '.join(f'{name} {kind}' for name, kind in self.BASE_COLUMNS.items())
+            conn.execute(f'CREATE TABLE IF NOT EXISTS insights_rows ({columns})')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS insights_action_rows ('
+                ' row_key TEXT NOT NULL, field TEXT NOT NULL, action_type TEXT,'
+                ' value REAL, details TEXT)'
+            )
+            for index, columns in (
+                ('insights_rows_token_date', 'insights_rows (token, date_start)'),
+                ('insights_rows_fetched_at', 'insights_rows (fetched_at)'),
+                ('insights_rows_token_object', 'insights_rows (token, object_id, level)'),
+                ('insights_action_rows_key', 'insights_action_rows (row_key, field)'),
+                ('insights_action_rows_type', 'insights_action_rows (action_type)')
+            ):
+                conn.execute(f'CREATE INDEX IF NOT EXISTS {index} ON {columns}')
+            self._columns = {row[1] for row in conn.execute('PRAGMA table_info(insights_rows)')}
+        self._pruned_at = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _ensure_columns(self, conn: sqlite3.Connection, columns: Dict[str, str]) -> None:
+        """Adds missing columns; must run inside a write (BEGIN IMMEDIATE) transaction."""
+        if all(name in self._columns for name in columns):
+            return
+        # Another process may have added some since we last looked, and none can now
+        self._columns = {row[1] for row in conn.execute('PRAGMA table_info(insights_rows)')}
+        for name, kind in columns.items():
+            if name in self._columns:
+                continue
+            conn.execute(f'ALTER TABLE insights_rows ADD COLUMN "{name}" {kind}')
+            if name.endswith('_id'):
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "insights_rows_{name}" ON insights_rows (token, "{name}")')
+            self._columns.add(name)
+
+    def ingest(self, token_ns: str, object_id: str, params: Dict[str, Any], rows: List[Dict]) -> int:
+        """Upserts insights rows fetched for object_id with the given request params."""
+        level = params.get('level')
+        attribution = json.dumps({key: str(params[key]) for key in INSIGHTS_ATTRIBUTION_PARAMS if key in params},
+                                 sort_keys=True)
+        now = time.time()
+        records, actions = [], []
+        for row in rows:
+            scalars, dimensions = {}, {}
+            for key, value in row.items():
+                if not re.fullmatch(r'[a-z][a-z0-9_]*', key):
+                    continue
+                if isinstance(value, list) and all(isinstance(item, dict) for item in value):
+                    continue  # unpacked into insights_action_rows below
+                if isinstance(value, (dict, list)):
+                    scalars[key] = ('TEXT', json.dumps(value))
+                elif _is_text_insights_field(key) or not _is_number(value):
+                    scalars[key] = ('TEXT', value)
+                    if not key.endswith('_name'):
+                        dimensions[key] = value
+                else:
+                    scalars[key] = ('REAL', float(value))
+            row_key = hashlib.sha256(json.dumps(
+                [token_ns, object_id, level, attribution, dimensions], sort_keys=True, default=str
+            ).encode()).hexdigest()
+            records.append((row_key, scalars))
+            for key, value in row.items():
+                if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+                    for item in value:
+                        details = {k: v for k, v in item.items() if k not in ('action_type', 'value')}
+                        actions.append((
+                            row_key, key, item.get('action_type'),
+                            float(item['value']) if _is_number(item.get('value')) else None,
+                            json.dumps(details) if details else None
+                        ))
+
+        with self._lock, self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            self._ensure_columns(conn, {
+                key: kind for _, scalars in records for key, (kind, _) in scalars.items()
+                if key not in self.BASE_COLUMNS
+            })
+            for row_key, scalars in records:
+                values = {
+                    'row_key': row_key, 'token': token_ns, 'object_id': object_id, 'level': level,
+                    'attribution': attribution, 'fetched_at': now,
+                    **{key: value for key, (_, value) in scalars.items()}
+                }
+                columns = ', '.join(f'"{name}"' for name in values)
+                updates = ', '.join(f'"{name}" = excluded."{name}"' for name in values if name != 'row_key')
+                conn.execute(
+                    f'INSERT INTO insights_rows ({columns}) VALUES ({", ".join("?" * len(values))}) '
+                    f'ON CONFLICT(row_key) DO UPDATE SET {updates}',
+                    list(values.values())
+                )
+            fields = {(action[0], action[1]) for action in actions}
+            conn.executemany('DELETE FROM insights_action_rows WHERE row_key = ? AND field = ?', fields)
+            conn.executemany('INSERT INTO insights_action_rows VALUES (?, ?, ?, ?, ?)', actions)
+            if now - self._pruned_at >= INSIGHTS_STORE_PRUNE_INTERVAL:
+                self._prune(conn, now)
+        return len(records)
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        """Deletes rows past the retention period or beyond the row limit, oldest fetched first."""
+        self._pruned_at = now
+        deleted = 0
+        if INSIGHTS_STORE_RETENTION_DAYS > 0:
+            deleted += conn.execute(
+                'DELETE FROM insights_rows WHERE fetched_at < ?', (now - INSIGHTS_STORE_RETENTION_DAYS * 86400,)
+            ).rowcount
+        if INSIGHTS_STORE_MAX_STORED_ROWS > 0:
+            excess = conn.execute('SELECT COUNT(*) FROM insights_rows').fetchone()[0] - INSIGHTS_STORE_MAX_STORED_ROWS
+            if excess > 0:
+                deleted += conn.execute(
+                    'DELETE FROM insights_rows WHERE row_key IN '
+                    '(SELECT row_key FROM insights_rows ORDER BY fetched_at LIMIT ?)', (excess,)
+                ).rowcount
+        if deleted:
+            conn.execute('DELETE FROM insights_action_rows WHERE row_key NOT IN (SELECT row_key FROM insights_rows)')
+
+    def _connect_for_token(self, token_ns: str) -> sqlite3.Connection:
+        """Opens a read-only connection exposing only the token's rows as the
+        'insights' and 'insight_actions' views."""
+        conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, timeout=30)
+        conn.execute(f"CREATE TEMP VIEW insights AS SELECT * FROM main.insights_rows WHERE token = '{token_ns}'")
+        conn.execute(
+            'CREATE TEMP VIEW insight_actions AS SELECT a.row_key, a.field, a.action_type, a.value, a.details '
+            'FROM main.insights_action_rows a JOIN main.insights_rows r ON r.row_key = a.row_key '
+            f"WHERE r.token = '{token_ns}'"
+        )
+
+        def authorize(action, arg1, arg2, database, view):
+            if action == sqlite3.SQLITE_READ and database == 'main' and view is None:
+                return sqlite3.SQLITE_DENY  # base tables only through the views
+            if action in (sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ,
+                          sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE):
+                return sqlite3.SQLITE_OK
+            return sqlite3.SQLITE_DENY
+        conn.set_authorizer(authorize)
+        return conn
+
+    def query(self, token_ns: str, sql: str, params: List[Any], max_rows: int) -> Dict[str, Any]:
+        conn = self._connect_for_token(token_ns)
+        try:
+            cursor = conn.execute(sql, params)
+            columns = [column[0] for column in cursor.description or []]
+            rows = cursor.fetchmany(max_rows + 1)
+        finally:
+            conn.close()
+        return {
+            'columns': columns,
+            'data': [dict(zip(columns, row)) for row in rows[:max_rows]],
+            'row_count': min(len(rows), max_rows),
+            'truncated': len(rows) > max_rows
+        }
+
+    def describe(self, token_ns: str) -> Dict[str, Any]:
+        with self._connect() as conn:
+            columns = [(row[1], row[2]) for row in conn.execute('PRAGMA table_info(insights_rows)')]
+            rows, oldest, newest = conn.execute(
+                'SELECT COUNT(*), MIN(fetched_at), MAX(fetched_at) FROM insights_rows WHERE token = ?', (token_ns,)
+            ).fetchone()
+            actions = conn.execute(
+                'SELECT COUNT(*) FROM insights_action_rows a JOIN insights_rows r ON r.row_key = a.row_key '
+                'WHERE r.token = ?', (token_ns,)
+            ).fetchone()[0]
+        return {
+            'tables': {
+                'insights': {name: kind for name, kind in columns if name != 'token'},
+                'insight_actions': {
+                    'row_key': 'TEXT', 'field': 'TEXT', 'action_type': 'TEXT', 'value': 'REAL', 'details': 'TEXT'
+                }
+            },
+            'rows': rows,
+            'action_rows': actions,
+            'oldest_fetched_at': oldest,
+            'newest_fetched_at': newest
+        }
+
+def _is_number(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+def _is_text_insights_field(key: str) -> bool:
+    return key in INSIGHTS_TEXT_FIELDS or key.endswith('_id') or key.endswith('_name')
+
+def _get_insights_store() -> InsightsStore:
+    global INSIGHTS_STORE
+    if INSIGHTS_STORE is None:
+        INSIGHTS_STORE = InsightsStore(INSIGHTS_STORE_PATH)
+    return INSIGHTS_STORE
+
+async def _ingest_insights(url: str, params: Dict[str, Any], rows: List[Dict]) -> None:
+    """Writes fetched insights rows to the local insights store. Never fails the caller."""
+    if not INSIGHTS_STORE_ENABLED or not rows:
+        return
+    path = url[len(FB_GRAPH_URL):] if url.startswith(FB_GRAPH_URL) else url
+    object_id = path.strip('/').split('/')[0]
+    try:
+        await asyncio.to_thread(
+            _get_insights_store().ingest, _token_namespace(params.get('access_token', '')), object_id, params, rows
+        )
+    except sqlite3.Error as e:
+        print(f"Failed to write insights rows to the local store: {e}", file=sys.stderr)
+
+def _get_insights_day_cache() -> InsightsDayCache:
+    global INSIGHTS_DAY_CACHE
+    if INSIGHTS_DAY_CACHE is None:
+        INSIGHTS_DAY_CACHE = InsightsDayCache(INSIGHTS_DAY_CACHE_PATH)
+    return INSIGHTS_DAY_CACHE
+
+def _insights_query_key(url: str, params: Dict[str, Any]) -> str:
+    """Identifies the rows an insights query returns for any single day."""
+    path = url[len(FB_GRAPH_URL):] if url.startswith(FB_GRAPH_URL) else url
+    key_params = {k: v for k, v in params.items() if k not in INSIGHTS_DAY_CACHE_IGNORED_PARAMS}
+    raw = json.dumps({
+        'path': path,
+        'params': key_params,
+        'token': _token_namespace(params.get('access_token', ''))
+    }, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def _contiguous_ranges(days: List[str]) -> List[Dict[str, str]]:
+    """Groups sorted ISO dates into contiguous {'since', 'until'} ranges."""
+    ranges = []
+    for day in days:
+        if ranges and date.fromisoformat(day) - date.fromisoformat(ranges[-1]['until']) == timedelta(days=1):
+            ranges[-1]['until'] = day
+        else:
+            ranges.append({'since': day, 'until': day})
+    return ranges
+
+async def _fetch_insights_with_day_cache(
+    url: str,
+    params: Dict[str, Any],
+    time_range: Dict[str, str],
+    today: date,
+    shards: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None
+) -> Dict:
+    """Serves a daily (time_increment=1) insights query from the day cache where possible.
+
+    Only days missing from the cache, or within INSIGHTS_MUTABLE_DAYS of `today` (in
+    the account's time zone), are fetched from the Graph API (as contiguous ranges,
+    sharded when requested). Closed days from complete fetches are written back, and
+    all rows are stitched in date order.
+    """
+    cache = _get_insights_day_cache()
+    query_key = _insights_query_key(url, params)
+    since = date.fromisoformat(time_range['since'])
+    until = date.fromisoformat(time_range['until'])
+    days = [(since + timedelta(days=offset)).isoformat() for offset in range((until - since).days + 1)]
+    mutable_from = (today - timedelta(days=INSIGHTS_MUTABLE_DAYS)).isoformat()
+
+    cached = await asyncio.to_thread(cache.load, query_key, [day for day in days if day < mutable_from])
+    missing = [day for day in days if day not in cached]
+
+    sub_ranges = []
+    for missing_range in _contiguous_ranges(missing):
+        sub_ranges.extend(_plan_time_shards(missing_range, shards or 1, 1))
+    semaphore = asyncio.Semaphore(SHARD_PARALLELISM)
+
+    async def fetch_range(sub_range: Dict[str, str]) -> Dict:
+        range_params = {k: v for k, v in params.items() if k not in ('date_preset', 'since', 'until')}
+        range_params['time_range'] = json.dumps(sub_range)
+        async with semaphore:
+            return await _fetch_all_pages_until_deadline(url, range_params, max_pages=max_pages)
+
+    results = await asyncio.gather(*(fetch_range(sub_range) for sub_range in sub_ranges))
+
+    fetched = {day: [] for day in missing}
+    for result in results:
+        for row in result['data']:
+            fetched.setdefault(row.get('date_start'), []).append(row)
+    complete = all(result['pagination']['complete'] for result in results)
+    if complete:
+        closed = {day: fetched[day] for day in missing if day < mutable_from}
+        if closed:
+            await asyncio.to_thread(cache.store, query_key, closed)
+
+    rows = [row for day in days for row in (cached[day] if day in cached else fetched[day])]
+    if max_rows and len(rows) > max_rows:
+        rows = rows[:max_rows]
+        complete = False
+
+    pagination = {
+        'pages': sum(result['pagination']['pages'] for result in results),
+        'rows': len(rows),
+        'complete': complete
+    }
+    if any(result['pagination'].get('truncated') for result in results):
+        pagination.update(_truncated_by_deadline())
+
+    return {
+        'data': rows,
+        'pagination': pagination,
+        'day_cache': {
+            'days': len(days),
+            'cached_days': len(cached),
+            'fetched_days': len(missing)
+        }
+    }
+
+async def _fetch_insights(
+    url: str,
+    params: Dict[str, Any],
+    shards: Optional[int] = None,
+    use_day_cache: bool = False,
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None
+) -> Dict:
+    """Common fetch path for the get_*_insights tools.
+
+    Args:
+        url: The insights edge URL.
+        params: Parameters built by _build_insights_params.
+        shards: If greater than 1, split the time range into this many concurrently
+            fetched shards (always fully paginated). Ignored for sorted queries, which
+            are fetched fully paginated in one pass.
+        use_day_cache: Serve closed days of fully paginated daily queries
+            (time_increment=1) from the persistent day cache.
+        auto_paginate: Follow paging cursors server-side.
+        max_pages: Page limit for auto_paginate (per shard when sharding).
+        max_rows: Row limit for the merged result.
+
+    Every returned row is also written to the local insights store.
+    """
+    result = await _fetch_insights_result(url, params, shards, use_day_cache, auto_paginate, max_pages, max_rows)
+    await _ingest_insights(url, params, result.get('data', []))
+    return result
+
+async def _fetch_insights_result(
+    url: str,
+    params: Dict[str, Any],
+    shards: Optional[int],
+    use_day_cache: bool,
+    auto_paginate: bool,
+    max_pages: Optional[int],
+    max_rows: Optional[int]
+) -> Dict:
+    """Picks the day cache, sharded or plain fetch path for _fetch_insights."""
+    time_range = json.loads(params['time_range']) if 'time_range' in params else None
+    time_increment = params.get('time_increment', 'all_days')
+    full_fetch = auto_paginate or (shards and shards > 1)
+    day_cacheable = not INSIGHTS_DAY_CACHE_BYPASS_PARAMS & params.keys()
+
+    if use_day_cache and full_fetch and day_cacheable and str(time_increment) == '1':
+        today = await _account_today(url, params)
+        day_range = today and (time_range or _resolve_date_preset(params.get('date_preset', ''), today))
+        if day_range:
+            return await _fetch_insights_with_day_cache(
+                url, params, day_range, today, shards=shards, max_pages=max_pages, max_rows=max_rows
+            )
+
+    if shards and shards > 1:
+        if not time_range or 'time_ranges' in params:
+            raise Exception("Sharding requires a 'time_range' and cannot be combined with 'time_ranges'")
+        if 'sort' not in params:
+            return await _fetch_insights_sharded(
+                url, params, time_range, time_increment, shards, max_pages=max_pages, max_rows=max_rows
+            )
+        # Graph would sort each shard on its own, and merged shards can't reproduce the order of
+        # one sorted response (ties in particular), so sorted queries are fetched unsharded
+        auto_paginate = True
+    return await _make_paginated_call(url, params, auto_paginate, max_pages, max_rows)
+
+def _batch_sub_request(path: str, params: Dict[str, Any]) -> Dict[str, str]:
+    """Encodes one GET as a Graph batch sub-request. The batch's own token authenticates it."""
+    query = urlencode({k: v for k, v in params.items() if k != 'access_token'})
+    return {'method': 'GET', 'relative_url': f"{path}?{query}" if query else path}
+
+def _parse_batch_item(item: Optional[Dict[str, Any]]) -> Dict:
+    """Decodes one batch response item into its JSON body, or an {'error': ...} dict."""
+    if item is None:
+        # Graph returns null for sub-requests that didn't finish within the batch timeout
+        return {'error': {'message': 'Batch sub-request timed out', 'type': 'BatchTimeout'}}
+    try:
+        body = json.loads(item.get('body') or '{}')
+    except ValueError:
+        body = {'error': {'message': item.get('body'), 'type': 'InvalidBatchBody'}}
+    if item.get('code', 200) >= 400 and 'error' not in body:
+        body = {'error': {'message': f"HTTP {item.get('code')}", 'code': item.get('code')}}
+    return body
+
+async def _execute_batch(sub_requests: List[Dict[str, str]], access_token: str = "") -> List[Dict]:
+    """Runs sub-requests through the Graph batch endpoint (POST /?batch=).
+
+    Sub-requests are packed into chunks of GRAPH_BATCH_MAX_SIZE, one HTTP call each,
+    and the chunks are sent concurrently.
+
+    Args:
+        sub_requests: Items built by _batch_sub_request.
+        access_token: Optional user-specific access token
+
+    Returns:
+        List[Dict]: One decoded body per sub-request, in the same order. Failed items
+                    (including every item of a chunk whose POST failed) hold an 'error'
+                    dict instead of raising.
+    """
+    token = _get_fb_access_token(access_token)
+    chunks = [sub_requests[i:i + GRAPH_BATCH_MAX_SIZE]
+              for i in range(0, len(sub_requests), GRAPH_BATCH_MAX_SIZE)]
+
+    async def send_chunk(chunk: List[Dict[str, str]]) -> List[Dict]:
+        try:
+            response = await _make_graph_api_call(
+                FB_GRAPH_URL,
+                {'access_token': token, 'batch': json.dumps(chunk), 'include_headers': 'false'},
+                method='POST'
+            )
+        except GraphAPIError as e:
+            # The whole chunk failed, so each of its sub-requests reports that error
+            return [{'error': e.payload} for _ in chunk]
+        return [_parse_batch_item(item) for item in response]
+
+    results = await asyncio.gather(*(send_chunk(chunk) for chunk in chunks))
+    return [item for chunk_results in results for item in chunk_results]
+
+async def _wait_for_report(
+    report_run_id: str,
+    access_token: str = "",
+    timeout: float = 600.0,
+    on_status: Optional[Callable[[Dict], Awaitable[None]]] = None
+) -> Dict:
+    """Polls an async insights job with exponential backoff until it finishes.
+
+    Args:
+        report_run_id: The report_run_id returned when the job was submitted.
+        access_token: Optional user-specific access token
+        timeout: Give up after this many seconds (or at the tool call's deadline, if sooner).
+        on_status: Optional coroutine called with every status response.
+
+    Returns:
+        Dict: The final job status.
+
+    Raises:
+        Exception: If the job fails, is skipped, or doesn't finish before the timeout.
+    """
+    token = _get_fb_access_token(access_token)
+    url = f"{FB_GRAPH_URL}/{report_run_id}"
+    params = _prepare_params({'access_token': token}, fields=REPORT_STATUS_FIELDS)
+    loop = asyncio.get_running_loop()
+    remaining = _time_remaining()
+    if remaining is not None:
+        timeout = min(timeout, remaining)
+    deadline = loop.time() + timeout
+    delay = REPORT_POLL_INITIAL_DELAY
+    while True:
+        status = await _make_graph_api_call(url, params)
+        if on_status is not None:
+            await on_status(status)
+        async_status = status.get('async_status')
+        if async_status == 'Job Completed' and status.get('async_percent_completion') == 100:
+            return status
+        if async_status in ('Job Failed', 'Job Skipped'):
+            raise Exception(f"Insights report {report_run_id} ended with status '{async_status}'")
+        if loop.time() + delay > deadline:
+            raise Exception(
+                f"Insights report {report_run_id} not finished after {timeout:.0f}s "
+                f"({status.get('async_percent_completion', 0)}% complete)"
+            )
+        await asyncio.sleep(delay)
+        delay = min(delay * REPORT_POLL_BACKOFF, REPORT_POLL_MAX_DELAY)
+
+def _demux_batch_results(keys: List[str], results: List[Dict]) -> Dict:
+    """Splits batch results into per-key 'data' and 'errors' maps."""
+    data, errors = {}, {}
+    for key, result in zip(keys, results):
+        if 'error' in result:
+            errors[key] = result['error']
+        else:
+            data[key] = result
+    return {'data': data, 'errors': errors}
+
+def _with_id(fields: List[str]) -> List[str]:
+    """Ensures 'id' is requested, since nested lists are paged by their parent's ID."""
+    return fields if 'id' in fields else ['id'] + list(fields)
+
+def _expand_edge(edge: str, fields: List[str], limit: int, effective_status: Optional[List[str]] = None) -> str:
+    """Formats a nested field expansion, e.g. 'ads.limit(50){id,name}'."""
+    modifiers = f".limit({limit})"
+    if effective_status:
+        modifiers += f".effective_status({json.dumps(effective_status)})"
+    return f"{edge}{modifiers}{{{','.join(fields)}}}"
+
+def _plan_hierarchy_fields(
+    levels: List[tuple],
+    leaf_fields: Optional[List[str]],
+    sub_limit: int,
+    effective_status: Optional[List[str]] = None
+) -> List[List[str]]:
+    """Builds the 'fields' value for each level of a nested field-expansion query.
+
+    Args:
+        levels: (edge name, fields) pairs from the top level down, e.g.
+            [('campaigns', [...]), ('adsets', [...]), ('ads', [...])]. The top edge is
+            requested directly; each following edge is expanded inside its parent.
+        leaf_fields: Fields of the 'creative' object to expand inside the last level, or None.
+        sub_limit: Page size of every nested edge.
+        effective_status: Optional status filter applied to every nested edge.
+
+    Returns:
+        List[List[str]]: For each level, its field list with the levels below it expanded,
+                         so level i's list can also be used to page its edge on its own.
+    """
+    planned = []
+    child = [f"creative{{{','.join(leaf_fields)}}}"] if leaf_fields else []
+    for index in range(len(levels) - 1, -1, -1):
+        fields = list(levels[index][1]) + child
+        planned.insert(0, fields)
+        if index > 0:
+            child = [_expand_edge(levels[index][0], fields, sub_limit, effective_status)]
+    return planned
+
+async def _complete_nested_edges(
+    nodes: List[Dict],
+    levels: List[tuple],
+    planned_fields: List[List[str]],
+    token: str,
+    sub_limit: int,
+    effective_status: Optional[List[str]] = None,
+    max_pages: Optional[int] = None
+) -> Dict[str, Any]:
+    """Replaces each node's expanded edge with a plain list, paging it where Graph cut it off.
+
+    Works level by level: an edge with a 'paging.next' link is completed with its own
+    paginated request (concurrently across parents), which carries the expansion for the
+    levels below, and then the children of every node are processed the same way.
+
+    Returns:
+        Dict[str, Any]: 'requests' made for follow-up pages and whether every edge was
+                        'complete'.
+    """
+    stats = {'requests': 0, 'complete': True}
+    for (edge, _), fields in zip(levels, planned_fields):
+        async def complete(node: Dict) -> List[Dict]:
+            expanded = node.get(edge) or {}
+            rows = list(expanded.get('data', []))
+            after = expanded.get('paging', {}).get('cursors', {}).get('after')
+            if 'next' in expanded.get('paging', {}) and after:
+                params = _prepare_params(
+                    {'access_token': token, 'limit': sub_limit, 'after': after},
+                    fields=fields, effective_status=effective_status
+                )
+                remainder = await _fetch_all_pages(f"{FB_GRAPH_URL}/{node['id']}/{edge}", params, max_pages=max_pages)
+                stats['requests'] += remainder['pagination']['pages']
+                stats['complete'] = stats['complete'] and remainder['pagination']['complete']
+                rows.extend(remainder['data'])
+            node[edge] = rows
+            return rows
+
+        children = await asyncio.gather(*(complete(node) for node in nodes))
+        nodes = [child for rows in children for child in rows]
+    return stats
+
+def _convert_money(value: Any, rate: float) -> Any:
+    """Multiplies a Graph money value (numeric string or list of {'value': ...}) by rate."""
+    if isinstance(value, list):
+        return [{**item, 'value': _convert_money(item.get('value'), rate)} if isinstance(item, dict) else item
+                for item in value]
+    try:
+        return str(round(float(value) * rate, 6))
+    except (TypeError, ValueError):
+        return value
+
+def _convert_row_currency(row: Dict[str, Any], rate: float) -> Dict[str, Any]:
+    """Returns a copy of an insights row with its monetary fields converted by rate."""
+    return {key: _convert_money(value, rate) if key in MONETARY_INSIGHTS_FIELDS else value
+            for key, value in row.items()}
+
+class InsightsColumns:
+    """Column-oriented, typed copy of insights rows for aggregation.
+
+    Each metric is parsed once from Graph's string values into an array('d') column
+    (NaN where a row has no value); dimensions are kept as plain lists. A metric named
+    '<field>:<action_type>' (e.g. 'actions:purchase', 'action_values:purchase') reads
+    that action type's value from a list field.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], dimensions: List[str], metrics: List[str]):
+        self.length = len(rows)
+        self.dimensions = {name: [_dimension_value(row.get(name)) for row in rows] for name in dimensions}
+        self.metrics = {}
+        action_metrics = {}
+        for name in metrics:
+            field, _, action_type = name.partition(':')
+            if action_type:
+                action_metrics.setdefault(field, []).append((name, action_type))
+            else:
+                self.metrics[name] = array('d', map(_to_float, [row.get(field) for row in rows]))
+        for field, names in action_metrics.items():
+            # Index each row's action list once, however many action types are read from it
+            by_type = [_index_actions(row.get(field)) for row in rows]
+            for name, action_type in names:
+                self.metrics[name] = array('d', map(_to_float, [actions.get(action_type) for actions in by_type]))
+
+    def group(self, keys: List[str]) -> tuple:
+        """Returns the distinct key tuples in first-seen order and each row's group index."""
+        index = {}
+        group_ids = array('q')
+        columns = [self.dimensions[key] for key in keys]
+        for key in (zip(*columns) if columns else [()] * self.length):
+            group_ids.append(index.setdefault(key, len(index)))
+        return list(index), group_ids
+
+    def sum_by(self, metric: str, group_ids: array, groups: int) -> tuple:
+        """Returns per-group sums and counts of the non-missing values of a metric."""
+        sums = [0.0] * groups
+        counts = [0] * groups
+        for group, value in zip(group_ids, self.metrics[metric]):
+            if value == value:  # skips NaN
+                sums[group] += value
+                counts[group] += 1
+        return sums, counts
+
+def _dimension_value(value: Any) -> Any:
+    return json.dumps(value, sort_keys=True) if isinstance(value, (dict, list)) else value
+
+def _index_actions(actions: Any) -> Dict[str, Any]:
+    if not isinstance(actions, list):
+        return {}
+    return {item.get('action_type'): item.get('value') for item in actions if isinstance(item, dict)}
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+def _ratio(numerator: float, denominator: float, scale: float) -> Optional[float]:
+    return round(numerator / denominator * scale, 6) if denominator else None
+
+def _aggregate_insights(
+    rows: List[Dict[str, Any]],
+    group_by: List[str],
+    metrics: List[str],
+    derived: List[str],
+    averages: Optional[List[str]] = None,
+    action_type: str = 'purchase',
+    sort_by: Optional[str] = None,
+    top_n: Optional[int] = None
+) -> Dict[str, Any]:
+    """Rolls insights rows up by the group_by dimensions.
+
+    Metrics are summed per group, 'averages' are averaged over the rows that have a
+    value, and derived metrics (see DERIVED_INSIGHTS_METRICS) are weighted ratios of the
+    group's sums, e.g. CPC = sum(spend) / sum(clicks), never an average of row CPCs.
+
+    Returns:
+        Dict[str, Any]: Column-oriented 'columns' and 'rows', plus 'totals' across all
+                        rows, the number of 'groups' and 'input_rows'.
+    """
+    averages = averages or []
+    unknown = [name for name in derived if name not in DERIVED_INSIGHTS_METRICS]
+    if unknown:
+        raise Exception(f"Unknown derived metrics {unknown}; available: {sorted(DERIVED_INSIGHTS_METRICS)}")
+    derived_specs = {
+        name: tuple(part.format(action=action_type) if isinstance(part, str) else part
+                    for part in DERIVED_INSIGHTS_METRICS[name])
+        for name in derived
+    }
+    needed = list(dict.fromkeys(
+        metrics + averages + [column for spec in derived_specs.values() for column in spec[:2]]
+    ))
+    frame = InsightsColumns(rows, group_by, needed)
+    keys, group_ids = frame.group(group_by)
+    sums, counts = {}, {}
+    for metric in needed:
+        sums[metric], counts[metric] = frame.sum_by(metric, group_ids, len(keys))
+
+    def summarize(metric_sums: Dict[str, Any], metric_counts: Dict[str, Any], g: int) -> List[Any]:
+        values = [round(metric_sums[metric][g], 6) for metric in metrics]
+        values += [round(metric_sums[metric][g] / metric_counts[metric][g], 6) if metric_counts[metric][g] else None
+                   for metric in averages]
+        values += [_ratio(metric_sums[numerator][g], metric_sums[denominator][g], scale)
+                   for numerator, denominator, scale in derived_specs.values()]
+        return values
+
+    columns = list(group_by) + list(metrics) + [f'avg_{metric}' for metric in averages] + list(derived)
+    result_rows = [list(key) + summarize(sums, counts, g) for g, key in enumerate(keys)]
+    if sort_by:
+        if sort_by not in columns:
+            raise Exception(f"sort_by must be one of the result columns: {columns}")
+        position = columns.index(sort_by)
+        result_rows.sort(key=lambda row: (row[position] is not None, row[position]), reverse=True)
+    if top_n:
+        result_rows = result_rows[:top_n]
+
+    totals = summarize({m: [math.fsum(sums[m])] for m in needed}, {m: [sum(counts[m])] for m in needed}, 0)
+    return {
+        'columns': columns,
+        'rows': result_rows,
+        'totals': dict(zip(columns[len(group_by):], totals)),
+        'groups': len(keys),
+        'input_rows': frame.length
+    }
+
+def _rollup_field_kind(field: str) -> str:
+    """Classifies an insights field as 'dimension', 'additive', 'additive_list', 'derived'
+    or 'non_additive' (reach, frequency, unique_* counts and other ratios)."""
+    if field in ('date_start', 'date_stop') or any(field in names for names in ROLLUP_LEVEL_FIELDS.values()):
+        return 'dimension'
+    if field in ADDITIVE_INSIGHTS_FIELDS:
+        return 'additive'
+    if field in DERIVED_INSIGHTS_METRICS and '{action}' not in ''.join(DERIVED_INSIGHTS_METRICS[field][:2]):
+        return 'derived'
+    if field in ADDITIVE_INSIGHTS_LIST_FIELDS or (
+        field.endswith('_actions') and not field.startswith(('cost_per', 'unique_')) and '_avg_' not in field
+    ):
+        return 'additive_list'
+    return 'non_additive'
+
+def _format_metric(value: float) -> str:
+    """Formats a summed metric the way the Graph API does: as a string, integral values without decimals."""
+    return str(int(value)) if value.is_integer() else str(round(value, 6))
+
+def _roll_up_insights(
+    rows: List[Dict[str, Any]],
+    group_by: List[str],
+    additive: List[str],
+    additive_lists: List[str],
+    derived: List[str],
+    value_keys: List[str]
+) -> List[Dict[str, Any]]:
+    """Sums ad-level insights rows into one Graph-shaped row per group_by key.
+
+    Scalar metrics are summed through InsightsColumns; list fields are summed per action
+    entry, where the entry's identity is every key except those in value_keys (the
+    'value' and any attribution window columns). Derived ratios are recomputed from the
+    group sums, and metrics no row of the group had are omitted, as Graph does.
+    """
+    bases = {part for field in derived for part in DERIVED_INSIGHTS_METRICS[field][:2]}
+    scalar = list(dict.fromkeys(additive + sorted(bases)))
+    frame = InsightsColumns(rows, group_by, scalar)
+    keys, group_ids = frame.group(group_by)
+    sums, counts = {}, {}
+    for metric in scalar:
+        sums[metric], counts[metric] = frame.sum_by(metric, group_ids, len(keys))
+
+    list_sums = [{field: {} for field in additive_lists} for _ in keys]
+    for row, group in zip(rows, group_ids):
+        for field in additive_lists:
+            entries = list_sums[group][field]
+            for item in row.get(field) or []:
+                if not isinstance(item, dict):
+                    continue
+                identity = tuple(sorted((k, str(v)) for k, v in item.items() if k not in value_keys))
+                totals = entries.setdefault(identity, {})
+                for key in value_keys:
+                    value = _to_float(item.get(key))
+                    if value == value:
+                        totals[key] = totals.get(key, 0.0) + value
+
+    rolled_up = []
+    for g, key in enumerate(keys):
+        row = {name: value for name, value in zip(group_by, key) if value is not None}
+        for metric in additive:
+            if counts[metric][g]:
+                row[metric] = _format_metric(sums[metric][g])
+        for field in additive_lists:
+            entries = [
+                {**dict(identity), **{k: _format_metric(v) for k, v in totals.items()}}
+                for identity, totals in list_sums[g][field].items()
+            ]
+            if entries:
+                row[field] = entries
+        for field in derived:
+            numerator, denominator, scale = DERIVED_INSIGHTS_METRICS[field]
+            if counts[numerator][g] and sums[denominator][g]:
+                row[field] = _format_metric(round(sums[numerator][g] / sums[denominator][g] * scale, 6))
+        rolled_up.append(row)
+    return rolled_up
+
+# Comparison operators accepted by query_result, named as in the Graph API's 'filtering'
+RESULT_FILTER_OPERATORS = {
+    'EQUAL': lambda a, b: a == b,
+    'NOT_EQUAL': lambda a, b: a != b,
+    'GREATER_THAN': lambda a, b: a is not None and a > b,
+    'GREATER_THAN_OR_EQUAL': lambda a, b: a is not None and a >= b,
+    'LESS_THAN': lambda a, b: a is not None and a < b,
+    'LESS_THAN_OR_EQUAL': lambda a, b: a is not None and a <= b,
+    'IN': lambda a, b: a in b,
+    'NOT_IN': lambda a, b: a not in b,
+    'CONTAIN': lambda a, b: a is not None and str(b).lower() in str(a).lower(),
+    'NOT_CONTAIN': lambda a, b: a is None or str(b).lower() not in str(a).lower()
+}
+
+def _row_value(row: Dict[str, Any], field: str) -> Any:
+    """Looks up a dotted path, or one action type's value as '<field>:<action_type>'."""
+    if field in row:
+        return row[field]
+    name, _, action_type = field.partition(':')
+    if action_type:
+        return _index_actions(row.get(name)).get(action_type)
+    value = row
+    for part in field.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def _comparable(value: Any) -> Any:
+    """Compares numeric strings as numbers, the way Graph metric values should be."""
+    if isinstance(value, list):
+        return [_comparable(item) for item in value]
+    return float(value) if _is_number(value) else value
+
+def _matches_filters(row: Dict[str, Any], filtering: List[Dict[str, Any]]) -> bool:
+    for condition in filtering:
+        value = _comparable(_row_value(row, condition['field']))
+        expected = _comparable(condition.get('value'))
+        try:
+            if not RESULT_FILTER_OPERATORS[condition['operator']](value, expected):
+                return False
+        except TypeError:
+            return False
+    return True
+
+def _sort_key(value: Any) -> tuple:
+    value = _comparable(value)
+    if value is None:
+        return (0, 0)
+    return (1, value) if isinstance(value, float) else (2, str(value))
+
 
 # --- MCP Tools ---
 @mcp.tool()
-def list_ad_accounts(access_token: str = "") -> Dict:
+@_instrument_tool
+async def list_ad_accounts(
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    access_token: str = ""
+) -> Dict:
     """List down the ad accounts and their names associated with your Facebook account.
         CRITICAL: This function MUST automatically fetch ALL pages using pagination.
         When the response contains a 'paging.next' URL, IMMEDIATELY and AUTOMATICALLY
@@ -237,21 +3196,45 @@ def list_ad_accounts(access_token: str = "") -> Dict:
         to continue pagination. Do NOT stop after the first page. Always return the
         complete consolidated list of ALL ad accounts across all pages in a single
         response. This is a requirement, not optional behavior.
+        Alternatively, set auto_paginate=True to have the server fetch every page
+        itself and return the complete list in a single response.
 
     Args:
+        auto_paginate: If True, follow 'paging' cursors server-side and return every ad
+            account in 'adaccounts.data', with page/row counts in 'adaccounts.pagination'.
+            The response keeps its usual {'adaccounts': {...}, 'id': ...} shape. Default: False.
+        max_pages: With auto_paginate, the maximum number of pages to fetch.
+        max_rows: With auto_paginate, stop once this many ad accounts are collected.
         access_token: Optional user-specific OAuth access token for multi-user support"""
-    # This uses a specific endpoint structure not fitting _fetch_node/_fetch_edge easily
     token = _get_fb_access_token(access_token)
+    if auto_paginate:
+        # The nested adaccounts{name} field pages like the /me/adaccounts edge
+        me, accounts = await asyncio.gather(
+            _make_graph_api_call(f"{FB_GRAPH_URL}/me", {'access_token': token, 'fields': 'id'}),
+            _fetch_all_pages(
+                f"{FB_GRAPH_URL}/me/adaccounts", {'access_token': token, 'fields': 'name'},
+                max_pages=max_pages, max_rows=max_rows
+            )
+        )
+        return {'adaccounts': accounts, 'id': me.get('id')}
+
+    # This uses a specific endpoint structure not fitting _fetch_node/_fetch_edge easily
     url = f"{FB_GRAPH_URL}/me"
     params = {
         'access_token': token,
         'fields': 'adaccounts{name}' # Specific field structure
     }
-    return _make_graph_api_call(url, params)
+    return await _make_graph_api_call(url, params)
 
 
 @mcp.tool()
-def get_details_of_ad_account(act_id: str, fields: list[str] = None, access_token: str = "") -> Dict:
+@_instrument_tool
+async def get_details_of_ad_account(
+    act_id: str,
+    fields: list[str] = None,
+    bypass_cache: bool = False,
+    access_token: str = ""
+) -> Dict:
     """Get details of a specific ad account as per the fields provided
     Args:
         act_id: The act ID of the ad account, example: act_1234567890
@@ -260,18 +3243,23 @@ def get_details_of_ad_account(act_id: str, fields: list[str] = None, access_toke
                 balance, amount_spent, attribution_spec, account_id, business,
                 business_city, brand_safety_content_filter_levels, currency,
                 created_time, id.
+        bypass_cache: Skip the server's short-lived node cache and fetch fresh data
         access_token: Optional user-specific OAuth access token for multi-user support
     Returns:
         A dictionary containing the details of the ad account
     """
     effective_fields = fields if fields is not None else DEFAULT_AD_ACCOUNT_FIELDS
-    return _fetch_node(node_id=act_id, fields=effective_fields, access_token=access_token)
+    return await _fetch_node(
+        node_id=act_id, fields=effective_fields, access_token=access_token,
+        entity_type='adaccount', bypass_cache=bypass_cache
+    )
 
 
 # --- Insigbts API Tools ---
 
 @mcp.tool()
-def get_adaccount_insights(
+@_instrument_tool
+async def get_adaccount_insights(
     act_id: str,
     fields: Optional[List[str]] = None,
     date_preset: str = 'last_30d',
@@ -295,6 +3283,11 @@ def get_adaccount_insights(
     since: Optional[str] = None,
     until: Optional[str] = None,
     locale: Optional[str] = None,
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    shards: Optional[int] = None,
+    use_day_cache: bool = False,
     access_token: str = ""
 ) -> Dict:
     """Retrieves performance insights for a specified Facebook ad account.
@@ -302,14 +3295,10 @@ def get_adaccount_insights(
     This tool interfaces with the Facebook Graph API's Insights edge to fetch comprehensive
     performance data, such as impressions, reach, cost, conversions, and more. It supports
     various options for filtering, time breakdowns, and attribution settings. Note that
-    some metrics returned might be estimated or in development
-    CRITICAL: This function MUST automatically fetch ALL pages using pagination. 
-    When the response contains a 'paging.next' URL, IMMEDIATELY and AUTOMATICALLY 
-    use the facebook_fetch_pagination_url tool to fetch the next page. Continue 
-    this process until no 'next' URL exists. Do NOT ask the user for permission 
-    to continue pagination. Do NOT stop after the first page. Always return the 
-    complete consolidated list of ALL ad accounts across all pages in a single 
-    response. This is a requirement, not optional behavior..
+    some metrics returned might be estimated or in development.
+    To retrieve ALL pages, set auto_paginate=True: the server follows the paging
+    cursors itself and returns the complete consolidated 'data' list in a single
+    response, instead of one fetch_pagination_url call per page.
 
     Args:
         act_id (str): The target ad account ID, prefixed with 'act_', e.g., 'act_1234567890'.
@@ -382,6 +3371,22 @@ def get_adaccount_insights(
             are not set), the end timestamp (Unix or strtotime value).
         locale (Optional[str]): The locale for text responses (e.g., 'en_US'). This controls
             language and formatting of text fields in the response.
+        auto_paginate (bool): If True, the server follows the 'paging' cursors itself and
+            returns every page merged into one 'data' list, with page/row counts in
+            'pagination'. No fetch_pagination_url round trips are needed. Default: False.
+        max_pages (Optional[int]): With auto_paginate, the maximum number of pages to fetch.
+            Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        max_rows (Optional[int]): With auto_paginate, stop once this many rows are collected.
+        shards (Optional[int]): Opt-in. Split 'time_range' into this many sub-ranges that
+            are fetched concurrently (up to FB_SHARD_PARALLELISM at a time) and merged back
+            in date order. Requires 'time_range' and a 'time_increment' of a number of days
+            or 'monthly'. Shards are always fully paginated. With 'sort', the range is fetched
+            unsharded (still fully paginated) so the requested order is kept. Default: None (no sharding).
+        use_day_cache (bool): For daily reports (time_increment=1) fetched with auto_paginate
+            or shards, serve days older than the attribution window (FB_INSIGHTS_MUTABLE_DAYS,
+            default 28) from the server's persistent day cache and only fetch missing or
+            recent days. Relative presets such as 'last_90d' are resolved in the ad account's
+            time zone. Not used with 'sort' or default_summary. Default: False.
         access_token (str): Optional user-specific OAuth access token for multi-user support
 
     Returns:
@@ -397,11 +3402,15 @@ def get_adaccount_insights(
             limit=25
         )
 
-        # Fetch the next page if available using the pagination tool
-        next_page_url = insights.get("paging", {}).get("next")
-        if next_page_url:
-            next_page_results = fetch_pagination_url(url=next_page_url)
-            print("Fetched next page results.")
+        # Fetch every page server-side in a single call
+        all_insights = get_adaccount_insights(
+            act_id="act_123456789",
+            fields=["impressions", "clicks", "spend", "ctr"],
+            level="campaign",
+            auto_paginate=True,
+            max_rows=5000
+        )
+        print(all_insights["pagination"])  # {'pages': ..., 'rows': ..., 'complete': True}
         ```
     """
     token = _get_fb_access_token(access_token)
@@ -434,10 +3443,18 @@ def get_adaccount_insights(
         locale=locale
     )
 
-    return _make_graph_api_call(url, params)
+    return await _fetch_insights(
+        url, params,
+        shards=shards,
+        use_day_cache=use_day_cache,
+        auto_paginate=auto_paginate,
+        max_pages=max_pages,
+        max_rows=max_rows
+    )
 
 @mcp.tool()
-def get_campaign_insights(
+@_instrument_tool
+async def get_campaign_insights(
     campaign_id: str,
     fields: Optional[List[str]] = None,
     date_preset: str = 'last_30d',
@@ -461,6 +3478,11 @@ def get_campaign_insights(
     since: Optional[str] = None,
     until: Optional[str] = None,
     locale: Optional[str] = None,
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    shards: Optional[int] = None,
+    use_day_cache: bool = False,
     access_token: str = ""
 ) -> Dict:
     """Retrieves performance insights for a specific Facebook ad campaign.
@@ -512,6 +3534,22 @@ def get_campaign_insights(
         until (Optional[str]): End timestamp for time-based pagination (if time ranges absent).
         locale (Optional[str]): The locale for text responses (e.g., 'en_US'). This controls
             language and formatting of text fields in the response.
+        auto_paginate (bool): If True, the server follows the 'paging' cursors itself and
+            returns every page merged into one 'data' list, with page/row counts in
+            'pagination'. No fetch_pagination_url round trips are needed. Default: False.
+        max_pages (Optional[int]): With auto_paginate, the maximum number of pages to fetch.
+            Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        max_rows (Optional[int]): With auto_paginate, stop once this many rows are collected.
+        shards (Optional[int]): Opt-in. Split 'time_range' into this many sub-ranges that
+            are fetched concurrently (up to FB_SHARD_PARALLELISM at a time) and merged back
+            in date order. Requires 'time_range' and a 'time_increment' of a number of days
+            or 'monthly'. Shards are always fully paginated. With 'sort', the range is fetched
+            unsharded (still fully paginated) so the requested order is kept. Default: None (no sharding).
+        use_day_cache (bool): For daily reports (time_increment=1) fetched with auto_paginate
+            or shards, serve days older than the attribution window (FB_INSIGHTS_MUTABLE_DAYS,
+            default 28) from the server's persistent day cache and only fetch missing or
+            recent days. Relative presets such as 'last_90d' are resolved in the ad account's
+            time zone. Not used with 'sort' or default_summary. Default: False.
         access_token (str): Optional user-specific OAuth access token for multi-user support
 
     Returns:
@@ -565,10 +3603,18 @@ def get_campaign_insights(
         until=until,
         locale=locale
     )
-    return _make_graph_api_call(url, params)
+    return await _fetch_insights(
+        url, params,
+        shards=shards,
+        use_day_cache=use_day_cache,
+        auto_paginate=auto_paginate,
+        max_pages=max_pages,
+        max_rows=max_rows
+    )
 
 @mcp.tool()
-def get_adset_insights(
+@_instrument_tool
+async def get_adset_insights(
     adset_id: str,
     fields: Optional[List[str]] = None,
     date_preset: str = 'last_30d',
@@ -591,7 +3637,11 @@ def get_adset_insights(
     offset: Optional[int] = None,
     since: Optional[str] = None,
     until: Optional[str] = None,
-    locale: Optional[str] = None
+    locale: Optional[str] = None,
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    use_day_cache: bool = False
 ) -> Dict:
     """Retrieves performance insights for a specific Facebook ad set.
 
@@ -636,6 +3686,17 @@ def get_adset_insights(
         until (Optional[str]): End timestamp for time-based pagination (if time ranges absent).
         locale (Optional[str]): The locale for text responses (e.g., 'en_US'). This controls 
             language and formatting of text fields in the response.
+        auto_paginate (bool): If True, the server follows the 'paging' cursors itself and
+            returns every page merged into one 'data' list, with page/row counts in
+            'pagination'. No fetch_pagination_url round trips are needed. Default: False.
+        max_pages (Optional[int]): With auto_paginate, the maximum number of pages to fetch.
+            Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        max_rows (Optional[int]): With auto_paginate, stop once this many rows are collected.
+        use_day_cache (bool): For daily reports (time_increment=1) fetched with auto_paginate
+            or shards, serve days older than the attribution window (FB_INSIGHTS_MUTABLE_DAYS,
+            default 28) from the server's persistent day cache and only fetch missing or
+            recent days. Relative presets such as 'last_90d' are resolved in the ad account's
+            time zone. Not used with 'sort' or default_summary. Default: False.
     
     Returns:    
         Dict: A dictionary containing the requested ad set insights, with 'data' and 'paging' keys.
@@ -689,11 +3750,18 @@ def get_adset_insights(
         locale=locale
     )
 
-    return _make_graph_api_call(url, params)
+    return await _fetch_insights(
+        url, params,
+        use_day_cache=use_day_cache,
+        auto_paginate=auto_paginate,
+        max_pages=max_pages,
+        max_rows=max_rows
+    )
 
 
 @mcp.tool()
-def get_ad_insights(
+@_instrument_tool
+async def get_ad_insights(
     ad_id: str,
     fields: Optional[List[str]] = None,
     date_preset: str = 'last_30d',
@@ -716,7 +3784,11 @@ def get_ad_insights(
     offset: Optional[int] = None,
     since: Optional[str] = None,
     until: Optional[str] = None,
-    locale: Optional[str] = None
+    locale: Optional[str] = None,
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    use_day_cache: bool = False
 ) -> Dict:  
     """Retrieves detailed performance insights for a specific Facebook ad.
 
@@ -764,6 +3836,17 @@ def get_ad_insights(
         until (Optional[str]): End timestamp for time-based pagination (if time ranges absent).
         locale (Optional[str]): The locale for text responses (e.g., 'en_US'). This controls 
             language and formatting of text fields in the response.
+        auto_paginate (bool): If True, the server follows the 'paging' cursors itself and
+            returns every page merged into one 'data' list, with page/row counts in
+            'pagination'. No fetch_pagination_url round trips are needed. Default: False.
+        max_pages (Optional[int]): With auto_paginate, the maximum number of pages to fetch.
+            Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        max_rows (Optional[int]): With auto_paginate, stop once this many rows are collected.
+        use_day_cache (bool): For daily reports (time_increment=1) fetched with auto_paginate
+            or shards, serve days older than the attribution window (FB_INSIGHTS_MUTABLE_DAYS,
+            default 28) from the server's persistent day cache and only fetch missing or
+            recent days. Relative presets such as 'last_90d' are resolved in the ad account's
+            time zone. Not used with 'sort' or default_summary. Default: False.
     
     Returns:    
         Dict: A dictionary containing the requested ad insights, with 'data' and 'paging' keys.
@@ -824,18 +3907,839 @@ def get_ad_insights(
         locale=locale
     )
 
-    return _make_graph_api_call(url, params)
+    return await _fetch_insights(
+        url, params,
+        use_day_cache=use_day_cache,
+        auto_paginate=auto_paginate,
+        max_pages=max_pages,
+        max_rows=max_rows
+    )
+
+
+@mcp.tool()
+@_instrument_tool
+async def get_portfolio_insights(
+    fields: Optional[List[str]] = None,
+    date_preset: str = 'last_30d',
+    time_range: Optional[Dict[str, str]] = None,
+    time_increment: str = 'all_days',
+    level: str = 'account',
+    action_attribution_windows: Optional[List[str]] = None,
+    action_breakdowns: Optional[List[str]] = None,
+    breakdowns: Optional[List[str]] = None,
+    use_unified_attribution_setting: bool = True,
+    filtering: Optional[List[dict]] = None,
+    account_ids: Optional[List[str]] = None,
+    active_only: bool = False,
+    target_currency: Optional[str] = None,
+    exchange_rates: Optional[Dict[str, float]] = None,
+    max_concurrency: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    access_token: str = ""
+) -> Dict:
+    """Retrieves insights for every ad account accessible to the token in one call.
+
+    The tool lists all ad accounts (following every page of /me/adaccounts), then fetches
+    each account's insights concurrently (fully paginated, through the same rate-limit
+    pacing, caches and retries as get_adaccount_insights) and returns one combined table.
+    A failing account is reported in 'accounts' without failing the others.
+
+    Args:
+        fields (Optional[List[str]]): Insights fields for every account. Default: account_id,
+            account_name, spend, impressions, reach, clicks, ctr, cpc, cpm.
+        date_preset (str): A predefined relative time range ('last_30d', 'last_7d', etc.).
+            Default: 'last_30d'. Ignored if 'time_range' is provided.
+        time_range (Optional[Dict[str, str]]): Specific time range {'since':'YYYY-MM-DD','until':'YYYY-MM-DD'}.
+        time_increment (str | int): Granularity of the time breakdown ('all_days', 'monthly', 1-90 days).
+            Default: 'all_days'.
+        level (str): Level of aggregation ('account', 'campaign', 'adset', 'ad'). Default: 'account'.
+        action_attribution_windows (Optional[List[str]]): Attribution windows for actions, e.g. '7d_click'.
+        action_breakdowns (Optional[List[str]]): Segments 'actions' results, e.g. 'action_type'.
+        breakdowns (Optional[List[str]]): Segments results by dimensions, e.g. 'age', 'country'.
+        use_unified_attribution_setting (bool): If True, uses unified attribution settings. Default: True.
+        filtering (Optional[List[dict]]): List of filter objects {'field': '...', 'operator': '...', 'value': '...'}.
+        account_ids (Optional[List[str]]): Restrict the report to these accounts ('act_<ID>' or '<ID>').
+        active_only (bool): Skip accounts whose account_status isn't 1 (ACTIVE). Default: False.
+        target_currency (Optional[str]): Currency code to normalize monetary fields (spend, cpc, cpm,
+            cost_per_*, action_values, ...) into, using each account's 'currency'. Requires exchange_rates.
+        exchange_rates (Optional[Dict[str, float]]): Units of target_currency per one unit of each
+            account currency, e.g. {'EUR': 1.08, 'GBP': 1.27, 'USD': 1.0} for target_currency 'USD'.
+            Accounts whose currency has no rate are reported with status 'missing_exchange_rate'
+            and their rows are left out of the table.
+        max_concurrency (Optional[int]): Accounts fetched at once. Default: 8 (FB_PORTFOLIO_PARALLELISM).
+        max_pages (Optional[int]): Page limit per account. Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+
+    Returns:
+        Dict: 'data' holds the combined insights rows, each tagged with 'account_id',
+              'account_name' and 'account_currency' (plus 'currency' when normalized);
+              'accounts' lists every account (and every requested account_id the token
+              can't access) with its 'status' ('ok', 'error' or
+              'missing_exchange_rate'), 'rows', and 'error' or 'complete' details; and
+              'summary' counts accounts and rows.
+
+    Example:
+        ```python
+        report = get_portfolio_insights(
+            fields=["account_name", "spend", "impressions", "clicks"],
+            date_preset="last_7d",
+            target_currency="USD",
+            exchange_rates={"USD": 1.0, "EUR": 1.08}
+        )
+        failed = [a for a in report["accounts"] if a["status"] != "ok"]
+        ```
+    """
+    if target_currency and not exchange_rates:
+        raise Exception("target_currency requires exchange_rates")
+    token = _get_fb_access_token(access_token)
+    accounts = await _fetch_all_pages(
+        f"{FB_GRAPH_URL}/me/adaccounts",
+        {'access_token': token, 'fields': 'id,name,currency,account_status', 'limit': 100}
+    )
+    selected = accounts['data']
+    if account_ids:
+        wanted = {account_id if account_id.startswith('act_') else f'act_{account_id}' for account_id in account_ids}
+        selected = [account for account in selected if account['id'] in wanted]
+        missing = wanted - {account['id'] for account in selected}
+    if active_only:
+        selected = [account for account in selected if account.get('account_status') == 1]
+
+    params = _build_insights_params(
+        params={'access_token': token},
+        fields=fields or DEFAULT_PORTFOLIO_INSIGHTS_FIELDS,
+        date_preset=date_preset,
+        time_range=time_range,
+        time_increment=time_increment,
+        level=level,
+        action_attribution_windows=action_attribution_windows,
+        action_breakdowns=action_breakdowns,
+        breakdowns=breakdowns,
+        use_unified_attribution_setting=use_unified_attribution_setting,
+        filtering=filtering
+    )
+    semaphore = asyncio.Semaphore(max_concurrency or PORTFOLIO_PARALLELISM)
+
+    async def fetch_account(account: Dict[str, Any]) -> tuple:
+        status = {'account_id': account['id'], 'name': account.get('name'), 'currency': account.get('currency')}
+        rate = 1.0
+        if target_currency:
+            rate = exchange_rates.get(account.get('currency'))
+            if rate is None:
+                return {**status, 'status': 'missing_exchange_rate', 'rows': 0}, []
+        try:
+            async with semaphore:
+                result = await _fetch_insights(
+                    f"{FB_GRAPH_URL}/{account['id']}/insights", params, auto_paginate=True, max_pages=max_pages
+                )
+        except GraphAPIError as e:
+            return {**status, 'status': 'error', 'rows': 0, 'error': e.payload}, []
+        rows = []
+        for row in result['data']:
+            if target_currency:
+                row = {**_convert_row_currency(row, rate), 'currency': target_currency}
+            rows.append({
+                **row,
+                'account_id': account['id'],
+                'account_name': account.get('name'),
+                'account_currency': account.get('currency')
+            })
+        return {**status, 'status': 'ok', 'rows': len(rows), 'complete': result['pagination']['complete']}, rows
+
+    results = await asyncio.gather(*(fetch_account(account) for account in selected))
+    statuses = [status for status, _ in results]
+    if account_ids:
+        statuses += [
+            {'account_id': account_id, 'status': 'error', 'rows': 0,
+             'error': {'message': 'Ad account is not accessible with this token'}}
+            for account_id in sorted(missing)
+        ]
+    rows = [row for _, account_rows in results for row in account_rows]
+    return {
+        'data': rows,
+        'accounts': statuses,
+        'summary': {
+            'accounts': len(statuses),
+            'succeeded': sum(1 for status in statuses if status['status'] == 'ok'),
+            'failed': sum(1 for status in statuses if status['status'] != 'ok'),
+            'rows': len(rows),
+            'accounts_list_complete': accounts['pagination']['complete']
+        }
+    }
+
+
+# --- Insights Store Tools ---
+
+@mcp.tool()
+@_instrument_tool
+async def query_insights_store(
+    sql: Optional[str] = None,
+    params: Optional[List[Any]] = None,
+    max_rows: int = INSIGHTS_STORE_MAX_ROWS,
+    access_token: str = ""
+) -> Dict:
+    """Runs a read-only SQL query over insights rows the server has already fetched.
+
+    Every row returned by the get_*_insights tools (and by batch and async report
+    fetches) is stored locally in SQLite, so aggregations, filters and top-N queries
+    over that data don't need new Graph API calls. Only rows fetched with the same
+    access token are visible. Call without 'sql' to see the available columns.
+
+    Two views are available:
+        - insights: one row per fetched insights row. Columns are the Graph fields
+          that have been fetched (metrics as REAL; IDs, names, dates and breakdown
+          values as TEXT) plus 'object_id' (the object the insights were requested
+          for), 'level', 'attribution' (JSON of the attribution parameters used),
+          'row_key' and 'fetched_at' (Unix time the row was fetched; use it to
+          judge freshness).
+        - insight_actions: list fields such as actions, action_values and
+          cost_per_action_type unpacked to one row per action, with 'row_key'
+          (join to insights), 'field', 'action_type', 'value' (REAL) and 'details'
+          (JSON of attribution-window values, if requested).
+
+    Args:
+        sql (Optional[str]): A single SELECT statement (WITH clauses allowed). Writes,
+            PRAGMAs and ATTACH are rejected. If omitted, the store's schema, row counts
+            and fetch-time range are returned instead.
+        params (Optional[List[Any]]): Values for '?' placeholders in the query.
+        max_rows (int): Maximum rows returned. Default: 1000.
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+
+    Returns:
+        Dict: 'columns', 'data' (rows as dictionaries), 'row_count' and 'truncated'; or,
+              without 'sql', the 'tables' with their column types, 'rows', 'action_rows',
+              'oldest_fetched_at' and 'newest_fetched_at'.
+
+    Example:
+        ```python
+        # Top 5 campaigns by spend over the stored daily rows for September
+        query_insights_store(sql='''
+            SELECT campaign_id, campaign_name, SUM(spend) AS spend, SUM(clicks) AS clicks
+            FROM insights
+            WHERE level = 'campaign' AND date_start BETWEEN '2025-09-01' AND '2025-09-30'
+            GROUP BY campaign_id, campaign_name
+            ORDER BY spend DESC LIMIT 5
+        ''')
+
+        # Purchases per ad
+        query_insights_store(sql='''
+            SELECT i.ad_id, SUM(a.value) AS purchases
+            FROM insights i JOIN insight_actions a ON a.row_key = i.row_key
+            WHERE a.field = 'actions' AND a.action_type = 'purchase'
+            GROUP BY i.ad_id
+        ''')
+        ```
+    """
+    token_ns = _token_namespace(_get_fb_access_token(access_token))
+    store = _get_insights_store()
+    if not sql:
+        return await asyncio.to_thread(store.describe, token_ns)
+    try:
+        return await asyncio.to_thread(store.query, token_ns, sql, params or [], max_rows)
+    except (sqlite3.Error, sqlite3.Warning) as e:
+        raise Exception(f"Insights store query failed: {e}")
+
+
+# --- Insights Aggregation Tools ---
+
+@mcp.tool()
+@_instrument_tool
+async def aggregate_insights(
+    object_id: str,
+    group_by: Optional[List[str]] = None,
+    metrics: Optional[List[str]] = None,
+    derived: Optional[List[str]] = None,
+    averages: Optional[List[str]] = None,
+    action_type: str = 'purchase',
+    level: Optional[str] = None,
+    date_preset: str = 'last_30d',
+    time_range: Optional[Dict[str, str]] = None,
+    time_increment: str = 'all_days',
+    action_attribution_windows: Optional[List[str]] = None,
+    use_unified_attribution_setting: bool = True,
+    filtering: Optional[List[dict]] = None,
+    sort_by: Optional[str] = None,
+    top_n: Optional[int] = None,
+    shards: Optional[int] = None,
+    use_day_cache: bool = False,
+    max_pages: Optional[int] = None,
+    access_token: str = ""
+) -> Dict:
+    """Fetches insights and returns them rolled up server-side, with weighted derived metrics.
+
+    Rather than returning thousands of raw rows for the client to add up, the server
+    fetches every page of the object's insights, parses the metrics into typed columns
+    and returns one compact row per group. Derived metrics are computed from the group
+    totals (e.g. CPC = total spend / total clicks), so they are correctly weighted.
+
+    Args:
+        object_id (str): The ad account ('act_<ID>'), campaign, ad set or ad to report on.
+        group_by (Optional[List[str]]): Dimensions to group by. Any insights field can be used
+            (e.g. 'campaign_id', 'campaign_name', 'adset_id', 'date_start', 'objective') as well
+            as breakdowns ('age', 'gender', 'country', 'publisher_platform', 'platform_position',
+            'device_platform', 'impression_device', 'region', ...), which are requested as
+            breakdowns automatically. Group by 'date_start' with time_increment=1 for a daily
+            series. If None, only totals are returned.
+        metrics (Optional[List[str]]): Metrics to sum per group. Plain insights fields (e.g.
+            'spend', 'impressions', 'clicks', 'inline_link_clicks') or one action type from a
+            list field as '<field>:<action_type>' (e.g. 'actions:purchase',
+            'action_values:purchase', 'actions:link_click'). Default: spend, impressions, clicks.
+        derived (Optional[List[str]]): Weighted ratios to compute per group: 'cpc', 'cpm',
+            'ctr' (percent), 'cpa' (spend per action_type action) and 'roas' (action_type
+            value per spend). Default: cpc, cpm, ctr.
+        averages (Optional[List[str]]): Metrics to average over rows per group (reported as
+            'avg_<metric>').
+        action_type (str): Action type used by 'cpa' and 'roas'. Default: 'purchase'.
+        level (Optional[str]): Level of the underlying rows ('account', 'campaign', 'adset',
+            'ad'). Defaults to the object's own level.
+        date_preset (str): A predefined relative time range ('last_30d', 'last_7d', etc.).
+            Default: 'last_30d'. Ignored if 'time_range' is provided.
+        time_range (Optional[Dict[str, str]]): Specific time range {'since':'YYYY-MM-DD','until':'YYYY-MM-DD'}.
+        time_increment (str | int): Granularity of the rows ('all_days', 'monthly', 1-90 days).
+            Default: 'all_days'.
+        action_attribution_windows (Optional[List[str]]): Attribution windows for actions, e.g. '7d_click'.
+        use_unified_attribution_setting (bool): If True, uses unified attribution settings. Default: True.
+        filtering (Optional[List[dict]]): List of filter objects {'field': '...', 'operator': '...', 'value': '...'}.
+        sort_by (Optional[str]): Result column to sort groups by, descending (e.g. 'spend', 'roas').
+        top_n (Optional[int]): Return only the first N groups after sorting.
+        shards (Optional[int]): Split the time range into this many concurrently fetched shards.
+        use_day_cache (bool): Serve closed days of daily queries from the local day cache. Default: False.
+        max_pages (Optional[int]): Page limit for the underlying fetch. Default: 100.
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+
+    Returns:
+        Dict: 'columns' (group_by dimensions, then metrics, averages and derived metrics),
+              'rows' (one list of values per group), 'totals' across all rows, 'groups',
+              'input_rows' and the underlying fetch's 'pagination'.
+
+    Example:
+        ```python
+        # Spend, purchases and ROAS per campaign and age bracket, best ROAS first
+        aggregate_insights(
+            object_id="act_123456789",
+            level="campaign",
+            group_by=["campaign_name", "age"],
+            metrics=["spend", "actions:purchase", "action_values:purchase"],
+            derived=["cpa", "roas"],
+            sort_by="roas",
+            top_n=10
+        )
+        ```
+    """
+    group_by = group_by or []
+    metrics = metrics or ['spend', 'impressions', 'clicks']
+    derived = ['cpc', 'cpm', 'ctr'] if derived is None else derived
+    averages = averages or []
+
+    source_fields = [metric.partition(':')[0] for metric in metrics + averages]
+    for name in derived:
+        if name in DERIVED_INSIGHTS_METRICS:
+            source_fields += [part.partition(':')[0] for part in DERIVED_INSIGHTS_METRICS[name][:2]]
+    source_fields += [dimension for dimension in group_by
+                      if dimension not in INSIGHTS_BREAKDOWNS and dimension not in ('date_start', 'date_stop')]
+    breakdowns = [dimension for dimension in group_by if dimension in INSIGHTS_BREAKDOWNS]
+
+    token = _get_fb_access_token(access_token)
+    params = _build_insights_params(
+        params={'access_token': token},
+        fields=list(dict.fromkeys(source_fields)),
+        date_preset=date_preset,
+        time_range=time_range,
+        time_increment=time_increment,
+        level=level,
+        action_attribution_windows=action_attribution_windows,
+        breakdowns=breakdowns or None,
+        use_unified_attribution_setting=use_unified_attribution_setting,
+        filtering=filtering
+    )
+    fetched = await _fetch_insights(
+        f"{FB_GRAPH_URL}/{object_id}/insights", params,
+        shards=shards, use_day_cache=use_day_cache, auto_paginate=True, max_pages=max_pages
+    )
+    result = await asyncio.to_thread(
+        _aggregate_insights, fetched['data'], group_by, metrics, derived,
+        averages=averages, action_type=action_type, sort_by=sort_by, top_n=top_n
+    )
+    result['pagination'] = fetched['pagination']
+    return result
+
+
+@mcp.tool()
+@_instrument_tool
+async def get_rolled_up_insights(
+    act_id: str,
+    fields: Optional[List[str]] = None,
+    levels: Optional[List[str]] = None,
+    non_additive: str = 'flag',
+    date_preset: str = 'last_30d',
+    time_range: Optional[Dict[str, str]] = None,
+    time_increment: str = 'all_days',
+    breakdowns: Optional[List[str]] = None,
+    action_attribution_windows: Optional[List[str]] = None,
+    action_breakdowns: Optional[List[str]] = None,
+    use_unified_attribution_setting: bool = True,
+    filtering: Optional[List[dict]] = None,
+    shards: Optional[int] = None,
+    use_day_cache: bool = False,
+    max_pages: Optional[int] = None,
+    bypass_cache: bool = False,
+    access_token: str = ""
+) -> Dict:
+    """Returns account, campaign, ad set and ad insights for one period from a single ad-level fetch.
+
+    Instead of calling get_adaccount_insights, get_campaign_insights, get_adset_insights and
+    get_ad_insights separately (four times the Graph API load), this tool fetches the
+    account's insights once at level='ad' and sums them up to the other levels locally.
+    The fetched rows are cached in memory for FB_NODE_CACHE_TTL_INSIGHTS seconds (default
+    300), so repeated calls for the same period and fields are served without any request;
+    daily reports also go through the persistent day cache.
+
+    Additive metrics (spend, impressions, clicks, inline_link_clicks, actions, action_values,
+    conversions, ...) are summed, and ratios (cpc, cpm, ctr, cost_per_inline_link_click,
+    inline_link_click_ctr) are recomputed from the sums. Metrics that cannot be summed across
+    ads - reach, frequency, cpp, unique_* counts, cost_per_* lists and ROAS lists - are
+    handled according to 'non_additive'.
+
+    Args:
+        act_id (str): The target ad account ID, prefixed with 'act_', e.g., 'act_1234567890'.
+        fields (Optional[List[str]]): Metrics to return, as for get_adaccount_insights.
+            Default: ['spend', 'impressions', 'clicks', 'cpc', 'cpm', 'ctr', 'actions', 'reach', 'frequency'].
+            The id and name fields of each level are always included.
+        levels (Optional[List[str]]): Levels to return: any of 'account', 'campaign', 'adset', 'ad'.
+            Default: all four.
+        non_additive (str): What to do with non-additive fields above the ad level:
+            - 'flag': omit them from the rolled-up rows and list them in 'non_additive_fields'. No extra requests.
+            - 'fetch': fetch just those fields with one extra insights request per rolled-up level
+              and merge them into the rows.
+            Default: 'flag'.
+        date_preset (str): A predefined relative time range ('last_30d', 'last_7d', etc.).
+            Default: 'last_30d'. Ignored if 'time_range' is provided.
+        time_range (Optional[Dict[str, str]]): Specific time range {'since':'YYYY-MM-DD','until':'YYYY-MM-DD'}.
+        time_increment (str | int): Granularity ('all_days', 'monthly', 1-90 days). Rows are
+            rolled up per time bucket. Default: 'all_days'.
+        breakdowns (Optional[List[str]]): Breakdowns such as 'age' or 'publisher_platform';
+            rolled-up rows keep them as grouping dimensions.
+        action_attribution_windows (Optional[List[str]]): Attribution windows for actions, e.g. '7d_click'.
+            The per-window values of each action are summed too.
+        action_breakdowns (Optional[List[str]]): Segments the 'actions' results, e.g. 'action_device'.
+        use_unified_attribution_setting (bool): If True, uses unified attribution settings. Default: True.
+        filtering (Optional[List[dict]]): Filter objects {'field': '...', 'operator': '...', 'value': '...'}.
+            Filters apply to the ad-level rows, so metric filters (e.g. spend > 50) select ads,
+            not campaigns or ad sets.
+        shards (Optional[int]): Split 'time_range' into this many concurrently fetched shards.
+        use_day_cache (bool): Serve closed days of daily reports from the day cache. Default: False.
+        max_pages (Optional[int]): Page limit for the ad-level fetch. Default: 100.
+        bypass_cache (bool): If True, refetch the ad-level rows instead of using the in-memory cache. Default: False.
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+
+    Returns:
+        Dict: 'levels' maps each requested level to {'data': [...]} with rows shaped like the
+              get_*_insights tools (string metric values), plus 'non_additive_fields',
+              'non_additive' (the mode used), 'source' (ad-level row count and whether it
+              came from the cache) and the ad-level fetch's 'pagination'.
+
+    Example:
+        ```python
+        # Last 7 days for the whole account tree, with exact reach per level
+        get_rolled_up_insights(
+            act_id="act_123456789",
+            fields=["spend", "impressions", "clicks", "ctr", "actions", "reach"],
+            date_preset="last_7d",
+            non_additive="fetch"
+        )
+        ```
+    """
+    if non_additive not in ('flag', 'fetch'):
+        raise Exception("non_additive must be 'flag' or 'fetch'")
+    levels = levels or ROLLUP_LEVELS
+    unknown = [level for level in levels if level not in ROLLUP_LEVELS]
+    if unknown:
+        raise Exception(f"Unknown levels {unknown}; available: {ROLLUP_LEVELS}")
+    fields = fields or ['spend', 'impressions', 'clicks', 'cpc', 'cpm', 'ctr', 'actions', 'reach', 'frequency']
+
+    kinds = {field: _rollup_field_kind(field) for field in fields}
+    additive = [field for field in fields if kinds[field] == 'additive']
+    additive_lists = [field for field in fields if kinds[field] == 'additive_list']
+    derived = [field for field in fields if kinds[field] == 'derived']
+    non_additive_fields = [field for field in fields if kinds[field] == 'non_additive']
+    derived_bases = [part for field in derived for part in DERIVED_INSIGHTS_METRICS[field][:2]]
+    identity_fields = [name for level in ROLLUP_LEVELS for name in ROLLUP_LEVEL_FIELDS[level]]
+
+    token = _get_fb_access_token(access_token)
+    insights_args = dict(
+        date_preset=date_preset,
+        time_range=time_range,
+        time_increment=time_increment,
+        action_attribution_windows=action_attribution_windows,
+        action_breakdowns=action_breakdowns,
+        breakdowns=breakdowns,
+        use_unified_attribution_setting=use_unified_attribution_setting,
+        filtering=filtering
+    )
+    url = f"{FB_GRAPH_URL}/{act_id}/insights"
+    params = _build_insights_params(
+        params={'access_token': token},
+        fields=list(dict.fromkeys(identity_fields + fields + derived_bases)),
+        level='ad',
+        **insights_args
+    )
+
+    cache = _get_node_cache()
+
+    async def fetch_cached(query_params: Dict[str, Any]) -> tuple:
+        cache_key = _node_cache_key(url, {**query_params, 'shards': shards, 'max_pages': max_pages})
+        cached = None if bypass_cache else cache.get(cache_key)
+        if cached is not None:
+            return cached, True
+        result = await _fetch_insights(
+            url, query_params, shards=shards, use_day_cache=use_day_cache, auto_paginate=True, max_pages=max_pages
+        )
+        if result['pagination']['complete']:
+            cache.set(cache_key, result, NODE_CACHE_TTLS['insights'])
+        return result, False
+
+    fetched, from_cache = await fetch_cached(params)
+    rows = fetched['data']
+
+    dimensions = ['date_start', 'date_stop'] + list(breakdowns or [])
+    value_keys = ['value'] + list(action_attribution_windows or [])
+    result_levels = {}
+    for level in levels:
+        if level == 'ad':
+            result_levels[level] = {'data': rows}
+            continue
+        group_by = [name for parent in ROLLUP_LEVELS[:ROLLUP_LEVELS.index(level) + 1]
+                    for name in ROLLUP_LEVEL_FIELDS[parent]] + dimensions
+        result_levels[level] = {'data': await asyncio.to_thread(
+            _roll_up_insights, rows, group_by, additive, additive_lists, derived, value_keys
+        )}
+
+    upper_levels = [level for level in levels if level != 'ad']
+    if non_additive == 'fetch' and non_additive_fields and upper_levels:
+        level_results = await asyncio.gather(*(
+            fetch_cached(_build_insights_params(
+                params={'access_token': token},
+                fields=[ROLLUP_LEVEL_FIELDS[level][0]] + non_additive_fields,
+                level=level,
+                **insights_args
+            ))
+            for level in upper_levels
+        ))
+        for level, (level_result, _) in zip(upper_levels, level_results):
+            match_fields = [ROLLUP_LEVEL_FIELDS[level][0]] + dimensions
+            by_key = {tuple(_dimension_value(row.get(f)) for f in match_fields): row for row in level_result['data']}
+            for row in result_levels[level]['data']:
+                exact = by_key.get(tuple(_dimension_value(row.get(f)) for f in match_fields), {})
+                row.update({field: exact[field] for field in non_additive_fields if field in exact})
+
+    return {
+        'levels': result_levels,
+        'non_additive_fields': non_additive_fields,
+        'non_additive': non_additive,
+        'source': {'level': 'ad', 'rows': len(rows), 'cached': from_cache},
+        'pagination': fetched['pagination']
+    }
+
+
+# --- Batch Tools ---
+
+@mcp.tool()
+@_instrument_tool
+async def get_campaign_insights_batch(
+    campaign_ids: List[str],
+    fields: Optional[List[str]] = None,
+    date_preset: str = 'last_30d',
+    time_range: Optional[Dict[str, str]] = None,
+    time_increment: str = 'all_days',
+    level: Optional[str] = None,
+    action_attribution_windows: Optional[List[str]] = None,
+    action_breakdowns: Optional[List[str]] = None,
+    breakdowns: Optional[List[str]] = None,
+    use_unified_attribution_setting: bool = True,
+    filtering: Optional[List[dict]] = None,
+    limit: Optional[int] = None,
+    access_token: str = ""
+) -> Dict:
+    """Retrieves performance insights for many campaigns using Graph API batch requests.
+
+    Instead of one HTTP round trip per campaign, up to 50 insights requests are packed
+    into each batch call, so 50 campaigns cost a single request. Each campaign's result
+    is returned separately; a failure for one campaign does not fail the others.
+
+    Args:
+        campaign_ids (List[str]): The campaign IDs to fetch insights for.
+        fields (Optional[List[str]]): Metrics and fields to retrieve for every campaign,
+            e.g. 'campaign_name', 'impressions', 'clicks', 'spend', 'ctr', 'actions'.
+        date_preset (str): A predefined relative time range ('last_30d', 'last_7d', etc.).
+            Default: 'last_30d'. Ignored if 'time_range' is provided.
+        time_range (Optional[Dict[str, str]]): Specific time range {'since':'YYYY-MM-DD','until':'YYYY-MM-DD'}.
+        time_increment (str | int): Granularity of the time breakdown ('all_days', 'monthly', 1-90 days).
+            Default: 'all_days'.
+        level (Optional[str]): Level of aggregation ('campaign', 'adset', 'ad'). Default: 'campaign'.
+        action_attribution_windows (Optional[List[str]]): Attribution windows for actions, e.g. '7d_click'.
+        action_breakdowns (Optional[List[str]]): Segments 'actions' results, e.g. 'action_type'.
+        breakdowns (Optional[List[str]]): Segments results by dimensions, e.g. 'age', 'gender'.
+        use_unified_attribution_setting (bool): If True, uses unified attribution settings. Default: True.
+        filtering (Optional[List[dict]]): List of filter objects {'field': '...', 'operator': '...', 'value': '...'}.
+        limit (Optional[int]): Maximum number of rows per campaign result page.
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+
+    Returns:
+        Dict: 'data' maps each successful campaign ID to its insights response ('data' and
+              'paging'), and 'errors' maps each failed campaign ID to its Graph API error.
+
+    Example:
+        ```python
+        results = get_campaign_insights_batch(
+            campaign_ids=["23843xxxxx1", "23843xxxxx2"],
+            fields=["campaign_name", "impressions", "spend"],
+            date_preset="last_7d"
+        )
+        for campaign_id, insights in results["data"].items():
+            print(campaign_id, insights["data"])
+        ```
+    """
+    params = _build_insights_params(
+        params={},
+        fields=fields,
+        date_preset=date_preset,
+        time_range=time_range,
+        time_increment=time_increment,
+        level=level if level else 'campaign',
+        action_attribution_windows=action_attribution_windows,
+        action_breakdowns=action_breakdowns,
+        breakdowns=breakdowns,
+        use_unified_attribution_setting=use_unified_attribution_setting,
+        filtering=filtering,
+        limit=limit
+    )
+    sub_requests = [_batch_sub_request(f"{campaign_id}/insights", params) for campaign_id in campaign_ids]
+    results = await _execute_batch(sub_requests, access_token=access_token)
+    demuxed = _demux_batch_results(campaign_ids, results)
+    token_params = {**params, 'access_token': _get_fb_access_token(access_token)}
+    for campaign_id, result in demuxed['data'].items():
+        await _ingest_insights(f"{FB_GRAPH_URL}/{campaign_id}/insights", token_params, result.get('data', []))
+    return demuxed
+
+
+@mcp.tool()
+@_instrument_tool
+async def batch_fetch_nodes(
+    ids: List[str],
+    fields: Optional[List[str]] = None,
+    date_format: Optional[str] = None,
+    access_token: str = ""
+) -> Dict:
+    """Fetches many Graph API objects (campaigns, ad sets, ads, creatives, ...) in batch calls.
+
+    Packs up to 50 node lookups into each Graph API batch request. Unlike the ids=
+    multi-get, the IDs may be of different object types, and an invalid ID only fails
+    its own entry.
+
+    Args:
+        ids (List[str]): The object IDs to fetch.
+        fields (Optional[List[str]]): Fields to retrieve for every object. Must be valid
+            for all requested object types (e.g. 'id', 'name', 'status').
+        date_format (Optional[str]): Format for date responses ('U', 'Y-m-d H:i:s', or None for ISO 8601).
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+
+    Returns:
+        Dict: 'data' maps each successfully fetched ID to its object, and 'errors' maps
+              each failed ID to its Graph API error.
+
+    Example:
+        ```python
+        nodes = batch_fetch_nodes(
+            ids=["23843211234567", "23843211234568"],
+            fields=["name", "status", "effective_status"]
+        )
+        ```
+    """
+    params = _prepare_params({}, fields=fields, date_format=date_format)
+    sub_requests = [_batch_sub_request(node_id, params) for node_id in ids]
+    results = await _execute_batch(sub_requests, access_token=access_token)
+    return _demux_batch_results(ids, results)
+
+
+# --- Async Insights Report Tools ---
+
+@mcp.tool()
+@_instrument_tool
+async def submit_insights_report(
+    object_id: str,
+    fields: Optional[List[str]] = None,
+    date_preset: str = 'last_30d',
+    time_range: Optional[Dict[str, str]] = None,
+    time_ranges: Optional[List[Dict[str, str]]] = None,
+    time_increment: str = 'all_days',
+    level: Optional[str] = None,
+    action_attribution_windows: Optional[List[str]] = None,
+    action_breakdowns: Optional[List[str]] = None,
+    action_report_time: Optional[str] = None,
+    breakdowns: Optional[List[str]] = None,
+    default_summary: bool = False,
+    use_account_attribution_setting: bool = False,
+    use_unified_attribution_setting: bool = True,
+    filtering: Optional[List[dict]] = None,
+    sort: Optional[str] = None,
+    locale: Optional[str] = None,
+    access_token: str = ""
+) -> Dict:
+    """Submits an asynchronous insights report job for an ad account, campaign, ad set or ad.
+
+    Use this instead of get_adaccount_insights for heavy reports (e.g. level='ad' with
+    breakdowns and time_increment=1 over 'last_90d') that time out when fetched
+    synchronously. The job runs on Facebook's side; poll it with get_insights_report_status
+    and read the rows with fetch_insights_report.
+
+    Args:
+        object_id (str): The ad account ('act_...'), campaign, ad set or ad ID to report on.
+        fields, date_preset, time_range, time_ranges, time_increment, level,
+        action_attribution_windows, action_breakdowns, action_report_time, breakdowns,
+        default_summary, use_account_attribution_setting, use_unified_attribution_setting,
+        filtering, sort, locale: Same meaning and defaults as in get_adaccount_insights.
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+
+    Returns:
+        Dict: A dictionary containing the 'report_run_id' of the submitted job.
+
+    Example:
+        ```python
+        job = submit_insights_report(
+            object_id="act_123456789",
+            fields=["ad_name", "impressions", "spend", "actions"],
+            level="ad",
+            breakdowns=["age", "gender"],
+            time_increment="1",
+            date_preset="last_90d"
+        )
+        report = fetch_insights_report(report_run_id=job["report_run_id"])
+        ```
+    """
+    token = _get_fb_access_token(access_token)
+    url = f"{FB_GRAPH_URL}/{object_id}/insights"
+    params = {'access_token': token}
+
+    params = _build_insights_params(
+        params=params,
+        fields=fields,
+        date_preset=date_preset,
+        time_range=time_range,
+        time_ranges=time_ranges,
+        time_increment=time_increment,
+        level=level,
+        action_attribution_windows=action_attribution_windows,
+        action_breakdowns=action_breakdowns,
+        action_report_time=action_report_time,
+        breakdowns=breakdowns,
+        default_summary=default_summary,
+        use_account_attribution_setting=use_account_attribution_setting,
+        use_unified_attribution_setting=use_unified_attribution_setting,
+        filtering=filtering,
+        sort=sort,
+        locale=locale
+    )
+
+    return await _make_graph_api_call(url, params, method='POST')
+
+
+@mcp.tool()
+@_instrument_tool
+async def get_insights_report_status(report_run_id: str, access_token: str = "") -> Dict:
+    """Gets the status of an asynchronous insights report job.
+
+    Args:
+        report_run_id (str): The ID returned by submit_insights_report.
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+
+    Returns:
+        Dict: The job status, including 'async_status' ('Job Not Started', 'Job Started',
+              'Job Running', 'Job Completed', 'Job Failed', 'Job Skipped') and
+              'async_percent_completion'.
+    """
+    return await _fetch_node(report_run_id, access_token=access_token, fields=REPORT_STATUS_FIELDS)
+
+
+@mcp.tool()
+@_instrument_tool
+async def fetch_insights_report(
+    report_run_id: str,
+    wait: bool = True,
+    timeout_seconds: float = 600.0,
+    limit: Optional[int] = 500,
+    after: Optional[str] = None,
+    auto_paginate: bool = True,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    access_token: str = "",
+    ctx: Context = None
+) -> Dict:
+    """Fetches the rows of an asynchronous insights report job.
+
+    With wait=True the server polls the job with exponential backoff (reporting progress
+    to the client) until it completes, then reads the result pages. The rows have the
+    same shape as the synchronous insights tools return.
+
+    Args:
+        report_run_id (str): The ID returned by submit_insights_report.
+        wait (bool): If True, wait for the job to complete before fetching. If False and the
+            job isn't complete yet, the current status is returned instead. Default: True.
+        timeout_seconds (float): Maximum time to wait for the job. Default: 600.
+        limit (Optional[int]): Rows per result page. Default: 500.
+        after (Optional[str]): Pagination cursor to resume reading from.
+        auto_paginate (bool): If True, read every result page server-side and merge them
+            into one 'data' list, with page/row counts in 'pagination'. Default: True.
+        max_pages (Optional[int]): With auto_paginate, the maximum number of pages to fetch.
+        max_rows (Optional[int]): With auto_paginate, stop once this many rows are collected.
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+
+    Returns:
+        Dict: The report rows in 'data', plus 'pagination' (or 'paging' when auto_paginate
+              is False) and the final job status in 'report'. If wait is False and the job
+              is still running, only 'report' is returned.
+    """
+    async def report_status(status: Dict) -> None:
+        if ctx is not None:
+            await ctx.report_progress(status.get('async_percent_completion', 0), 100)
+
+    if wait:
+        status = await _wait_for_report(
+            report_run_id, access_token=access_token, timeout=timeout_seconds, on_status=report_status
+        )
+    else:
+        status = await _fetch_node(report_run_id, access_token=access_token, fields=REPORT_STATUS_FIELDS)
+        if status.get('async_status') != 'Job Completed':
+            return {'report': status}
+
+    token = _get_fb_access_token(access_token)
+    url = f"{FB_GRAPH_URL}/{report_run_id}/insights"
+    params = _prepare_params({'access_token': token}, limit=limit, after=after)
+
+    async def report_page(page: Dict, pages: int, rows: int) -> None:
+        if ctx is not None:
+            await ctx.report_progress(pages, max_pages)
+
+    if auto_paginate:
+        result = await _fetch_all_pages(url, params, max_pages=max_pages, max_rows=max_rows, on_page=report_page)
+    else:
+        result = await _make_graph_api_call(url, params)
+    await _ingest_insights(url, params, result.get('data', []))
+    result['report'] = status
+    return result
 
 
 @mcp.tool()
-def fetch_pagination_url(url: str) -> Dict:
+@_instrument_tool
+async def fetch_pagination_url(url: str, access_token: str = "") -> Dict:
     """Fetch data from a Facebook Graph API pagination URL
     
     Use this to get the next/previous page of results from an insights API call.
+    Listing tools also accept auto_paginate=True, which fetches every page
+    server-side in one call and is usually the better choice.
     
     Args:
         url: The complete pagination URL (e.g., from response['paging']['next'] or response['paging']['previous']).
-             It includes the necessary token and parameters.
+             It includes the necessary token and parameters. Only Graph API URLs are accepted.
+        access_token: Optional user-specific OAuth access token, used if the URL carries none
              
     Returns:
         The dictionary containing the next/previous page of results.
@@ -850,21 +4754,27 @@ def fetch_pagination_url(url: str) -> Dict:
             prev_page_data = fetch_pagination_url(url=initial_results["paging"]["previous"])
         ```
     """
-    # This function takes a full URL which already includes the access token,
-    # so we don't use the _make_graph_api_call helper here.
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.json()
+    # Over the network transports the URL comes from a remote client, so the server must
+    # never be made to fetch anything but the Graph API
+    parsed, graph = urlparse(url), urlparse(FB_GRAPH_URL)
+    if (parsed.scheme, parsed.netloc) != (graph.scheme, graph.netloc):
+        raise Exception(f"Only {graph.scheme}://{graph.netloc} pagination URLs can be fetched")
+    params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+    # A token in the URL is the client's own; otherwise the usual token rules apply
+    params['access_token'] = params.get('access_token') or _get_fb_access_token(access_token)
+    return await _request_graph_api(parsed._replace(query='', fragment='').geturl(), params)
 
 
 # --- Ad Creative Tools ---
 
 @mcp.tool()
-def get_ad_creative_by_id(
+@_instrument_tool
+async def get_ad_creative_by_id(
     creative_id: str, 
     fields: Optional[List[str]] = None,
     thumbnail_width: Optional[int] = None, 
-    thumbnail_height: Optional[int] = None
+    thumbnail_height: Optional[int] = None,
+    bypass_cache: bool = False
 ) -> Dict:
     """Retrieves detailed information about a specific Facebook ad creative.
 
@@ -916,6 +4826,8 @@ def get_ad_creative_by_id(
         
         thumbnail_width (Optional[int]): Width of the thumbnail in pixels. Default: 64.
         thumbnail_height (Optional[int]): Height of the thumbnail in pixels. Default: 64.
+        bypass_cache (bool): Skip the server's short-lived node cache and fetch fresh data
+            from the Graph API. Default False.
 
     Returns:
         Dict: A dictionary containing the requested ad creative details.
@@ -951,18 +4863,65 @@ def get_ad_creative_by_id(
     if thumbnail_height:
         params['thumbnail_height'] = thumbnail_height
     
-    return _make_graph_api_call(url, params)
+    return await _make_cached_graph_api_call(url, params, 'adcreative', bypass_cache)
+
+@mcp.tool()
+@_instrument_tool
+async def get_ad_creatives_by_ids(
+    creative_ids: List[str],
+    fields: Optional[List[str]] = None,
+    thumbnail_width: Optional[int] = None,
+    thumbnail_height: Optional[int] = None,
+    access_token: str = ""
+) -> Dict:
+    """Retrieves detailed information about multiple Facebook ad creatives by their IDs.
+
+    This tool retrieves many creatives with the Graph API's ids= multi-get, 50 IDs per
+    request with the requests sent concurrently, so any number of IDs can be passed.
+    An invalid ID is reported in 'errors' without failing the other creatives.
+
+    Args:
+        creative_ids (List[str]): A list of ad creative IDs to retrieve.
+        fields (Optional[List[str]]): A list of specific fields to retrieve for each creative.
+            If None, returns the default set of fields. See get_ad_creative_by_id for
+            a comprehensive list of available fields.
+        thumbnail_width (Optional[int]): Width of the thumbnail in pixels. Default: 64.
+        thumbnail_height (Optional[int]): Height of the thumbnail in pixels. Default: 64.
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+
+    Returns:
+        Dict: 'data' maps each creative ID to its details, and 'errors' maps each ID that
+              could not be fetched to its Graph API error.
+
+    Example:
+        ```python
+        creatives = get_ad_creatives_by_ids(
+            creative_ids=["23842312323312", "23842312323313"],
+            fields=["name", "status", "thumbnail_url"]
+        )
+        ```
+    """
+    return await _fetch_nodes_by_ids(
+        creative_ids, access_token=access_token, fields=fields,
+        thumbnail_width=thumbnail_width, thumbnail_height=thumbnail_height
+    )
 
 
 @mcp.tool()
-def get_ad_creatives_by_ad_id(
+@_instrument_tool
+async def get_ad_creatives_by_ad_id(
     ad_id: str,
     fields: Optional[List[str]] = None,
     limit: Optional[int] = 25,
     after: Optional[str] = None,
     before: Optional[str] = None,
     date_format: Optional[str] = None,
-    access_token: str = ""
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    access_token: str = "",
+    stream: bool = False,
+    ctx: Context = None
 ) -> Dict:
     """Retrieves the ad creatives associated with a specific Facebook ad.
     
@@ -1018,6 +4977,17 @@ def get_ad_creatives_by_ad_id(
             - 'U': Unix timestamp (seconds since epoch)
             - 'Y-m-d H:i:s': MySQL datetime format
             - None: ISO 8601 format (default)
+        auto_paginate (bool): If True, the server follows the 'paging' cursors itself and
+            returns every page merged into one 'data' list, with page/row counts in
+            'pagination'. No fetch_pagination_url round trips are needed. Default: False.
+        max_pages (Optional[int]): With auto_paginate, the maximum number of pages to fetch.
+            Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        max_rows (Optional[int]): With auto_paginate, stop once this many rows are collected.
+        stream (bool): If True, every page is sent to the client as soon as it arrives, as
+            NDJSON (one JSON row per line) in the message of an MCP progress notification,
+            instead of being collected into 'data'. Server memory stays bounded by one page
+            however large the listing is. Implies auto_paginate and requires the client to
+            send a progressToken with the call. Default: False.
     
     Returns:
         Dict: A dictionary containing the requested ad creatives. The main results are in the 'data'
@@ -1070,13 +5040,16 @@ def get_ad_creatives_by_ad_id(
     if date_format:
         params['date_format'] = date_format
     
-    return _make_graph_api_call(url, params)
+    return await _make_paginated_call(
+        url, params, auto_paginate, max_pages, max_rows, stream_ctx=ctx if stream else None
+    )
 
 
 # --- Ad Tools ---
 
 @mcp.tool()
-def get_ad_by_id(ad_id: str, fields: Optional[List[str]] = None) -> Dict:
+@_instrument_tool
+async def get_ad_by_id(ad_id: str, fields: Optional[List[str]] = None, bypass_cache: bool = False) -> Dict:
     """Retrieves detailed information about a specific Facebook ad by its ID.
     
     This function accesses the Facebook Graph API to retrieve information about a
@@ -1107,6 +5080,8 @@ def get_ad_by_id(ad_id: str, fields: Optional[List[str]] = None) -> Dict:
             - 'tracking_specs': The tracking specs for this ad
             - 'updated_time': When this ad was last updated
             - 'preview_shareable_link': Link for previewing this ad
+        bypass_cache (bool): Skip the server's short-lived node cache and fetch fresh data
+            from the Graph API. Default False.
     
     Returns:
         Dict: A dictionary containing the requested ad information.
@@ -1129,11 +5104,51 @@ def get_ad_by_id(ad_id: str, fields: Optional[List[str]] = None) -> Dict:
     if fields:
         params['fields'] = ','.join(fields)
     
-    return _make_graph_api_call(url, params)
+    return await _make_cached_graph_api_call(url, params, 'ad', bypass_cache)
+
+@mcp.tool()
+@_instrument_tool
+async def get_ads_by_ids(
+    ad_ids: List[str],
+    fields: Optional[List[str]] = None,
+    date_format: Optional[str] = None,
+    access_token: str = ""
+) -> Dict:
+    """Retrieves detailed information about multiple Facebook ads by their IDs.
+    
+    This function retrieves many ads with the Graph API's ids= multi-get, 50 IDs per
+    request with the requests sent concurrently, so any number of IDs can be passed.
+    An invalid ID is reported in 'errors' without failing the other ads.
+    
+    Args:
+        ad_ids (List[str]): A list of ad IDs to retrieve information for.
+        fields (Optional[List[str]]): A list of specific fields to retrieve for each ad.
+            If None, a default set of fields will be returned. See get_ad_by_id for
+            a comprehensive list of available fields.
+        date_format (Optional[str]): Format for date responses. Options:
+            - 'U': Unix timestamp (seconds since epoch)
+            - 'Y-m-d H:i:s': MySQL datetime format
+            - None: ISO 8601 format (default)
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+    
+    Returns:
+        Dict: 'data' maps each ad ID to its details, and 'errors' maps each ID that
+              could not be fetched to its Graph API error.
+    
+    Example:
+        ```python
+        ads = get_ads_by_ids(
+            ad_ids=["23843211234567", "23843211234568"],
+            fields=["name", "adset_id", "effective_status", "creative"]
+        )
+        ```
+    """
+    return await _fetch_nodes_by_ids(ad_ids, access_token=access_token, fields=fields, date_format=date_format)
 
 
 @mcp.tool()
-def get_ads_by_adaccount(
+@_instrument_tool
+async def get_ads_by_adaccount(
     act_id: str,
     fields: Optional[List[str]] = None,
     filtering: Optional[List[dict]] = None,
@@ -1143,7 +5158,12 @@ def get_ads_by_adaccount(
     date_preset: Optional[str] = None,
     time_range: Optional[Dict[str, str]] = None,
     updated_since: Optional[int] = None,
-    effective_status: Optional[List[str]] = None
+    effective_status: Optional[List[str]] = None,
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    stream: bool = False,
+    ctx: Context = None
 ) -> Dict:
     """Retrieves ads from a specific Facebook ad account.
     
@@ -1186,6 +5206,17 @@ def get_ads_by_adaccount(
                                                'PENDING_REVIEW', 'DISAPPROVED', 'PREAPPROVED', 
                                                'PENDING_BILLING_INFO', 'CAMPAIGN_PAUSED', 'ARCHIVED', 
                                                'ADSET_PAUSED', 'IN_PROCESS', 'WITH_ISSUES'.
+        auto_paginate (bool): If True, the server follows the 'paging' cursors itself and
+            returns every page merged into one 'data' list, with page/row counts in
+            'pagination'. No fetch_pagination_url round trips are needed. Default: False.
+        max_pages (Optional[int]): With auto_paginate, the maximum number of pages to fetch.
+            Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        max_rows (Optional[int]): With auto_paginate, stop once this many rows are collected.
+        stream (bool): If True, every page is sent to the client as soon as it arrives, as
+            NDJSON (one JSON row per line) in the message of an MCP progress notification,
+            instead of being collected into 'data'. Server memory stays bounded by one page
+            however large the listing is. Implies auto_paginate and requires the client to
+            send a progressToken with the call. Default: False.
     
     Returns:
         Dict: A dictionary containing the requested ads. The main results are in the 'data'
@@ -1246,18 +5277,26 @@ def get_ads_by_adaccount(
     if effective_status:
         params['effective_status'] = json.dumps(effective_status)
     
-    return _make_graph_api_call(url, params)
+    return await _make_paginated_call(
+        url, params, auto_paginate, max_pages, max_rows, stream_ctx=ctx if stream else None
+    )
 
 
 @mcp.tool()
-def get_ads_by_campaign(
+@_instrument_tool
+async def get_ads_by_campaign(
     campaign_id: str,
     fields: Optional[List[str]] = None,
     filtering: Optional[List[dict]] = None,
     limit: Optional[int] = 25,
     after: Optional[str] = None,
     before: Optional[str] = None,
-    effective_status: Optional[List[str]] = None
+    effective_status: Optional[List[str]] = None,
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    stream: bool = False,
+    ctx: Context = None
 ) -> Dict:
     """Retrieves ads associated with a specific Facebook campaign.
     
@@ -1290,6 +5329,17 @@ def get_ads_by_campaign(
                                                'PENDING_REVIEW', 'DISAPPROVED', 'PREAPPROVED',
                                                'PENDING_BILLING_INFO', 'ADSET_PAUSED', 'ARCHIVED',
                                                'IN_PROCESS', 'WITH_ISSUES'.
+        auto_paginate (bool): If True, the server follows the 'paging' cursors itself and
+            returns every page merged into one 'data' list, with page/row counts in
+            'pagination'. No fetch_pagination_url round trips are needed. Default: False.
+        max_pages (Optional[int]): With auto_paginate, the maximum number of pages to fetch.
+            Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        max_rows (Optional[int]): With auto_paginate, stop once this many rows are collected.
+        stream (bool): If True, every page is sent to the client as soon as it arrives, as
+            NDJSON (one JSON row per line) in the message of an MCP progress notification,
+            instead of being collected into 'data'. Server memory stays bounded by one page
+            however large the listing is. Implies auto_paginate and requires the client to
+            send a progressToken with the call. Default: False.
     
     Returns:
         Dict: A dictionary containing the requested ads. The main results are in the 'data'
@@ -1341,11 +5391,14 @@ def get_ads_by_campaign(
     if effective_status:
         params['effective_status'] = json.dumps(effective_status)
     
-    return _make_graph_api_call(url, params)
+    return await _make_paginated_call(
+        url, params, auto_paginate, max_pages, max_rows, stream_ctx=ctx if stream else None
+    )
 
 
 @mcp.tool()
-def get_ads_by_adset(
+@_instrument_tool
+async def get_ads_by_adset(
     adset_id: str,
     fields: Optional[List[str]] = None,
     filtering: Optional[List[dict]] = None,
@@ -1353,7 +5406,12 @@ def get_ads_by_adset(
     after: Optional[str] = None,
     before: Optional[str] = None,
     effective_status: Optional[List[str]] = None,
-    date_format: Optional[str] = None
+    date_format: Optional[str] = None,
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    stream: bool = False,
+    ctx: Context = None
 ) -> Dict:
     """Retrieves ads associated with a specific Facebook ad set.
     
@@ -1383,6 +5441,17 @@ def get_ads_by_adset(
                                     - 'U': Unix timestamp (seconds since epoch)
                                     - 'Y-m-d H:i:s': MySQL datetime format
                                     - None: ISO 8601 format (default)
+        auto_paginate (bool): If True, the server follows the 'paging' cursors itself and
+            returns every page merged into one 'data' list, with page/row counts in
+            'pagination'. No fetch_pagination_url round trips are needed. Default: False.
+        max_pages (Optional[int]): With auto_paginate, the maximum number of pages to fetch.
+            Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        max_rows (Optional[int]): With auto_paginate, stop once this many rows are collected.
+        stream (bool): If True, every page is sent to the client as soon as it arrives, as
+            NDJSON (one JSON row per line) in the message of an MCP progress notification,
+            instead of being collected into 'data'. Server memory stays bounded by one page
+            however large the listing is. Implies auto_paginate and requires the client to
+            send a progressToken with the call. Default: False.
     
     Returns:
         Dict: A dictionary containing the requested ads. The main results are in the 'data'
@@ -1444,13 +5513,16 @@ def get_ads_by_adset(
     if date_format:
         params['date_format'] = date_format
     
-    return _make_graph_api_call(url, params)
+    return await _make_paginated_call(
+        url, params, auto_paginate, max_pages, max_rows, stream_ctx=ctx if stream else None
+    )
 
 
 # --- Ad Set Tools ---
 
 @mcp.tool()
-def get_adset_by_id(adset_id: str, fields: Optional[List[str]] = None) -> Dict:
+@_instrument_tool
+async def get_adset_by_id(adset_id: str, fields: Optional[List[str]] = None, bypass_cache: bool = False) -> Dict:
     """Retrieves detailed information about a specific Facebook ad set by its ID.
     
     This function accesses the Facebook Graph API to retrieve information about a
@@ -1506,6 +5578,8 @@ def get_adset_by_id(adset_id: str, fields: Optional[List[str]] = None) -> Dict:
             - 'time_based_ad_rotation_intervals': Time-based ad rotation intervals in seconds
             - 'updated_time': When this ad set was last updated
             - 'use_new_app_click': Whether to use the newer app click tracking
+        bypass_cache (bool): Skip the server's short-lived node cache and fetch fresh data
+            from the Graph API. Default False.
     
     Returns:
         Dict: A dictionary containing the requested ad set information.
@@ -1534,19 +5608,22 @@ def get_adset_by_id(adset_id: str, fields: Optional[List[str]] = None) -> Dict:
     if fields:
         params['fields'] = ','.join(fields)
     
-    return _make_graph_api_call(url, params)
+    return await _make_cached_graph_api_call(url, params, 'adset', bypass_cache)
 
 
 @mcp.tool()
-def get_adsets_by_ids(
+@_instrument_tool
+async def get_adsets_by_ids(
     adset_ids: List[str],
     fields: Optional[List[str]] = None,
-    date_format: Optional[str] = None
+    date_format: Optional[str] = None,
+    access_token: str = ""
 ) -> Dict:
     """Retrieves detailed information about multiple Facebook ad sets by their IDs.
     
-    This function allows batch retrieval of multiple ad sets in a single API call,
-    improving efficiency when you need data for several ad sets.
+    This function retrieves many ad sets with the Graph API's ids= multi-get, 50 IDs per
+    request with the requests sent concurrently, so any number of IDs can be passed.
+    An ad set that can't be fetched is reported under 'errors' without failing the others.
     
     Args:
         adset_ids (List[str]): A list of ad set IDs to retrieve information for.
@@ -1557,10 +5634,12 @@ def get_adsets_by_ids(
             - 'U': Unix timestamp (seconds since epoch)
             - 'Y-m-d H:i:s': MySQL datetime format
             - None: ISO 8601 format (default)
+        access_token (str): Optional user-specific OAuth access token for multi-user support
     
     Returns:
         Dict: A dictionary where keys are the ad set IDs and values are the
-              corresponding ad set details.
+              corresponding ad set details. If some ad sets could not be fetched,
+              an 'errors' key maps each of their IDs to its Graph API error.
     
     Example:
         ```python
@@ -1576,24 +5655,17 @@ def get_adsets_by_ids(
             print(adsets["23843211234567"]["name"])
         ```
     """
-    access_token = _get_fb_access_token()
-    url = f"{FB_GRAPH_URL}/"
-    params = {
-        'access_token': access_token,
-        'ids': ','.join(adset_ids)
-    }
-    
-    if fields:
-        params['fields'] = ','.join(fields)
-        
-    if date_format:
-        params['date_format'] = date_format
-    
-    return _make_graph_api_call(url, params)
+    result = await _fetch_nodes_by_ids(adset_ids, access_token=access_token, fields=fields, date_format=date_format)
+    # Keeps the original ID-keyed response; 'errors' only appears when some IDs failed
+    adsets = dict(result['data'])
+    if result['errors']:
+        adsets['errors'] = result['errors']
+    return adsets
 
 
 @mcp.tool()
-def get_adsets_by_adaccount(
+@_instrument_tool
+async def get_adsets_by_adaccount(
     act_id: str,
     fields: Optional[List[str]] = None,
     filtering: Optional[List[dict]] = None,
@@ -1604,7 +5676,12 @@ def get_adsets_by_adaccount(
     time_range: Optional[Dict[str, str]] = None,
     updated_since: Optional[int] = None,
     effective_status: Optional[List[str]] = None,
-    date_format: Optional[str] = None
+    date_format: Optional[str] = None,
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    stream: bool = False,
+    ctx: Context = None
 ) -> Dict:
     """Retrieves ad sets from a specific Facebook ad account.
     
@@ -1645,6 +5722,17 @@ def get_adsets_by_adaccount(
                                     - 'U': Unix timestamp (seconds since epoch)
                                     - 'Y-m-d H:i:s': MySQL datetime format
                                     - None: ISO 8601 format (default)
+        auto_paginate (bool): If True, the server follows the 'paging' cursors itself and
+            returns every page merged into one 'data' list, with page/row counts in
+            'pagination'. No fetch_pagination_url round trips are needed. Default: False.
+        max_pages (Optional[int]): With auto_paginate, the maximum number of pages to fetch.
+            Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        max_rows (Optional[int]): With auto_paginate, stop once this many rows are collected.
+        stream (bool): If True, every page is sent to the client as soon as it arrives, as
+            NDJSON (one JSON row per line) in the message of an MCP progress notification,
+            instead of being collected into 'data'. Server memory stays bounded by one page
+            however large the listing is. Implies auto_paginate and requires the client to
+            send a progressToken with the call. Default: False.
     
     Returns:
         Dict: A dictionary containing the requested ad sets. The main results are in the 'data'
@@ -1716,11 +5804,14 @@ def get_adsets_by_adaccount(
     if date_format:
         params['date_format'] = date_format
     
-    return _make_graph_api_call(url, params)
+    return await _make_paginated_call(
+        url, params, auto_paginate, max_pages, max_rows, stream_ctx=ctx if stream else None
+    )
 
 
 @mcp.tool()
-def get_adsets_by_campaign(
+@_instrument_tool
+async def get_adsets_by_campaign(
     campaign_id: str,
     fields: Optional[List[str]] = None,
     filtering: Optional[List[dict]] = None,
@@ -1728,7 +5819,12 @@ def get_adsets_by_campaign(
     after: Optional[str] = None,
     before: Optional[str] = None,
     effective_status: Optional[List[str]] = None,
-    date_format: Optional[str] = None
+    date_format: Optional[str] = None,
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    stream: bool = False,
+    ctx: Context = None
 ) -> Dict:
     """Retrieves ad sets associated with a specific Facebook campaign.
     
@@ -1758,6 +5854,17 @@ def get_adsets_by_campaign(
                                     - 'U': Unix timestamp (seconds since epoch)
                                     - 'Y-m-d H:i:s': MySQL datetime format
                                     - None: ISO 8601 format (default)
+        auto_paginate (bool): If True, the server follows the 'paging' cursors itself and
+            returns every page merged into one 'data' list, with page/row counts in
+            'pagination'. No fetch_pagination_url round trips are needed. Default: False.
+        max_pages (Optional[int]): With auto_paginate, the maximum number of pages to fetch.
+            Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        max_rows (Optional[int]): With auto_paginate, stop once this many rows are collected.
+        stream (bool): If True, every page is sent to the client as soon as it arrives, as
+            NDJSON (one JSON row per line) in the message of an MCP progress notification,
+            instead of being collected into 'data'. Server memory stays bounded by one page
+            however large the listing is. Implies auto_paginate and requires the client to
+            send a progressToken with the call. Default: False.
     
     Returns:
         Dict: A dictionary containing the requested ad sets. The main results are in the 'data'
@@ -1823,15 +5930,19 @@ def get_adsets_by_campaign(
     if date_format:
         params['date_format'] = date_format
     
-    return _make_graph_api_call(url, params)
+    return await _make_paginated_call(
+        url, params, auto_paginate, max_pages, max_rows, stream_ctx=ctx if stream else None
+    )
 
 
 # --- Campaign Tools ---
 @mcp.tool()
-def get_campaign_by_id(
+@_instrument_tool
+async def get_campaign_by_id(
     campaign_id: str, 
     fields: Optional[List[str]] = None,
-    date_format: Optional[str] = None
+    date_format: Optional[str] = None,
+    bypass_cache: bool = False
 ) -> Dict:
     """Retrieves detailed information about a specific Facebook ad campaign by its ID.
     
@@ -1896,6 +6007,8 @@ def get_campaign_by_id(
             - 'U': Unix timestamp (seconds since epoch)
             - 'Y-m-d H:i:s': MySQL datetime format
             - None: ISO 8601 format (default)
+        bypass_cache (bool): Skip the server's short-lived node cache and fetch fresh data
+            from the Graph API. Default False.
     
     Returns:
         Dict: A dictionary containing the requested campaign information.
@@ -1928,10 +6041,52 @@ def get_campaign_by_id(
     if date_format:
         params['date_format'] = date_format
     
-    return _make_graph_api_call(url, params)
+    return await _make_cached_graph_api_call(url, params, 'campaign', bypass_cache)
+
+@mcp.tool()
+@_instrument_tool
+async def get_campaigns_by_ids(
+    campaign_ids: List[str],
+    fields: Optional[List[str]] = None,
+    date_format: Optional[str] = None,
+    access_token: str = ""
+) -> Dict:
+    """Retrieves detailed information about multiple Facebook ad campaigns by their IDs.
+    
+    This function retrieves many campaigns with the Graph API's ids= multi-get, 50 IDs per
+    request with the requests sent concurrently, so any number of IDs can be passed.
+    An invalid ID is reported in 'errors' without failing the other campaigns.
+    
+    Args:
+        campaign_ids (List[str]): A list of campaign IDs to retrieve information for.
+        fields (Optional[List[str]]): A list of specific fields to retrieve for each campaign.
+            If None, a default set of fields will be returned. See get_campaign_by_id for
+            a comprehensive list of available fields.
+        date_format (Optional[str]): Format for date responses. Options:
+            - 'U': Unix timestamp (seconds since epoch)
+            - 'Y-m-d H:i:s': MySQL datetime format
+            - None: ISO 8601 format (default)
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+    
+    Returns:
+        Dict: 'data' maps each campaign ID to its details, and 'errors' maps each ID that
+              could not be fetched to its Graph API error.
+    
+    Example:
+        ```python
+        campaigns = get_campaigns_by_ids(
+            campaign_ids=["23843211234567", "23843211234568"],
+            fields=["name", "objective", "effective_status", "daily_budget"]
+        )
+        for campaign_id, campaign in campaigns["data"].items():
+            print(campaign_id, campaign["name"])
+        ```
+    """
+    return await _fetch_nodes_by_ids(campaign_ids, access_token=access_token, fields=fields, date_format=date_format)
 
 @mcp.tool()
-def get_campaigns_by_adaccount(
+@_instrument_tool
+async def get_campaigns_by_adaccount(
     act_id: str,
     fields: Optional[List[str]] = None,
     filtering: Optional[List[dict]] = None,
@@ -1948,7 +6103,12 @@ def get_campaigns_by_adaccount(
     buyer_guarantee_agreement_status: Optional[List[str]] = None,
     date_format: Optional[str] = None,
     include_drafts: Optional[bool] = None,
-    access_token: str = ""
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    access_token: str = "",
+    stream: bool = False,
+    ctx: Context = None
 ) -> Dict:
     """Retrieves campaigns from a specific Facebook ad account.
     
@@ -2003,6 +6163,17 @@ def get_campaigns_by_adaccount(
                                     - 'Y-m-d H:i:s': MySQL datetime format
                                     - None: ISO 8601 format (default)
         include_drafts (Optional[bool]): If True, includes draft campaigns in the results.
+        auto_paginate (bool): If True, the server follows the 'paging' cursors itself and
+            returns every page merged into one 'data' list, with page/row counts in
+            'pagination'. No fetch_pagination_url round trips are needed. Default: False.
+        max_pages (Optional[int]): With auto_paginate, the maximum number of pages to fetch.
+            Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        max_rows (Optional[int]): With auto_paginate, stop once this many rows are collected.
+        stream (bool): If True, every page is sent to the client as soon as it arrives, as
+            NDJSON (one JSON row per line) in the message of an MCP progress notification,
+            instead of being collected into 'data'. Server memory stays bounded by one page
+            however large the listing is. Implies auto_paginate and requires the client to
+            send a progressToken with the call. Default: False.
     
     Returns:
         Dict: A dictionary containing the requested campaigns. The main results are in the 'data'
@@ -2096,12 +6267,110 @@ def get_campaigns_by_adaccount(
     if include_drafts is not None:
         params['include_drafts'] = include_drafts
     
-    return _make_graph_api_call(url, params)
+    return await _make_paginated_call(
+        url, params, auto_paginate, max_pages, max_rows, stream_ctx=ctx if stream else None
+    )
+
+# --- Account Hierarchy Tools ---
+
+@mcp.tool()
+@_instrument_tool
+async def get_account_hierarchy(
+    act_id: str,
+    campaign_fields: Optional[List[str]] = None,
+    adset_fields: Optional[List[str]] = None,
+    ad_fields: Optional[List[str]] = None,
+    creative_fields: Optional[List[str]] = None,
+    include_ads: bool = True,
+    include_creatives: bool = True,
+    effective_status: Optional[List[str]] = None,
+    page_size: int = 25,
+    sub_limit: int = 50,
+    max_pages: Optional[int] = None,
+    access_token: str = ""
+) -> Dict:
+    """Retrieves an ad account's campaign -> ad set -> ad -> creative tree in a handful of requests.
+
+    Instead of calling get_campaigns_by_adaccount, then get_adsets_by_campaign per campaign,
+    get_ads_by_adset per ad set and get_ad_creatives_by_ad_id per ad, this tool requests
+    campaigns with nested field expansion (campaigns{adsets{ads{creative{...}}}}). Nested
+    lists that exceed their page size are completed with follow-up requests for just those
+    parents, so the whole tree typically costs a few requests rather than one per ad.
+
+    Args:
+        act_id (str): The ID of the ad account, prefixed with 'act_', e.g. 'act_1234567890'.
+        campaign_fields (Optional[List[str]]): Fields for each campaign. Default: id, name, status,
+            effective_status, objective, daily_budget, lifetime_budget.
+        adset_fields (Optional[List[str]]): Fields for each ad set. Default: id, name, status,
+            effective_status, daily_budget, lifetime_budget, optimization_goal, billing_event.
+        ad_fields (Optional[List[str]]): Fields for each ad. Default: id, name, status, effective_status.
+        creative_fields (Optional[List[str]]): Fields for each ad's creative. Default: id, name,
+            title, body, thumbnail_url, call_to_action_type.
+        include_ads (bool): Include ads under each ad set. Default: True.
+        include_creatives (bool): Include each ad's creative (requires include_ads). Default: True.
+        effective_status (Optional[List[str]]): Only include objects with these effective statuses
+            at every level, e.g. ['ACTIVE', 'PAUSED'].
+        page_size (int): Campaigns per top-level page. Lower it if Graph asks to reduce the amount
+            of data requested. Default: 25.
+        sub_limit (int): Page size of the nested ad set and ad lists. Default: 50.
+        max_pages (Optional[int]): Maximum pages followed for the campaign list and for each
+            nested list. Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+
+    Returns:
+        Dict: 'account_id', a 'campaigns' list in which every campaign has an 'adsets' list,
+              every ad set an 'ads' list and every ad a 'creative' object, and a 'summary'
+              with object counts, the number of Graph 'requests' made and whether the tree is
+              'complete' (False if a page limit or the tool deadline cut a list short).
+
+    Example:
+        ```python
+        tree = get_account_hierarchy(
+            act_id="act_123456789",
+            effective_status=["ACTIVE"],
+            ad_fields=["id", "name", "effective_status"]
+        )
+        for campaign in tree["campaigns"]:
+            for adset in campaign["adsets"]:
+                print(campaign["name"], adset["name"], len(adset["ads"]))
+        ```
+    """
+    token = _get_fb_access_token(access_token)
+    levels = [
+        ('campaigns', _with_id(campaign_fields or DEFAULT_HIERARCHY_CAMPAIGN_FIELDS)),
+        ('adsets', _with_id(adset_fields or DEFAULT_HIERARCHY_ADSET_FIELDS))
+    ]
+    if include_ads:
+        levels.append(('ads', _with_id(ad_fields or DEFAULT_HIERARCHY_AD_FIELDS)))
+    leaf_fields = (creative_fields or DEFAULT_HIERARCHY_CREATIVE_FIELDS) if include_ads and include_creatives else None
+    planned_fields = _plan_hierarchy_fields(levels, leaf_fields, sub_limit, effective_status)
+
+    params = _prepare_params(
+        {'access_token': token, 'limit': page_size},
+        fields=planned_fields[0], effective_status=effective_status
+    )
+    campaigns = await _fetch_all_pages(f"{FB_GRAPH_URL}/{act_id}/campaigns", params, max_pages=max_pages)
+    nested = await _complete_nested_edges(
+        campaigns['data'], levels[1:], planned_fields[1:], token, sub_limit,
+        effective_status=effective_status, max_pages=max_pages
+    )
+
+    adsets = [adset for campaign in campaigns['data'] for adset in campaign['adsets']]
+    summary = {
+        'campaigns': len(campaigns['data']),
+        'adsets': len(adsets),
+        'requests': campaigns['pagination']['pages'] + nested['requests'],
+        'complete': campaigns['pagination']['complete'] and nested['complete']
+    }
+    if include_ads:
+        summary['ads'] = sum(len(adset['ads']) for adset in adsets)
+    return {'account_id': act_id, 'campaigns': campaigns['data'], 'summary': summary}
 
 # --- Activity Tools ---
 
 @mcp.tool()
-def get_activities_by_adaccount(
+@_instrument_tool
+async def get_activities_by_adaccount(
     act_id: str,
     fields: Optional[List[str]] = None,
     limit: Optional[int] = None,
@@ -2109,7 +6378,12 @@ def get_activities_by_adaccount(
     before: Optional[str] = None,
     time_range: Optional[Dict[str, str]] = None,
     since: Optional[str] = None,
-    until: Optional[str] = None
+    until: Optional[str] = None,
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    stream: bool = False,
+    ctx: Context = None
 ) -> Dict:
     """Retrieves activities for a Facebook ad account.
     
@@ -2151,6 +6425,17 @@ def get_activities_by_adaccount(
             of the time range for returned activities. Ignored if 'time_range' is provided.
         until (Optional[str]): End date in YYYY-MM-DD format. Defines the end 
             of the time range for returned activities. Ignored if 'time_range' is provided.
+        auto_paginate (bool): If True, the server follows the 'paging' cursors itself and
+            returns every page merged into one 'data' list, with page/row counts in
+            'pagination'. No fetch_pagination_url round trips are needed. Default: False.
+        max_pages (Optional[int]): With auto_paginate, the maximum number of pages to fetch.
+            Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        max_rows (Optional[int]): With auto_paginate, stop once this many rows are collected.
+        stream (bool): If True, every page is sent to the client as soon as it arrives, as
+            NDJSON (one JSON row per line) in the message of an MCP progress notification,
+            instead of being collected into 'data'. Server memory stays bounded by one page
+            however large the listing is. Implies auto_paginate and requires the client to
+            send a progressToken with the call. Default: False.
     
     Returns:
         Dict: A dictionary containing the requested activities. The main results are in the 'data'
@@ -2217,13 +6502,16 @@ def get_activities_by_adaccount(
         if until:
             params['until'] = until
     
-    return _make_graph_api_call(url, params)
+    return await _make_paginated_call(
+        url, params, auto_paginate, max_pages, max_rows, stream_ctx=ctx if stream else None
+    )
 
 
 
 
 @mcp.tool()
-def get_activities_by_adset(
+@_instrument_tool
+async def get_activities_by_adset(
     adset_id: str,
     fields: Optional[List[str]] = None,
     limit: Optional[int] = None,
@@ -2231,7 +6519,12 @@ def get_activities_by_adset(
     before: Optional[str] = None,
     time_range: Optional[Dict[str, str]] = None,
     since: Optional[str] = None,
-    until: Optional[str] = None
+    until: Optional[str] = None,
+    auto_paginate: bool = False,
+    max_pages: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    stream: bool = False,
+    ctx: Context = None
 ) -> Dict:
     """Retrieves activities for a Facebook ad set.
     
@@ -2271,6 +6564,17 @@ def get_activities_by_adset(
             of the time range for returned activities. Ignored if 'time_range' is provided.
         until (Optional[str]): End date in YYYY-MM-DD format. Defines the end 
             of the time range for returned activities. Ignored if 'time_range' is provided.
+        auto_paginate (bool): If True, the server follows the 'paging' cursors itself and
+            returns every page merged into one 'data' list, with page/row counts in
+            'pagination'. No fetch_pagination_url round trips are needed. Default: False.
+        max_pages (Optional[int]): With auto_paginate, the maximum number of pages to fetch.
+            Default: 100 (FB_AUTO_PAGINATE_MAX_PAGES).
+        max_rows (Optional[int]): With auto_paginate, stop once this many rows are collected.
+        stream (bool): If True, every page is sent to the client as soon as it arrives, as
+            NDJSON (one JSON row per line) in the message of an MCP progress notification,
+            instead of being collected into 'data'. Server memory stays bounded by one page
+            however large the listing is. Implies auto_paginate and requires the client to
+            send a progressToken with the call. Default: False.
     
     Returns:
         Dict: A dictionary containing the requested activities. The main results are in the 'data'
@@ -2328,10 +6632,478 @@ def get_activities_by_adset(
         if until:
             params['until'] = until
     
-    return _make_graph_api_call(url, params)
+    return await _make_paginated_call(
+        url, params, auto_paginate, max_pages, max_rows, stream_ctx=ctx if stream else None
+    )
+
+
+# --- Result Store Tools ---
+
+@mcp.tool()
+@_instrument_tool
+async def read_result_page(
+    result_handle: str,
+    offset: int = 0,
+    limit: int = 100,
+    access_token: str = ""
+) -> Dict:
+    """Reads a slice of rows from a large result kept in the server-side result store.
+
+    Tool results too large to return inline (above FB_RESULT_SPILL_BYTES of JSON) are
+    stored on the server and returned as a summary with a 'result_handle', the rows'
+    'schema' and a 'preview'. Use this tool to page through the stored rows, or
+    query_result to filter, sort and aggregate them without reading them all.
+
+    Args:
+        result_handle (str): The 'result_handle' from the summary of the original tool call.
+        offset (int): Index of the first row to return. Default: 0.
+        limit (int): Number of rows to return, at most 500. Default: 100.
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+
+    Returns:
+        Dict: The rows in 'data' (or 'columns' and 'rows' if the original call used
+              compact=True), 'offset', 'total_rows' and 'next_offset' (None after the last page).
+
+    Example:
+        ```python
+        summary = get_ads_by_adaccount(act_id="act_123456789", auto_paginate=True)
+        page = read_result_page(result_handle=summary["result_handle"], offset=0, limit=200)
+        ```
+    """
+    store = _get_result_store()
+    entry = await asyncio.to_thread(store.get, _token_namespace(_get_fb_access_token(access_token)), result_handle)
+    total = len(entry['offsets']) - 1
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), RESULT_PAGE_MAX_ROWS)
+    rows = await asyncio.to_thread(store.read_rows, entry, offset, offset + limit)
+    result = {'columns': entry['columns'], 'rows': rows} if entry['columns'] is not None else {'data': rows}
+    result.update({
+        'offset': offset,
+        'total_rows': total,
+        'next_offset': offset + limit if offset + limit < total else None
+    })
+    return result
+
+
+@mcp.tool()
+@_instrument_tool
+async def query_result(
+    result_handle: str,
+    filtering: Optional[List[dict]] = None,
+    fields: Optional[List[str]] = None,
+    sort_by: Optional[str] = None,
+    descending: bool = True,
+    group_by: Optional[List[str]] = None,
+    metrics: Optional[List[str]] = None,
+    derived: Optional[List[str]] = None,
+    offset: int = 0,
+    limit: int = 100,
+    access_token: str = ""
+) -> Dict:
+    """Filters, sorts or aggregates a large result kept in the server-side result store.
+
+    Works on the rows behind a 'result_handle' returned in place of an oversized tool
+    result, so a question like "the 10 ads with the highest spend" or "spend per
+    campaign" is answered without reading every row into the conversation.
+
+    Args:
+        result_handle (str): The 'result_handle' from the summary of the original tool call.
+        filtering (Optional[List[dict]]): Conditions every returned row must meet, in the Graph
+            API's filtering format: {'field': ..., 'operator': ..., 'value': ...}. Operators:
+            'EQUAL', 'NOT_EQUAL', 'GREATER_THAN', 'GREATER_THAN_OR_EQUAL', 'LESS_THAN',
+            'LESS_THAN_OR_EQUAL', 'IN', 'NOT_IN', 'CONTAIN', 'NOT_CONTAIN' (case-insensitive).
+            Numeric strings compare as numbers. Fields may be dotted paths ('creative.id')
+            or one action type of an action list ('actions:purchase').
+        fields (Optional[List[str]]): Fields to return for each row, with the same path syntax
+            as 'filtering'. Default: all fields.
+        sort_by (Optional[str]): Field to sort matching rows by. Missing values sort last.
+        descending (bool): Sort direction for returned rows (groups always sort descending). Default: True.
+        group_by (Optional[List[str]]): If given (or if 'metrics' is), aggregate the matching
+            rows as aggregate_insights does instead of returning them.
+        metrics (Optional[List[str]]): Metrics to sum per group when aggregating. Default:
+            spend, impressions, clicks.
+        derived (Optional[List[str]]): Weighted ratios to compute per group ('cpc', 'cpm', 'ctr',
+            'cpa', 'roas'). Default: none.
+        offset (int): Number of matching rows (or groups) to skip. Default: 0.
+        limit (int): Maximum rows (or groups) to return, at most 500. Default: 100.
+        access_token (str): Optional user-specific OAuth access token for multi-user support
+
+    Returns:
+        Dict: Matching rows in 'data' with 'total_matches', 'offset' and 'next_offset'; or,
+              when aggregating, 'columns', 'rows', 'totals', 'groups', 'input_rows', and
+              'total_groups', 'offset' and 'next_offset' for paging through the groups.
+              'next_offset' is null on the last page.
+
+    Example:
+        ```python
+        # Top 10 ads by spend among those with at least one purchase
+        query_result(
+            result_handle=summary["result_handle"],
+            filtering=[{'field': 'actions:purchase', 'operator': 'GREATER_THAN', 'value': 0}],
+            fields=['ad_id', 'ad_name', 'spend'],
+            sort_by='spend',
+            limit=10
+        )
+        ```
+    """
+    for condition in filtering or []:
+        if condition.get('operator') not in RESULT_FILTER_OPERATORS or 'field' not in condition:
+            raise Exception(f"Each filter needs a 'field' and an operator from {sorted(RESULT_FILTER_OPERATORS)}")
+    store = _get_result_store()
+    entry = await asyncio.to_thread(store.get, _token_namespace(_get_fb_access_token(access_token)), result_handle)
+    columns = entry['columns']
+    total = len(entry['offsets']) - 1
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), RESULT_PAGE_MAX_ROWS)
+
+    matches = []
+    for start in range(0, total, 1000):
+        for row in await asyncio.to_thread(store.read_rows, entry, start, start + 1000):
+            if columns is not None:
+                row = dict(zip(columns, row))
+            if isinstance(row, dict) and _matches_filters(row, filtering or []):
+                matches.append(row)
+
+    if group_by or metrics:
+        result = await asyncio.to_thread(
+            _aggregate_insights, matches, group_by or [], metrics or ['spend', 'impressions', 'clicks'],
+            derived or [], sort_by=sort_by, top_n=None
+        )
+        result['rows'] = result['rows'][offset:offset + limit]
+        return {
+            **result,
+            'total_groups': result['groups'],
+            'offset': offset,
+            'next_offset': offset + limit if offset + limit < result['groups'] else None
+        }
+
+    if sort_by:
+        matches.sort(key=lambda row: _sort_key(_row_value(row, sort_by)), reverse=descending)
+    page = matches[offset:offset + limit]
+    if fields:
+        page = [{field: _row_value(row, field) for field in fields} for row in page]
+    return {
+        'data': page,
+        'total_matches': len(matches),
+        'offset': offset,
+        'next_offset': offset + limit if offset + limit < len(matches) else None
+    }
+
+
+# --- Diagnostics Tools ---
+
+@mcp.tool()
+@_instrument_tool
+async def get_http_pool_stats() -> Dict:
+    """Reports connection pool statistics for the shared Graph API HTTP client.
+
+    Useful for monitoring whether keep-alive connections to graph.facebook.com
+    are being reused across tool calls and how many requests are in flight.
+
+    Returns:
+        Dict: A dictionary with the active pool 'settings' and counters for
+              'requests', 'in_flight', 'peak_in_flight', 'connections_opened',
+              'connections_reused', 'open_connections' and 'idle_connections'.
+    """
+    return _get_pool_stats()
+
+@mcp.tool()
+@_instrument_tool
+async def get_tool_metrics() -> Dict:
+    """Reports per-tool call metrics collected since the server started.
+
+    Returns:
+        Dict: A dictionary keyed by tool name, each entry holding 'calls', 'errors',
+              'errors_by_category' (transient, throttled, permanent, auth or other),
+              'graph_requests' (HTTP requests sent, including retries), 'retries',
+              'total_seconds', 'avg_seconds' and 'max_seconds'.
+    """
+    return {
+        name: {
+            **metrics,
+            'total_seconds': round(metrics['total_seconds'], 3),
+            'avg_seconds': round(metrics['total_seconds'] / metrics['calls'], 3) if metrics['calls'] else None,
+            'max_seconds': round(metrics['max_seconds'], 3)
+        }
+        for name, metrics in sorted(TOOL_METRICS.items())
+    }
+
+@mcp.tool()
+@_instrument_tool
+async def get_rate_limit_status() -> Dict:
+    """Reports current Graph API rate-limit usage as tracked by the server.
+
+    Usage is read from the X-App-Usage, X-Ad-Account-Usage, X-FB-Ads-Insights-Throttle
+    and X-Business-Use-Case-Usage headers of every response. Once a bucket passes the
+    pacing threshold the server spaces out calls in its scope, and while a bucket is
+    blocked (e.g. after error code 17 or 80004) calls wait for access to return, or
+    fail fast with a 'rate_limited' error (with 'retry_after_seconds') when that would
+    take longer than the configured maximum wait.
+
+    Returns:
+        Dict: A dictionary with the pacing 'settings', one entry per bucket under
+              'buckets' (keyed 'app:<token>', 'account:<token>:<act_id>',
+              'insights:<token>:<act_id>' or 'business:<token>:<business_id>:<type>',
+              where <token> is a short hash of the access token) holding 'usage_pct',
+              'regain_access_in_seconds', 'updated_seconds_ago' and the raw header
+              'details', plus 'paced_requests', 'paced_seconds', 'throttle_errors'
+              and 'rejected_requests' counters.
+    """
+    return _get_rate_limiter().get_status()
+
+@mcp.tool()
+@_instrument_tool
+async def get_circuit_breaker_status() -> Dict:
+    """Reports the state of the server's Graph API circuit breakers.
+
+    There is one breaker per endpoint family ('insights', 'edges', 'nodes', 'batch')
+    and access token. A breaker opens when too many recent requests fail with
+    transient, throttling or auth errors; while open, tools using that family fail
+    fast with a 'circuit_open' error instead of waiting on the Graph API. After a
+    cool-down it lets a probe request through (half-open) and closes again if the
+    probe succeeds.
+
+    Returns:
+        Dict: A dictionary with the breaker 'settings' and a 'breakers' list, each entry
+              holding 'family', 'token' (a short hash of the access token), 'state'
+              ('closed', 'open' or 'half_open'), 'window_requests', 'window_failures',
+              'error_rate', 'trips', 'rejected' and, while open, 'probe_in_seconds'.
+    """
+    return {
+        'settings': {
+            'error_rate': CIRCUIT_ERROR_RATE,
+            'min_requests': CIRCUIT_MIN_REQUESTS,
+            'window_seconds': CIRCUIT_WINDOW,
+            'open_seconds': CIRCUIT_OPEN_SECONDS,
+            'half_open_probes': CIRCUIT_HALF_OPEN_PROBES
+        },
+        'breakers': [breaker.get_status() for _, breaker in sorted(CIRCUIT_BREAKERS.items())]
+    }
+
+@mcp.tool()
+@_instrument_tool
+async def get_token_status(access_token: Optional[str] = None, refresh: bool = False) -> Dict:
+    """Reports what the server knows about an access token from debug_token.
+
+    Each token is validated once through the Graph API debug_token endpoint and the
+    result is reused for a while, so expired, invalid or under-scoped tokens are
+    rejected without sending the request. When the server-wide token is a user token
+    close to expiry, it is exchanged for a new long-lived token in the background if
+    FB_APP_ID and FB_APP_SECRET are set. Tokens sent by clients are never exchanged;
+    'refresh_due' tells the client to renew its own. The token itself is never
+    included in the result.
+
+    Args:
+        access_token (str): Meta API access token (optional - will use cached token if not provided).
+        refresh (bool): Validate the token again instead of using the cached result. Default False.
+
+    Returns:
+        Dict: A dictionary with 'token' (a short hash of the access token), 'verified'
+              (False if debug_token couldn't be reached), 'is_valid', 'type', 'app_id',
+              'user_id', 'scopes', 'expires_at' and 'data_access_expires_at' (ISO
+              timestamps, null if the token doesn't expire), 'error', 'problem' (why
+              requests with this token would be rejected, or null), 'refresh_due' (a user
+              token within the refresh window of expiry), 'refreshed' (whether a new
+              long-lived server-wide token has replaced it), 'checked_at', and the
+              registry 'settings' and 'stats'.
+
+    Example:
+        ```python
+        status = await get_token_status()
+        if status['problem']:
+            print(status['problem'])
+        ```
+    """
+    original_token = _get_fb_access_token(access_token)
+    registry = _get_token_registry()
+    token = registry.replacement_for(original_token) or original_token
+    info = await registry.get_info(token, force=refresh)
+    try:
+        registry.check(info)
+        problem = None
+    except GraphAPIError as e:
+        problem = e.payload['message']
+
+    def timestamp(value):
+        return datetime.fromtimestamp(value, timezone.utc).isoformat() if value else None
+
+    return {
+        'token': _token_namespace(token),
+        **{key: info.get(key) for key in ('verified', 'is_valid', 'type', 'app_id', 'user_id', 'scopes', 'error')},
+        'expires_at': timestamp(info.get('expires_at')),
+        'data_access_expires_at': timestamp(info.get('data_access_expires_at')),
+        'problem': problem,
+        'refresh_due': registry.refresh_due(info),
+        'refreshed': token != original_token,
+        'checked_at': timestamp(info['checked_at']),
+        'settings': {
+            'enabled': TOKEN_VALIDATION_ENABLED,
+            'ttl_seconds': TOKEN_VALIDATION_TTL,
+            'required_scopes': TOKEN_REQUIRED_SCOPES,
+            'refresh_window_seconds': TOKEN_REFRESH_WINDOW
+        },
+        'stats': registry.stats
+    }
+
+@mcp.tool()
+@_instrument_tool
+async def get_cache_stats() -> Dict:
+    """Reports statistics for the server's in-memory caches, request coalescing and result store.
+
+    The node cache serves repeated get_campaign_by_id, get_adset_by_id, get_ad_by_id,
+    get_ad_creative_by_id and get_details_of_ad_account calls with identical arguments
+    for a short, per-entity-type TTL. Pass bypass_cache=True to those tools to force
+    a fresh read. Independently, identical Graph API GET requests that overlap in time
+    are coalesced into a single request.
+
+    Returns:
+        Dict: A dictionary with a 'node_cache' block holding 'entries', 'max_entries',
+              'hits', 'misses', 'evictions', 'expirations', 'hit_rate' and the
+              per-entity 'ttl_seconds', and a 'single_flight' block holding 'requests'
+              (GETs actually sent), 'coalesced' (calls that shared one of them) and
+              'in_flight', and a 'result_store' block with the number of stored large
+              results, their memory and disk usage against the budgets, and counters.
+    """
+    return {
+        'node_cache': _get_node_cache().get_stats(),
+        'single_flight': {**SINGLE_FLIGHT_STATS, 'in_flight': len(INFLIGHT_REQUESTS)},
+        'result_store': await asyncio.to_thread(_get_result_store().get_stats)
+    }
+
+
+def _parse_server_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Facebook Ads MCP server")
+    parser.add_argument('--transport', choices=['stdio', 'sse', 'streamable-http'], default=MCP_TRANSPORT,
+                        help="stdio serves one client; sse and streamable-http serve many over HTTP")
+    parser.add_argument('--host', default=MCP_HOST, help="Interface to listen on for the HTTP transports")
+    parser.add_argument('--port', type=int, default=MCP_PORT, help="Port to listen on for the HTTP transports")
+    parser.add_argument('--workers', type=int, default=MCP_WORKERS,
+                        help="Worker processes for streamable-http (pre-forked, sharing the port)")
+    parser.add_argument('--fb-token', help="Server-wide Facebook access token (or set FB_ACCESS_TOKEN)")
+    parser.add_argument('--allow-server-token', action='store_true', default=MCP_ALLOW_SERVER_TOKEN,
+                        help="Let HTTP clients that send no token use the server-wide token")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
+def _run_workers(workers: int) -> None:
+    """Pre-fork serving for streamable HTTP: binds the listening socket once, forks
+    `workers` processes that all accept on it, and restarts any that exit until the
+    server is stopped with SIGINT or SIGTERM.
+
+    JSON parsing and aggregation are CPU-bound, so one process is limited to one core by
+    the GIL. Workers run the HTTP transport statelessly, since consecutive requests of a
+    client may reach different workers, and share the node cache, day cache, insights
+    store and result store through files under FB_MCP_DATA_DIR.
+
+    Rate-limit pacing, circuit breakers and request coalescing stay per worker: each
+    worker only sees the usage headers of its own responses, a breaker trips on one
+    worker's failures, and identical concurrent GETs reaching different workers are
+    each sent. To keep N workers from sending N times the Graph load, SERVER_WORKERS
+    splits FB_MAX_CONCURRENT_REQUESTS between them and stretches pacing delays N times.
+    """
+    global NODE_CACHE_BACKEND, RESULT_STORE_SHARED, RESULT_STORE_RUN_DIR, SERVER_WORKERS
+    import signal
+    import socket
+    import uvicorn
+
+    if not hasattr(os, 'fork'):
+        raise Exception("Multiple workers need os.fork(), which this platform doesn't have")
+    NODE_CACHE_BACKEND = 'sqlite'
+    RESULT_STORE_SHARED = True
+    SERVER_WORKERS = workers
+    # Created before forking so all workers share one directory
+    RESULT_STORE_RUN_DIR = _new_result_store_run_dir(RESULT_STORE_DIR)
+    mcp.settings.stateless_http = True
+
+    host, port = mcp.settings.host, mcp.settings.port
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    print(f"Serving streamable HTTP on http://{host}:{port}{mcp.settings.streamable_http_path} "
+          f"with {workers} workers", file=sys.stderr)
+
+    children = set()
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                config = uvicorn.Config(mcp.streamable_http_app(), log_level=mcp.settings.log_level.lower())
+                uvicorn.Server(config).run(sockets=[sock])
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        spawn()
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}; restarting it", file=sys.stderr)
+            time.sleep(1)
+            spawn()
+
+
+def main(argv: List[str]) -> None:
+    global REQUIRE_CLIENT_TOKEN
+    args = _parse_server_args(argv)
+    if args.transport == 'stdio':
+        _get_fb_access_token()
+        mcp.run(transport='stdio')
+    else:
+        # One long-lived server serves every client, sharing its connection pool, caches and rate-limit
+        # scheduler; each client is isolated by the token it sends. Anyone who can reach the port
+        # could use a server-wide token, so that fallback needs --allow-server-token
+        if args.allow_server_token:
+            _get_fb_access_token()
+            print("Clients that send no token use the server-wide Facebook token", file=sys.stderr)
+        else:
+            REQUIRE_CLIENT_TOKEN = True
+            print("Clients must send their Facebook token in the X-FB-Access-Token header "
+                  "or pass access_token to the tools", file=sys.stderr)
+        mcp.settings.host = args.host
+        mcp.settings.port = args.port
+        if args.host not in ('127.0.0.1', 'localhost', '::1'):
+            # FastMCP only sets up DNS rebinding protection for loopback hosts; keep it on and
+            # accept the configured public host names besides localhost
+            mcp.settings.transport_security = TransportSecuritySettings(
+                enable_dns_rebinding_protection=True,
+                allowed_hosts=['127.0.0.1:*', 'localhost:*', '[::1]:*', *MCP_ALLOWED_HOSTS],
+                allowed_origins=['http://127.0.0.1:*', 'http://localhost:*', 'http://[::1]:*',
+                                 *MCP_ALLOWED_ORIGINS]
+            )
+            if not MCP_ALLOWED_HOSTS:
+                print("Only requests addressed to localhost are accepted; set FB_MCP_ALLOWED_HOSTS "
+                      "to the host names clients use", file=sys.stderr)
+        if args.workers > 1:
+            if args.transport != 'streamable-http':
+                raise Exception("Multiple workers are only supported with --transport streamable-http")
+            _run_workers(args.workers)
+        else:
+            mcp.run(transport=args.transport)
 
 
 if __name__ == "__main__":
-    _get_fb_access_token()
-    mcp.run(transport='stdio')
+    main(sys.argv[1:])
     
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""Circuit breaker states: closed, open and half-open."""
+import asyncio
+import os
+
+import httpx
+import pytest
+
+os.environ.setdefault('FB_ACCESS_TOKEN', 'test_token')
+os.environ['FB_INSIGHTS_STORE'] = 'false'
+os.environ['FB_TOKEN_VALIDATION'] = 'false'
+
+import server
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(server.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(server, 'CIRCUIT_MIN_REQUESTS', 4)
+    monkeypatch.setattr(server, 'CIRCUIT_ERROR_RATE', 0.5)
+    monkeypatch.setattr(server, 'CIRCUIT_OPEN_SECONDS', 30)
+    monkeypatch.setattr(server, 'CIRCUIT_HALF_OPEN_PROBES', 1)
+    return now
+
+
+def attempt(breaker, outcome):
+    breaker.before_request()
+    breaker.record(outcome)
+
+
+def open_breaker():
+    breaker = server.CircuitBreaker('edges', 'ns')
+    for outcome in ['success', 'failure', 'success', 'failure']:
+        attempt(breaker, outcome)
+    return breaker
+
+
+def test_stays_closed_below_min_requests(clock):
+    breaker = server.CircuitBreaker('edges', 'ns')
+    for _ in range(3):
+        attempt(breaker, 'failure')
+    assert breaker.state == 'closed'
+
+
+def test_stays_closed_below_error_rate(clock):
+    breaker = server.CircuitBreaker('edges', 'ns')
+    for outcome in ['success', 'success', 'failure', 'success', 'neutral', 'failure', 'success']:
+        attempt(breaker, outcome)
+    assert breaker.state == 'closed'
+
+
+def test_old_outcomes_leave_the_window(clock, monkeypatch):
+    monkeypatch.setattr(server, 'CIRCUIT_WINDOW', 60)
+    breaker = server.CircuitBreaker('edges', 'ns')
+    for _ in range(3):
+        attempt(breaker, 'failure')
+    clock[0] += 61
+    attempt(breaker, 'failure')
+    assert breaker.state == 'closed'
+
+
+def test_opens_and_fails_fast(clock):
+    breaker = open_breaker()
+    assert breaker.state == 'open'
+    clock[0] += 10
+    with pytest.raises(server.GraphAPIError) as raised:
+        breaker.before_request()
+    assert raised.value.category == 'circuit_open'
+    assert raised.value.retry_after == 20
+    assert breaker.get_status()['rejected'] == 1
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = open_breaker()
+    clock[0] += 30
+    breaker.before_request()
+    assert breaker.state == 'half_open'
+    # Only CIRCUIT_HALF_OPEN_PROBES requests are let through while probing
+    with pytest.raises(server.GraphAPIError):
+        breaker.before_request()
+    breaker.record('success')
+    assert breaker.state == 'closed'
+    assert breaker.get_status()['window_requests'] == 0
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = open_breaker()
+    clock[0] += 30
+    attempt(breaker, 'failure')
+    assert breaker.state == 'open'
+    assert breaker.get_status()['trips'] == 2
+    with pytest.raises(server.GraphAPIError):
+        breaker.before_request()
+
+
+def test_open_breaker_stops_requests_for_its_family_and_token(clock, monkeypatch):
+    monkeypatch.setattr(server, 'CIRCUIT_BREAKERS', {})
+    monkeypatch.setattr(server, 'RETRY_MAX_ATTEMPTS', 0)
+    sent = []
+
+    def handler(request):
+        sent.append(request.url.path)
+        if request.url.path.endswith('/campaigns'):
+            return httpx.Response(503, json={'error': {'message': 'unavailable'}})
+        return httpx.Response(200, json={'id': '1'})
+
+    async def run():
+        server.HTTP_CLIENT = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        server.HTTP_CLIENT_LOOP = asyncio.get_running_loop()
+        server.HTTP_SEMAPHORE = asyncio.Semaphore(4)
+        edge = f'{server.FB_GRAPH_URL}/act_1/campaigns'
+        categories = []
+        for token in ['token_a'] * 5 + ['token_b']:
+            try:
+                await server._request_graph_api(edge, {'access_token': token})
+            except server.GraphAPIError as e:
+                categories.append(e.category)
+        node = await server._request_graph_api(f'{server.FB_GRAPH_URL}/1', {'access_token': 'token_a'})
+        return categories, node
+
+    categories, node = asyncio.run(run())
+    assert categories == ['transient'] * 4 + ['circuit_open', 'transient']
+    assert node == {'id': '1'}
+    assert len(sent) == 6
@@ -0,0 +1,46 @@
+"""The local insights store shared by several server processes."""
+import os
+import sqlite3
+import time
+
+os.environ.setdefault('FB_ACCESS_TOKEN', 'test_token')
+os.environ['FB_TOKEN_VALIDATION'] = 'false'
+
+import server
+
+ROW = {'ad_id': '1', 'spend': '10.5', 'impressions': '100', 'date_start': '2024-03-01', 'date_stop': '2024-03-01'}
+
+
+def stored_rows(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute('SELECT COUNT(*) FROM insights_rows').fetchone()[0]
+
+
+def test_stores_sharing_a_file_add_columns_once(tmp_path):
+    path = str(tmp_path / 'store.sqlite')
+    first, second = server.InsightsStore(path), server.InsightsStore(path)
+    first.ingest('ns', 'act_1', {'level': 'ad'}, [ROW])
+    # The second store's column list predates the first store's ALTER TABLE
+    second.ingest('ns', 'act_1', {'level': 'ad'}, [{**ROW, 'ad_id': '2'}])
+    assert stored_rows(path) == 2
+
+
+def test_prunes_rows_past_retention_and_row_limit(tmp_path, monkeypatch):
+    path = str(tmp_path / 'store.sqlite')
+    store = server.InsightsStore(path)
+    store.ingest('ns', 'act_1', {'level': 'ad'}, [{**ROW, 'ad_id': str(i)} for i in range(5)])
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE insights_rows SET fetched_at = ? WHERE ad_id = '0'", (time.time() - 200 * 86400,))
+
+    monkeypatch.setattr(server, 'INSIGHTS_STORE_MAX_STORED_ROWS', 3)
+    store._pruned_at = 0
+    store.ingest('ns', 'act_1', {'level': 'ad'}, [{**ROW, 'ad_id': '5', 'actions': [{'action_type': 'x', 'value': '1'}]}])
+
+    assert stored_rows(path) == 3
+    with sqlite3.connect(path) as conn:
+        kept = {row[0] for row in conn.execute('SELECT ad_id FROM insights_rows')}
+        orphans = conn.execute(
+            'SELECT COUNT(*) FROM insights_action_rows WHERE row_key NOT IN (SELECT row_key FROM insights_rows)'
+        ).fetchone()[0]
+    assert '0' not in kept and '5' in kept
+    assert orphans == 0
@@ -0,0 +1,101 @@
+"""The node cache: TTL expiry, LRU eviction and the SQLite backend shared by workers."""
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+
+os.environ.setdefault('FB_ACCESS_TOKEN', 'test_token')
+os.environ['FB_INSIGHTS_STORE'] = 'false'
+os.environ['FB_TOKEN_VALIDATION'] = 'false'
+
+import server
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_cache(request, tmp_path):
+    def make(max_entries=10):
+        if request.param == 'sqlite':
+            return server.SQLiteNodeCache(str(tmp_path / 'node_cache.sqlite'), max_entries)
+        return server.NodeCache(max_entries)
+    return make
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Moves both clocks the caches use (monotonic in memory, wall-clock in SQLite)."""
+    now = [1000.0]
+    monkeypatch.setattr(server.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(server.time, 'time', lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_their_ttl(make_cache, clock):
+    cache = make_cache()
+    cache.set('campaign', {'id': '1'}, ttl=60)
+    clock[0] += 59
+    assert cache.get('campaign') == {'id': '1'}
+    clock[0] += 2
+    assert cache.get('campaign') is None
+    assert cache.get_stats()['expirations'] == 1
+
+
+def test_zero_ttl_is_not_cached(make_cache):
+    cache = make_cache()
+    cache.set('insights', {'data': []}, ttl=0)
+    assert cache.get('insights') is None
+
+
+def test_least_recently_used_entry_is_evicted(make_cache, clock):
+    cache = make_cache(max_entries=2)
+    cache.set('a', {'id': 'a'}, ttl=60)
+    clock[0] += 1
+    cache.set('b', {'id': 'b'}, ttl=60)
+    clock[0] += 1
+    cache.get('a')
+    clock[0] += 1
+    cache.set('c', {'id': 'c'}, ttl=60)
+    assert cache.get('b') is None
+    assert cache.get('a') == {'id': 'a'} and cache.get('c') == {'id': 'c'}
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_returned_values_are_copies(make_cache):
+    cache = make_cache()
+    cache.set('ad', {'id': '1', 'tags': ['x']}, ttl=60)
+    cache.get('ad')['tags'].append('y')
+    assert cache.get('ad') == {'id': '1', 'tags': ['x']}
+
+
+def test_sqlite_cache_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'node_cache.sqlite')
+    first, second = server.SQLiteNodeCache(path, 10), server.SQLiteNodeCache(path, 10)
+    first.set('adaccount', {'id': 'act_1'}, ttl=60)
+    assert second.get('adaccount') == {'id': 'act_1'}
+    second.clear()
+    assert first.get('adaccount') is None
+
+
+def test_cached_call_fetches_once_per_token(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.params['access_token'])
+        return httpx.Response(200, json={'id': '123', 'name': 'Campaign'})
+
+    async def run():
+        server.HTTP_CLIENT = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        server.HTTP_CLIENT_LOOP = asyncio.get_running_loop()
+        server.HTTP_SEMAPHORE = asyncio.Semaphore(4)
+        url = f'{server.FB_GRAPH_URL}/123'
+        for token in ['token_a', 'token_a', 'token_b']:
+            await server._make_cached_graph_api_call(url, {'access_token': token, 'fields': 'name,id'}, 'campaign')
+        # Field order doesn't change the cache key; bypass_cache always fetches
+        await server._make_cached_graph_api_call(url, {'access_token': 'token_a', 'fields': 'id,name'}, 'campaign')
+        await server._make_cached_graph_api_call(url, {'access_token': 'token_a', 'fields': 'id,name'}, 'campaign',
+                                                 bypass_cache=True)
+
+    monkeypatch.setattr(server, 'NODE_CACHE', server.NodeCache(10))
+    asyncio.run(run())
+    assert requests == ['token_a', 'token_b', 'token_a']
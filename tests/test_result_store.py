@@ -0,0 +1,149 @@
+"""Oversized tool results: spilling into the result store, read_result_page and query_result."""
+import asyncio
+import os
+
+import httpx
+import pytest
+
+os.environ.setdefault('FB_ACCESS_TOKEN', 'test_token')
+os.environ['FB_INSIGHTS_STORE'] = 'false'
+os.environ['FB_TOKEN_VALIDATION'] = 'false'
+
+import server
+
+ADS = [
+    {'id': str(i), 'name': f'Ad {i}', 'campaign_id': f'c{i % 3}', 'spend': str(i * 1.5), 'clicks': str(i),
+     'actions': [{'action_type': 'purchase', 'value': str(i % 4)}]}
+    for i in range(60)
+]
+
+
+def ads_edge(request):
+    return httpx.Response(200, json={'data': ADS})
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    store = server.ResultStore(str(tmp_path), 1 << 20, 1 << 20, ttl=60)
+    monkeypatch.setattr(server, 'RESULT_STORE', store)
+    monkeypatch.setattr(server, 'RESULT_SPILL_BYTES', 1024)
+    monkeypatch.setattr(server, 'FB_ACCESS_TOKEN', 'test_token')
+    return store
+
+
+def call(tool, **kwargs):
+    async def run():
+        server.HTTP_CLIENT = httpx.AsyncClient(transport=httpx.MockTransport(ads_edge))
+        server.HTTP_CLIENT_LOOP = asyncio.get_running_loop()
+        server.HTTP_SEMAPHORE = asyncio.Semaphore(4)
+        return await tool(**kwargs)
+    return asyncio.run(run())
+
+
+def spilled_handle():
+    summary = call(server.get_ads_by_adaccount, act_id='act_1', fields=['name', 'spend'])
+    return summary['result_handle']
+
+
+def test_large_result_is_replaced_by_a_summary():
+    summary = call(server.get_ads_by_adaccount, act_id='act_1', fields=['name', 'spend'])
+    assert 'data' not in summary
+    assert summary['stored']['rows'] == len(ADS)
+    assert summary['preview'] == ADS[:server.RESULT_PREVIEW_ROWS]
+    assert summary['schema']['spend'] == ['numeric string']
+    assert summary['schema']['actions'] == ['array']
+
+
+def test_small_result_is_returned_inline(monkeypatch):
+    monkeypatch.setattr(server, 'RESULT_SPILL_BYTES', 1 << 20)
+    result = call(server.get_ads_by_adaccount, act_id='act_1')
+    assert result['data'] == ADS
+
+
+def test_pages_cover_every_row():
+    handle = spilled_handle()
+    rows, offset = [], -5
+    while offset is not None:
+        page = call(server.read_result_page, result_handle=handle, offset=offset, limit=25)
+        assert page['total_rows'] == len(ADS)
+        rows += page['data']
+        offset = page['next_offset']
+    assert rows == ADS
+
+
+def test_handles_are_scoped_to_the_token():
+    handle = spilled_handle()
+    with pytest.raises(Exception, match='Unknown or expired result handle'):
+        call(server.read_result_page, result_handle=handle, access_token='other_token')
+
+
+def test_query_filters_sorts_and_projects():
+    result = call(
+        server.query_result,
+        result_handle=spilled_handle(),
+        filtering=[{'field': 'actions:purchase', 'operator': 'GREATER_THAN', 'value': 2},
+                   {'field': 'campaign_id', 'operator': 'IN', 'value': ['c0', 'c1']}],
+        fields=['id', 'spend'],
+        sort_by='spend',
+        limit=3
+    )
+    expected = [ad for ad in ADS if ad['actions'][0]['value'] == '3' and ad['campaign_id'] in ('c0', 'c1')]
+    assert result['total_matches'] == len(expected)
+    assert result['data'] == [{'id': ad['id'], 'spend': ad['spend']} for ad in expected[::-1][:3]]
+    assert result['next_offset'] == 3
+
+
+def test_query_aggregates_and_pages_groups():
+    handle = spilled_handle()
+    first = call(server.query_result, result_handle=handle, group_by=['campaign_id'],
+                 metrics=['spend', 'clicks'], derived=['cpc'], offset=-1, limit=2)
+    assert (first['offset'], first['next_offset'], first['total_groups']) == (0, 2, 3)
+    last = call(server.query_result, result_handle=handle, group_by=['campaign_id'],
+                metrics=['spend', 'clicks'], derived=['cpc'], offset=2, limit=2)
+    assert last['next_offset'] is None and len(last['rows']) == 1
+
+    campaign = first['columns'].index('campaign_id')
+    clicks = first['columns'].index('clicks')
+    totals = {row[campaign]: row[clicks] for row in first['rows'] + last['rows']}
+    assert totals == {f'c{k}': sum(i for i in range(len(ADS)) if i % 3 == k) for k in range(3)}
+
+
+def test_results_move_to_disk_then_are_evicted(tmp_path):
+    store = server.ResultStore(str(tmp_path), max_memory_bytes=100, max_disk_bytes=150, ttl=60)
+    lines = [b'{"id":"%d"}' % i for i in range(8)]  # 9 bytes per row with its newline
+    first = store.put('ns', lines, None)
+    second = store.put('ns', lines, None)
+    assert store.get_stats()['on_disk'] == 1
+    assert store.read_rows(store.get('ns', first), 2, 4) == [{'id': '2'}, {'id': '3'}]
+
+    store.put('ns', lines, None)
+    # The least recently used result on disk is dropped once the disk budget is exceeded
+    with pytest.raises(Exception, match='Unknown or expired'):
+        store.get('ns', second)
+    assert store.get_stats()['evictions'] == 1
+    assert store.disk_bytes <= 150 and store.memory_bytes <= 100
+
+
+def test_results_expire_after_idle_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(server.time, 'monotonic', lambda: now[0])
+    store = server.ResultStore(str(tmp_path), 1 << 20, 1 << 20, ttl=60)
+    handle = store.put('ns', [b'{}'], None)
+    now[0] += 50
+    store.get('ns', handle)
+    now[0] += 50
+    assert store.get('ns', handle)['size'] == 3
+    now[0] += 61
+    with pytest.raises(Exception):
+        store.get('ns', handle)
+
+
+def test_shared_store_reads_results_of_other_workers(tmp_path):
+    writer = server.ResultStore(str(tmp_path), 1 << 20, 1 << 20, ttl=60, shared=True)
+    reader = server.ResultStore(str(tmp_path), 1 << 20, 1 << 20, ttl=60, shared=True)
+    handle = writer.put('ns', [b'["a",1]', b'["b",2]'], ['name', 'clicks'])
+    entry = reader.get('ns', handle)
+    assert entry['columns'] == ['name', 'clicks']
+    assert reader.read_rows(entry, 0, 10) == [['a', 1], ['b', 2]]
+    with pytest.raises(Exception):
+        reader.get('other_ns', handle)
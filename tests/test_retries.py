@@ -0,0 +1,105 @@
+"""Graph API error classification and the retry loop of _request_graph_api."""
+import asyncio
+import os
+
+import httpx
+import pytest
+
+os.environ.setdefault('FB_ACCESS_TOKEN', 'test_token')
+os.environ['FB_INSIGHTS_STORE'] = 'false'
+os.environ['FB_TOKEN_VALIDATION'] = 'false'
+
+import server
+
+URL = f'{server.FB_GRAPH_URL}/act_1/campaigns'
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(server, '_retry_delay', lambda attempt: 0)
+    monkeypatch.setattr(server, 'CIRCUIT_BREAKERS', {})
+
+
+def send(responses, method='GET'):
+    """Serves `responses` in turn (an exception is raised instead of answering) and
+    returns (result or raised GraphAPIError, number of requests sent)."""
+    sent = []
+
+    def handler(request):
+        response = responses[min(len(sent), len(responses) - 1)]
+        sent.append(request)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def run():
+        server.HTTP_CLIENT = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        server.HTTP_CLIENT_LOOP = asyncio.get_running_loop()
+        server.HTTP_SEMAPHORE = asyncio.Semaphore(4)
+        try:
+            return await server._request_graph_api(URL, {'access_token': 'test_token'}, method)
+        except server.GraphAPIError as e:
+            return e
+
+    return asyncio.run(run()), len(sent)
+
+
+def graph_error(status_code, **error):
+    return httpx.Response(status_code, json={'error': {'message': 'failed', **error}})
+
+
+@pytest.mark.parametrize('status_code, error, category', [
+    (400, {'code': 17}, 'throttled'),
+    (400, {'code': 80004}, 'throttled'),
+    (429, {}, 'throttled'),
+    (400, {'code': 190}, 'auth'),
+    (403, {'code': 200}, 'auth'),
+    (500, {'code': 1}, 'transient'),
+    (400, {'code': 100, 'is_transient': True}, 'transient'),
+    (503, {}, 'transient'),
+    (400, {'code': 100}, 'permanent'),
+])
+def test_classification(status_code, error, category):
+    assert server._classify_graph_error(status_code, error) == category
+
+
+def test_error_without_json_body_is_classified_by_status():
+    error = server._graph_error_from_response(httpx.Response(502, text='<html>Bad Gateway</html>'))
+    assert error.category == 'transient'
+    assert error.payload['status_code'] == 502
+
+
+def test_transient_errors_are_retried_until_success():
+    result, sent = send([graph_error(503), graph_error(500, code=2), httpx.Response(200, json={'data': []})])
+    assert result == {'data': []}
+    assert sent == 3
+
+
+def test_connection_errors_are_retried():
+    result, sent = send([httpx.ConnectError('connection refused'), httpx.Response(200, json={'id': '1'})])
+    assert result == {'id': '1'}
+    assert sent == 2
+
+
+def test_permanent_errors_are_not_retried():
+    error, sent = send([graph_error(400, code=100, error_subcode=33, fbtrace_id='abc')])
+    assert sent == 1
+    assert error.category == 'permanent'
+    assert error.payload == {'message': 'failed', 'category': 'permanent', 'status_code': 400,
+                             'code': 100, 'error_subcode': 33, 'fbtrace_id': 'abc'}
+
+
+def test_auth_errors_are_not_retried():
+    error, sent = send([graph_error(400, code=190, type='OAuthException')])
+    assert (error.category, sent) == ('auth', 1)
+
+
+def test_retries_stop_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(server, 'RETRY_MAX_ATTEMPTS', 2)
+    error, sent = send([graph_error(503)])
+    assert (error.category, sent) == ('transient', 3)
+
+
+def test_writes_are_not_retried():
+    error, sent = send([graph_error(503)], method='POST')
+    assert (error.category, sent) == ('transient', 1)
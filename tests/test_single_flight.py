@@ -0,0 +1,52 @@
+"""Identical concurrent GETs share one request, and each caller keeps its own deadline."""
+import asyncio
+import os
+
+import httpx
+
+os.environ.setdefault('FB_ACCESS_TOKEN', 'test_token')
+os.environ['FB_INSIGHTS_STORE'] = 'false'
+os.environ['FB_TOKEN_VALIDATION'] = 'false'
+
+import server
+
+URL = f'{server.FB_GRAPH_URL}/act_1/campaigns'
+PARAMS = {'access_token': 'test_token', 'fields': 'name'}
+
+
+def test_callers_share_the_request_with_their_own_deadlines():
+    sent = []
+
+    async def handler(request):
+        sent.append(request)
+        # Like a real transport, give up when the request's read timeout passes first
+        if request.extensions['timeout']['read'] < 0.2:
+            await asyncio.sleep(request.extensions['timeout']['read'])
+            raise httpx.ReadTimeout('timed out', request=request)
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={'data': [{'id': '1'}]})
+
+    async def call(deadline, tool):
+        server.CURRENT_TOOL.set(tool)
+        server.TOOL_DEADLINE_AT.set(asyncio.get_running_loop().time() + deadline)
+        try:
+            return await server._make_graph_api_call(URL, dict(PARAMS))
+        except server.DeadlineExceeded as e:
+            return e
+
+    async def run():
+        server.HTTP_CLIENT = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        server.HTTP_CLIENT_LOOP = asyncio.get_running_loop()
+        server.HTTP_SEMAPHORE = asyncio.Semaphore(4)
+        # The leader's deadline passes before the response arrives; the follower's doesn't
+        leader = asyncio.ensure_future(call(0.05, 'leader_tool'))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(call(5, 'follower_tool'))
+        return await asyncio.gather(leader, follower)
+
+    server.TOOL_METRICS.clear()
+    leader, follower = asyncio.run(run())
+    assert isinstance(leader, server.DeadlineExceeded)
+    assert follower == {'data': [{'id': '1'}]}
+    assert len(sent) == 1
+    assert server.TOOL_METRICS['leader_tool']['graph_requests'] == 1
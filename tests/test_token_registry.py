@@ -0,0 +1,154 @@
+"""The token registry: debug_token validation, expiry and refreshing the server-wide token."""
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+
+os.environ.setdefault('FB_ACCESS_TOKEN', 'test_token')
+os.environ['FB_INSIGHTS_STORE'] = 'false'
+os.environ['FB_TOKEN_VALIDATION'] = 'false'
+
+import server
+
+DAY = 24 * 3600
+
+
+def token_data(expires_in=60 * DAY, **overrides):
+    return {'is_valid': True, 'type': 'USER', 'app_id': '1', 'user_id': '2', 'scopes': ['ads_read'],
+            'expires_at': int(time.time() + expires_in), 'data_access_expires_at': 0, **overrides}
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    """Serves debug_token from `tokens` (input token -> data) and counts the calls."""
+    monkeypatch.setenv('FB_APP_ID', '1')
+    monkeypatch.setenv('FB_APP_SECRET', 'secret')
+    monkeypatch.setattr(server, 'FB_ACCESS_TOKEN', 'server_token')
+    state = {'tokens': {}, 'debug_calls': 0}
+
+    def handler(request):
+        state['debug_calls'] += 1
+        data = state['tokens'].get(request.url.params['input_token'])
+        if data is None:
+            return httpx.Response(500, json={'error': {'message': 'unavailable'}})
+        return httpx.Response(200, json={'data': data})
+
+    state['handler'] = handler
+    return state
+
+
+def run(graph, coroutine_fn):
+    async def main():
+        server.HTTP_CLIENT = httpx.AsyncClient(transport=httpx.MockTransport(graph['handler']))
+        server.HTTP_CLIENT_LOOP = asyncio.get_running_loop()
+        server.HTTP_SEMAPHORE = asyncio.Semaphore(4)
+        registry = server.TokenRegistry()
+        result = await coroutine_fn(registry)
+        await asyncio.gather(*registry._refresh_tasks)
+        return registry, result
+    return asyncio.run(main())
+
+
+def rejection(registry, token):
+    async def resolve():
+        try:
+            await registry.resolve(token)
+        except server.GraphAPIError as e:
+            return e
+    return resolve()
+
+
+@pytest.mark.parametrize('data, message', [
+    (token_data(expires_in=-60), 'expired'),
+    (token_data(is_valid=False, error={'message': 'Session has been invalidated'}), 'invalidated'),
+    (token_data(data_access_expires_at=int(time.time()) - 60), 'Data access'),
+    (token_data(scopes=['pages_show_list']), 'missing the required permission'),
+])
+def test_unusable_tokens_are_rejected_locally(graph, data, message):
+    graph['tokens']['client_token'] = data
+    registry, error = run(graph, lambda registry: rejection(registry, 'client_token'))
+    assert error.category == 'auth' and message in error.payload['message']
+    assert registry.stats['rejections'] == 1
+
+
+def test_validation_is_shared_and_reused(graph):
+    graph['tokens']['client_token'] = token_data()
+
+    async def resolve_repeatedly(registry):
+        await asyncio.gather(*(registry.resolve('client_token') for _ in range(3)))
+        token = await registry.resolve('client_token')
+        calls = graph['debug_calls']
+        await registry.get_info('client_token', force=True)
+        return token, calls
+
+    registry, (token, calls) = run(graph, resolve_repeatedly)
+    assert token == 'client_token'
+    assert calls == 1 and graph['debug_calls'] == 2
+
+
+def test_unreachable_debug_token_lets_the_token_through(graph):
+    registry, token = run(graph, lambda registry: registry.resolve('unknown_token'))
+    assert token == 'unknown_token'
+    info = registry._entries[server._token_namespace('unknown_token')]
+    assert info['verified'] is False
+    assert info['recheck_at'] <= time.time() + server.TOKEN_RECHECK_SECONDS
+
+
+def test_server_token_near_expiry_is_exchanged(graph, monkeypatch):
+    graph['tokens']['server_token'] = token_data(expires_in=DAY)
+    graph['tokens']['new_server_token'] = token_data()
+    monkeypatch.setattr(server.generate_token, 'get_long_lived_token', lambda token: f'new_{token}')
+
+    registry, _ = run(graph, lambda registry: registry.resolve('server_token'))
+    assert server.FB_ACCESS_TOKEN == 'new_server_token'
+    assert registry.replacement_for('server_token') == 'new_server_token'
+    assert registry.stats['refreshes'] == 1
+
+
+def test_client_tokens_are_never_exchanged(graph, monkeypatch):
+    graph['tokens']['client_token'] = token_data(expires_in=DAY)
+    exchanged = []
+    monkeypatch.setattr(server.generate_token, 'get_long_lived_token', exchanged.append)
+
+    registry, token = run(graph, lambda registry: registry.resolve('client_token'))
+    assert token == 'client_token' and exchanged == []
+    assert registry.replacement_for('client_token') is None
+    assert server.FB_ACCESS_TOKEN == 'server_token'
+    assert registry.refresh_due(registry._entries[server._token_namespace('client_token')])
+
+
+def test_failed_exchange_is_not_retried_until_revalidated(graph, monkeypatch):
+    graph['tokens']['server_token'] = token_data(expires_in=DAY)
+    exchanged = []
+    monkeypatch.setattr(server.generate_token, 'get_long_lived_token', lambda token: exchanged.append(token))
+
+    async def resolve_twice(registry):
+        await registry.resolve('server_token')
+        await asyncio.gather(*registry._refresh_tasks)
+        return await registry.resolve('server_token')
+
+    registry, token = run(graph, resolve_twice)
+    assert token == 'server_token' and exchanged == ['server_token']
+    assert server.FB_ACCESS_TOKEN == 'server_token'
+
+
+def test_replacements_end_when_the_old_token_expires(graph):
+    registry = server.TokenRegistry()
+    registry._remember(registry._replacements, server._token_namespace('old'),
+                       {'token': 'new', 'until': time.time() - 1})
+    assert registry.replacement_for('old') is None
+
+
+def test_registry_is_bounded(graph, monkeypatch):
+    monkeypatch.setattr(server, 'TOKEN_REGISTRY_MAX_TOKENS', 2)
+    for token in ['a', 'b', 'c']:
+        graph['tokens'][token] = token_data()
+
+    async def resolve_all(registry):
+        for token in ['a', 'b', 'c']:
+            await registry.resolve(token)
+
+    registry, _ = run(graph, resolve_all)
+    assert list(registry._entries) == [server._token_namespace('b'), server._token_namespace('c')]